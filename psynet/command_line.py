@@ -41,11 +41,12 @@ from psynet.version import check_dallinger_version, check_versions
 
 from . import deployment_info
 from .data import drop_all_db_tables, dump_db_to_disk, ingest_zip, init_db
+from .field import decode_python_object, get_python_object_columns
 from .log import bold
 from .lucid import get_lucid_service
 from .recruiters import BaseLucidRecruiter, HotAirRecruiter
 from .redis import redis_vars
-from .serialize import serialize, unserialize
+from .serialize import serialize
 from .utils import (
     get_args,
     get_experiment_url,
@@ -182,7 +183,7 @@ def _experiment_variables(connection, echo=False):
 
         assert len(records) == 1
 
-        _vars = unserialize(records[0][0])
+        _vars = decode_python_object(records[0][0])
         if echo:
             click.echo(serialize(_vars, indent=4))
         return _vars
@@ -2154,6 +2155,268 @@ def rpdb(ip, port):
     )
 
 
+##################
+# migrate-jsonb #
+##################
+
+
+# Matches the non-finite numbers that Python's json module writes (NaN, Infinity, -Infinity)
+# in the position of a JSON value, so that strings merely mentioning these words
+# (e.g. "Infinity War") stay queryable. The rare false positive (e.g. "a, NaN, b")
+# is harmless, as wrapped values still round-trip unchanged.
+NON_FINITE_JSON_NUMBER_PATTERN = r"(^|[\[,:])\s*-?(NaN|Infinity)\s*([],}]|$)"
+
+
+def _jsonb_column_migration(table, column, revert=False):
+    """
+    Returns the ``ALTER TABLE`` statement converting a ``PythonObject`` column between
+    text and ``JSONB`` storage (see ``psynet.field.PythonObject``).
+    Values with jsonpickle type tags (or non-finite numbers, which JSONB can't represent)
+    are wrapped as opaque strings; all other values become native JSONB.
+    """
+    if revert:
+        using = (
+            f"CASE WHEN jsonb_typeof(\"{column}\") = 'object' "
+            f"AND \"{column}\" ? 'py/jsonpickle' "
+            f"THEN \"{column}\" ->> 'py/jsonpickle' "
+            f'ELSE "{column}"::text END'
+        )
+        return (
+            f'ALTER TABLE "{table}" ALTER COLUMN "{column}" TYPE varchar USING {using}'
+        )
+
+    using = (
+        f'CASE WHEN "{column}" IS NULL THEN NULL '
+        f'WHEN position(\'"py/\' in "{column}") > 0 '
+        f"OR \"{column}\" ~ '{NON_FINITE_JSON_NUMBER_PATTERN}' "
+        f"THEN jsonb_build_object('py/jsonpickle', \"{column}\") "
+        f'ELSE "{column}"::jsonb END'
+    )
+    return f'ALTER TABLE "{table}" ALTER COLUMN "{column}" TYPE jsonb USING {using}'
+
+
+@psynet.command("migrate-jsonb")
+@click.argument("location", default="local")
+@click.option(
+    "--app",
+    default=None,
+    help="Name of the experiment app (required for non-local deployments)",
+)
+@option_server
+@click.option(
+    "--revert",
+    is_flag=True,
+    help="Convert the columns back from JSONB to text storage.",
+)
+@require_exp_directory
+def migrate_jsonb(location, app, server, revert):
+    """
+    Converts the columns holding serialized Python objects (e.g. trial definitions and answers,
+    and ``vars``) between text and Postgres ``JSONB`` storage. After migrating to JSONB,
+    set ``python_object_storage = jsonb`` in the experiment's config.txt.
+    """
+    from .experiment import import_local_experiment
+
+    import_local_experiment()
+    target_type = "character varying" if revert else "jsonb"
+    columns = get_python_object_columns(db.Base.metadata)
+
+    with db_connection(location, app, server) as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            "SELECT table_name, column_name, data_type FROM information_schema.columns "
+            "WHERE table_schema = current_schema()"
+        )
+        data_types = {(table, column): type_ for table, column, type_ in cursor}
+
+        n_migrated = 0
+        for table, column in columns:
+            data_type = data_types.get((table, column))
+            if data_type is None or data_type == target_type:
+                continue
+            log(f"Migrating {table}.{column} ({data_type} -> {target_type})...")
+            cursor.execute(_jsonb_column_migration(table, column, revert=revert))
+            n_migrated += 1
+        connection.commit()
+        cursor.close()
+
+    log(f"Migrated {n_migrated} column(s).")
+    if not revert:
+        log("Remember to set `python_object_storage = jsonb` in your config.txt.")
+
+
+###################
+# repair-counters #
+###################
+
+
+@psynet.command("repair-counters")
+@click.argument("location", default="local")
+@click.option(
+    "--app",
+    default=None,
+    help="Name of the experiment app (required for non-local deployments)",
+)
+@option_server
+@click.option(
+    "--check",
+    is_flag=True,
+    help="Only report inconsistent counters, without repairing them.",
+)
+@require_exp_directory
+def repair_counters(location, app, server, check):
+    """
+    Checks the trial counters stored on chain nodes (``n_viable_trials`` and
+    ``n_completed_and_processed_trials``) against the trial table, and the copies
+    of these stored on chain networks (``head_degree`` and ``head_n_viable_trials``)
+    against their head nodes, and repairs any inconsistencies.
+    """
+    from sqlalchemy.dialects import postgresql
+
+    from .experiment import import_local_experiment
+    from .trial.chain import (
+        get_chain_registry_repair_statements,
+        get_trial_counter_repair_statements,
+    )
+
+    import_local_experiment()
+
+    def compile_statement(statement):
+        return str(
+            statement.compile(
+                dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+            )
+        )
+
+    # Node counters are repaired first, because the network columns are copied from them.
+    for label, (check_statement, repair_statement) in [
+        ("Node", get_trial_counter_repair_statements()),
+        ("Network", get_chain_registry_repair_statements()),
+    ]:
+        with db_connection(location, app, server) as connection:
+            cursor = connection.cursor()
+            cursor.execute(compile_statement(check_statement))
+            inconsistent = cursor.fetchall()
+            names = [column[0] for column in cursor.description[1::2]]
+            for object_id, *values in inconsistent:
+                counters = ", ".join(
+                    f"{name} = {stored} (should be {actual})"
+                    for name, stored, actual in zip(names, values[::2], values[1::2])
+                )
+                log(f"{label} {object_id}: {counters}")
+
+            if not check:
+                cursor.execute(compile_statement(repair_statement))
+                connection.commit()
+            cursor.close()
+
+        if not inconsistent:
+            log(f"All {label.lower()} counters are consistent.")
+        elif check:
+            log(
+                f"Found {len(inconsistent)} {label.lower()}(s) with inconsistent counters."
+            )
+        else:
+            log(f"Repaired the counters of {len(inconsistent)} {label.lower()}(s).")
+
+
+##############
+# upgrade-db #
+##############
+
+# Columns and indexes that were added to PsyNet's tables in the current release.
+# ``psynet upgrade-db`` adds them to databases created by earlier versions;
+# new databases get them automatically.
+UPGRADE_COLUMNS = [
+    ("request", "n_queries"),
+    ("process", "timeout"),
+    ("process", "timeout_scheduled_for"),
+    ("participant_link_barrier", "checked"),
+    ("node", "n_viable_trials"),
+    ("node", "n_completed_and_processed_trials"),
+    ("network", "head_degree"),
+    ("network", "head_n_viable_trials"),
+    ("network", "random_key"),
+]
+
+UPGRADE_INDEXES = [
+    "ix_info_participant_id_trial_maker_id",
+    "ix_network_head_id",
+    "ix_network_open_chains",
+    "ix_network_registry",
+    "ix_network_registry_balanced",
+    "ix_node_ready_to_spawn",
+    "ix_participant_link_barrier_unchecked",
+    "ix_participant_link_barrier_waiting",
+]
+
+
+def _schema_upgrade_statements(metadata):
+    """
+    Returns the statements adding the columns in ``UPGRADE_COLUMNS`` and the indexes
+    in ``UPGRADE_INDEXES`` to an existing database. The statements do nothing
+    if the column or index already exists.
+    """
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateIndex
+
+    dialect = postgresql.dialect()
+    ddl_compiler = dialect.ddl_compiler(dialect, None)
+
+    statements = []
+    for table, column in UPGRADE_COLUMNS:
+        specification = ddl_compiler.get_column_specification(
+            metadata.tables[table].c[column]
+        )
+        statements.append(
+            f'ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS {specification}'
+        )
+
+    indexes = {
+        index.name: index
+        for table in metadata.tables.values()
+        for index in table.indexes
+    }
+    for name in UPGRADE_INDEXES:
+        statements.append(
+            str(CreateIndex(indexes[name], if_not_exists=True).compile(dialect=dialect))
+        )
+    return statements
+
+
+@psynet.command("upgrade-db")
+@click.argument("location", default="local")
+@click.option(
+    "--app",
+    default=None,
+    help="Name of the experiment app (required for non-local deployments)",
+)
+@option_server
+@require_exp_directory
+@click.pass_context
+def upgrade_db(ctx, location, app, server):
+    """
+    Upgrades a database created by an earlier version of PsyNet, adding the columns and indexes
+    introduced since (see ``UPGRADE_COLUMNS`` and ``UPGRADE_INDEXES``).
+    It then runs ``psynet repair-counters`` to populate the new counter columns.
+    """
+    from .experiment import import_local_experiment
+
+    import_local_experiment()
+    statements = _schema_upgrade_statements(db.Base.metadata)
+
+    with db_connection(location, app, server) as connection:
+        cursor = connection.cursor()
+        for statement in statements:
+            log(statement)
+            cursor.execute(statement)
+        connection.commit()
+        cursor.close()
+
+    log(f"Upgraded the database schema ({len(statements)} statement(s)).")
+    ctx.invoke(repair_counters, location=location, app=app, server=server, check=False)
+
+
 ###########
 # load #
 ###########
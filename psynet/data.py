@@ -31,7 +31,7 @@ from dallinger.utils import classproperty
 from jsonpickle.util import importable_name
 from sqlalchemy import Column, String
 from sqlalchemy.ext.declarative import declared_attr
-from sqlalchemy.orm import deferred
+from sqlalchemy.orm import defer, deferred
 from sqlalchemy.orm.session import close_all_sessions
 from sqlalchemy.schema import (
     DropConstraint,
@@ -695,6 +695,30 @@ def get_sql_base_class(x):
     return None
 
 
+HEAVY_COLUMNS = ("definition", "answer", "details", "vars", "seed", "context")
+
+
+def defer_heavy_columns(cls) -> list:
+    """
+    Returns query options that defer loading the (potentially large) serialized columns
+    of a model, i.e. those listed in ``HEAVY_COLUMNS``. Use these options for queries
+    that only need ids, flags or counters; deferred columns are loaded on first access.
+
+    Example
+    -------
+
+    ::
+
+        db.session.query(Participant).options(*defer_heavy_columns(Participant))
+    """
+    mapper = sqlalchemy.inspect(cls).mapper
+    return [
+        defer(getattr(cls, name))
+        for name in HEAVY_COLUMNS
+        if name in mapper.column_attrs
+    ]
+
+
 def register_table(cls):
     """
     This decorator should be applied whenever defining a new
@@ -20,7 +20,7 @@ from os.path import join as join_path
 from pathlib import Path
 from platform import python_version
 from smtplib import SMTPAuthenticationError
-from statistics import mean, median
+from statistics import mean
 from typing import List, Optional, Type, Union
 
 import dallinger.experiment
@@ -58,8 +58,8 @@ from dominate import tags
 from flask import g as flask_app_globals
 from flask import jsonify, redirect, render_template, request, send_file
 from flask_login import login_required
-from sqlalchemy import Column, Float, ForeignKey, Integer, String, func
-from sqlalchemy.orm import joinedload, with_polymorphic
+from sqlalchemy import Column, Float, ForeignKey, Integer, Numeric, String, cast, func
+from sqlalchemy.orm import aliased, contains_eager, with_polymorphic
 
 from psynet import __version__
 from psynet.artifact import LocalArtifactStorage
@@ -80,9 +80,16 @@ from .end import RejectedConsentLogic, SuccessfulEndLogic, UnsuccessfulEndLogic
 from .error import ErrorRecord
 from .field import ImmutableVarStore, PythonDict
 from .graphics import PsyNetLogo
+from .metrics import RequestMetricsBuffer
 from .notifier import Notifier
 from .page import InfoPage
 from .participant import Participant
+from .query_counter import (
+    log_query_count,
+    query_counting_enabled,
+    start_counting_queries,
+    stop_counting_queries,
+)
 from .recruiters import (  # noqa: F401
     BaseLucidRecruiter,
     CapRecruiter,
@@ -101,6 +108,15 @@ from .timeline import (
     RecruitmentCriterion,
     Response,
     Timeline,
+    get_page_maker_memo,
+)
+from .trace import (
+    SpanStatistics,
+    finish_trace,
+    install_sql_tracing,
+    record_trace,
+    start_trace,
+    traced,
 )
 from .translation.check import check_translations
 from .translation.translate import create_pot
@@ -120,6 +136,7 @@ from .utils import (
     get_logger,
     get_translator,
     log_time_taken,
+    preload_translators,
     render_template_with_translations,
     safe,
     serialise,
@@ -134,6 +151,8 @@ database_template_path = ".deploy/database_template.zip"
 
 DEFAULT_LOCALE = "en"
 INITIAL_RECRUITMENT_SIZE = 1
+# Upper bound (in seconds) on how long a /wait_for_notification request may block a server thread.
+MAX_NOTIFICATION_WAIT_TIME = 30.0
 
 
 def error_response(*args, **kwargs):
@@ -218,11 +237,13 @@ class Request(SQLBase, SQLMixin):
     method = Column(String)
     endpoint = Column(String)
     params = Column(PythonDict, default={})
+    n_queries = Column(Integer)
 
     def to_dict(self):
         return {
             "id": self.id,
             "duration": self.duration,
+            "n_queries": self.n_queries,
             "time": self.creation_time,
             "unique_id": self.unique_id,
             "method": self.method,
@@ -231,6 +252,37 @@ class Request(SQLBase, SQLMixin):
         }
 
 
+def write_request_metrics(rows: List[dict]):
+    """
+    Writes a batch of buffered request metrics to the ``request`` table
+    using a single multi-row ``INSERT``. This uses its own connection and transaction,
+    so it is independent of (and leaves untouched) the current request's session.
+    """
+    polymorphic_identity = Request.__mapper__.polymorphic_identity
+    with db.engine.begin() as connection:
+        connection.execute(
+            Request.__table__.insert(),
+            [{"type": polymorphic_identity, **row} for row in rows],
+        )
+
+
+request_metrics_buffer = None
+
+
+def get_request_metrics_buffer() -> RequestMetricsBuffer:
+    """
+    Returns the request metrics buffer for the current process,
+    creating it on first use.
+    """
+    global request_metrics_buffer
+    if request_metrics_buffer is None:
+        request_metrics_buffer = RequestMetricsBuffer(
+            write=write_request_metrics,
+            flush_interval=get_config().get("request_metrics_flush_interval", 5.0),
+        )
+    return request_metrics_buffer
+
+
 @register_table
 class ExperimentStatus(SQLBase, SQLMixin):
     __tablename__ = "experiment_status"
@@ -282,6 +334,9 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
     Another experiment attribute is `export_classes_to_skip`, which is a list of classes to be excluded
     when exporting the database objects to JSON-style dictionaries. The default is `["ExperimentStatus"]`.
 
+    The `grow_networks_batch_size` attribute determines how many chain networks the background
+    network-growing task claims (and commits) at a time. The default is `20`.
+
     Config variables can be set here, amongst other places (see online documentation for details):
 
     ::
@@ -468,6 +523,7 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
     logos = []
     max_allowed_base_payment = 30
     max_exp_dir_size_in_mb = 256
+    grow_networks_batch_size = 20
 
     timeline = Timeline(InfoPage("Placeholder timeline", time_estimate=5))
 
@@ -627,6 +683,7 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
             "dashboard.dashboard_monitoring",
             "dashboard.dashboard_timeline",
             "dashboard.dashboard_resources",
+            "dashboard.dashboard_tracing",
             "dashboard.dashboard_participants",
             "dashboard.dashboard_logger",
             "dashboard.dashboard_errors",
@@ -818,10 +875,27 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
     @staticmethod
     def before_request():
         flask_app_globals.request_start_time = time.monotonic()
+        # We name traces after the URL rule rather than the path so that
+        # e.g. requests for different assets are aggregated together.
+        if request.url_rule is not None:
+            start_trace(f"{request.method} {request.url_rule.rule}")
+        if query_counting_enabled():
+            start_counting_queries()
 
     @staticmethod
     def after_request(request, response):
         diff = time.monotonic() - flask_app_globals.request_start_time
+        trace = finish_trace()
+        if trace is not None:
+            record_trace(
+                trace,
+                slow_request_threshold=get_config().get(
+                    "slow_request_log_threshold", 0.0
+                ),
+            )
+        query_counter = stop_counting_queries()
+        if query_counter is not None:
+            query_counter.log_repeated_queries(f"{request.method} {request.path}")
         relevant_endpoints = [
             "/ad",
             "/consent",
@@ -831,16 +905,19 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
             "/timeline",
         ]
         if any([endpoint == request.path for endpoint in relevant_endpoints]):
+            # The metrics are written in batches by a background thread
+            # so that the request itself doesn't pay for an extra commit.
             params = dict(request.args)
-            request_obj = Request(
+            get_request_metrics_buffer().record(
                 unique_id=params.get("unique_id", None),
                 duration=diff,
                 method=request.method,
                 endpoint=request.path,
                 params=params,
+                n_queries=(
+                    query_counter.n_queries if query_counter is not None else None
+                ),
             )
-            db.session.add(request_obj)
-            db.session.commit()
         return response
 
     @staticmethod
@@ -865,6 +942,8 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
     @staticmethod
     def gunicorn_post_worker_init(worker):
         exp = get_experiment()
+        preload_translators(exp.supported_locales)
+        install_sql_tracing()
         exp.notifier.notify(
             f"A worker restarted (new pid: {worker.pid}). "
             "Please check the logs to find out why ⚠️"
@@ -872,15 +951,22 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
 
     @classmethod
     def get_request_statistics(cls, lookback_s):
-        now = datetime.now()
-        lookback = now - timedelta(seconds=lookback_s)
-        all_requests = Request.query.filter(Request.creation_time > lookback).all()
-        durations = [req.duration for req in all_requests]
+        lookback = datetime.now() - timedelta(seconds=lookback_s)
+        n_requests, median_duration, p95_duration = (
+            db.session.query(
+                func.count(Request.id),
+                func.percentile_cont(0.5).within_group(Request.duration),
+                func.percentile_cont(0.95).within_group(Request.duration),
+            )
+            .filter(Request.creation_time > lookback)
+            .one()
+        )
         return {
             "median_response_time": (
-                float(median(durations)) if len(durations) > 0 else 0
+                float(median_duration) if median_duration is not None else 0
             ),
-            "requests_per_minute": len(durations),
+            "p95_response_time": float(p95_duration) if p95_duration is not None else 0,
+            "requests_per_minute": n_requests,
         }
 
     @staticmethod
@@ -1108,29 +1194,39 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
 
     @classmethod
     def get_participant_status(cls):
-        participants = Participant.query.all()
-        complete_participants = [
-            participant for participant in participants if participant.complete
-        ]
-        time_taken = []
-        for participant in complete_participants:
-            try:
-                time_taken.append(
-                    (participant.end_time - participant.creation_time).total_seconds()
-                )
-            except TypeError:
-                # If the participant has no end time, just to be sure
-                pass
-        median_time_taken = median(time_taken) if len(time_taken) > 0 else 0
+        # Aggregated in SQL so that the cost doesn't scale with the number of participants.
+        # The reward expression mirrors Participant.calculate_reward.
+        wage_per_hour = get_config().get("wage_per_hour")
+        reward = func.round(
+            cast(
+                Participant.time_credit / 3600 * wage_per_hour
+                + Participant.performance_reward,
+                Numeric,
+            ),
+            2,
+        )
+        time_taken = func.extract(
+            "epoch", Participant.end_time - Participant.creation_time
+        )
+        total_cost, median_time_taken = (
+            db.session.query(
+                func.sum(reward),
+                func.percentile_cont(0.5).within_group(time_taken),
+            )
+            .filter(Participant.complete)
+            .one()
+        )
+        total_cost = float(total_cost) if total_cost is not None else 0
+        median_time_taken = (
+            float(median_time_taken) if median_time_taken is not None else 0
+        )
         estimated_duration = cls.estimated_completion_time(
             None
         )  # wage_per_hour is not used
-        total_rewards = [
-            participant.calculate_reward() for participant in complete_participants
-        ]
-        total_cost = sum(total_rewards)
         participant_status_summary = dict(
-            Counter([participant.status for participant in participants])
+            db.session.query(Participant.status, func.count(Participant.id))
+            .group_by(Participant.status)
+            .all()
         )
         return {
             "total_cost": total_cost,
@@ -1161,6 +1257,7 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
     @scheduled_task("interval", seconds=60, max_instances=1)
     @log_time_taken
     @staticmethod
+    @log_query_count
     @with_transaction
     def status_and_backups():
         # TODO: consider placing these in separate scheduled tasks
@@ -1664,6 +1761,7 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
     @scheduled_task("interval", seconds=2, max_instances=1)
     @log_time_taken
     @staticmethod
+    @log_query_count
     @with_transaction
     def _grow_networks():
         if not is_experiment_launched():
@@ -1675,26 +1773,27 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
     def grow_networks():
         # A bit of a hack that we only grow ChainNetworks here, we might need to extend this to
         # cover other types of networks in the future.
-        from psynet.trial.chain import ChainNetwork
+        from psynet.trial.chain import ChainNetwork, ChainNode
 
-        # This query could be further optimized by identifying which network classes are present in the table
-        # and making queries specific to these. This would allow subclass-specific attributes to be loaded
-        # in the initial query rather than being lazily loaded.
-        networks = (
-            ChainNetwork.query.filter(
-                ChainNetwork.ready_to_spawn,
-                ChainNetwork.chain_type
-                != "within",  # participants are responsible for growing within-networks
+        # Networks are claimed in small batches with FOR UPDATE SKIP LOCKED and each batch
+        # is committed straight away. This means that rows are only locked for the time it takes
+        # to grow a single batch, and that networks currently locked by participant requests
+        # (or by another worker growing networks) are skipped until a later tick
+        # rather than waited for.
+        exp = get_experiment()
+        batch_size = exp.grow_networks_batch_size
+        attempted = set()
+        n_grown = 0
+        while True:
+            networks = Experiment._claim_networks_to_grow(
+                ChainNetwork, ChainNode, batch_size, exclude=attempted
             )
-            .with_for_update()
-            .populate_existing()
-            .options(joinedload(ChainNetwork.head, innerjoin=True))
-            .all()
-        )
-        if len(networks) > 0:
-            logger.info("Growing %i networks...", len(networks))
-            exp = get_experiment()
+            if not networks:
+                break
+            if n_grown == 0:
+                logger.info("Growing networks...")
             for network in networks:
+                attempted.add(network.id)
                 try:
                     network.grow(experiment=exp)
                 except Exception as err:
@@ -1708,12 +1807,45 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
                     elif network.head.degree == 0:
                         for trial in network.head.all_trials:
                             trial.fail()
+            n_grown += len(networks)
+            db.session.commit()
+            if len(networks) < batch_size:
+                break
+
+        if n_grown > 0:
+            logger.info("Finished growing %i networks.", n_grown)
 
-            logger.info("Finished growing networks.")
+    @staticmethod
+    def _claim_networks_to_grow(network_class, node_class, batch_size, exclude):
+        # This query could be further optimized by identifying which network classes are present in the table
+        # and making queries specific to these. This would allow subclass-specific attributes to be loaded
+        # in the initial query rather than being lazily loaded.
+        # We filter on the head node's ready_to_spawn column via a join (rather than the
+        # ChainNetwork.ready_to_spawn subquery) so that the ix_node_ready_to_spawn index can be used.
+        # The node table is aliased because the network's column properties contain subqueries on it.
+        head = aliased(node_class)
+        query = network_class.query.join(network_class.head.of_type(head)).filter(
+            head.ready_to_spawn,
+            network_class.chain_type
+            != "within",  # participants are responsible for growing within-networks
+        )
+        if exclude:
+            # Networks that are still ready to spawn after being grown in this pass
+            # (e.g. because growing failed) are left for the next tick.
+            query = query.filter(network_class.id.notin_(exclude))
+        return (
+            query.order_by(network_class.id)
+            .limit(batch_size)
+            .with_for_update(of=[network_class, head], skip_locked=True)
+            .populate_existing()
+            .options(contains_eager(network_class.head.of_type(head)))
+            .all()
+        )
 
     @scheduled_task("interval", seconds=0.5, max_instances=1)
     @log_time_taken
     @staticmethod
+    @log_query_count
     @with_transaction
     def _check_barriers():
         if not is_experiment_launched():
@@ -1721,39 +1853,89 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
         exp = get_experiment()
         exp.check_barriers()
 
+    @scheduled_task("interval", seconds=5, max_instances=1)
+    @log_time_taken
     @staticmethod
-    def check_barriers():
+    @log_query_count
+    @with_transaction
+    def _check_all_barriers():
+        # Changes that could make a barrier releasable normally mark it as unchecked
+        # (see psynet.sync.mark_barriers_for_recheck), but as a safety net
+        # we periodically check every barrier that has participants waiting.
+        if not is_experiment_launched():
+            return
+        exp = get_experiment()
+        exp.check_barriers(only_changed=False)
+
+    @staticmethod
+    def get_barriers_to_check(only_changed: bool = True):
+        """
+        Returns the (sorted) IDs of the barriers that currently have participants waiting.
+
+        Parameters
+        ----------
+
+        only_changed
+            If ``True`` (default), only returns barriers that haven't been checked since
+            participants arrived, or since the status or sync groups of their waiting participants changed
+            (and time-dependent barriers, see :attr:`psynet.sync.Barrier.time_dependent`).
+        """
         from .sync import ParticipantLinkBarrier
 
-        barrier_links = (
-            ParticipantLinkBarrier.query.join(Participant)
+        query = (
+            db.session.query(ParticipantLinkBarrier.barrier_id)
+            .join(Participant)
             .filter(
                 ~ParticipantLinkBarrier.released,
                 ~Participant.failed,
                 Participant.status == "working",
             )
-            # We need to lock Participant rows to prevent race conditions with participants
-            # who are currently being processed in other tasks
-            # (e.g. advancing through the timeline).
-            .with_for_update(of=[ParticipantLinkBarrier, Participant])
-            .populate_existing()
-            .all()
+            .distinct()
         )
+        if only_changed:
+            query = query.filter(~ParticipantLinkBarrier.checked)
+        return sorted(barrier_id for (barrier_id,) in query)
+
+    @staticmethod
+    def check_barriers(only_changed: bool = True):
+        from .sync import ParticipantLinkBarrier
+
+        for barrier_id in Experiment.get_barriers_to_check(only_changed):
+            barrier_links = (
+                ParticipantLinkBarrier.query.join(Participant)
+                .filter(
+                    ParticipantLinkBarrier.barrier_id == barrier_id,
+                    ~ParticipantLinkBarrier.released,
+                    ~Participant.failed,
+                    Participant.status == "working",
+                )
+                .order_by(ParticipantLinkBarrier.id)
+                # We need to lock Participant rows to prevent race conditions with participants
+                # who are currently being processed in other tasks
+                # (e.g. advancing through the timeline).
+                # Only the rows of the barrier being processed are locked.
+                .with_for_update(of=[ParticipantLinkBarrier, Participant])
+                .populate_existing()
+                .all()
+            )
+            if not barrier_links:
+                # The participants were released in the meantime by another check.
+                continue
+
+            barrier = barrier_links[0].get_barrier()
+            barrier.process_potential_releases()
 
-        # Before we used a DISTINCT clause --
-        # .distinct(ParticipantLinkBarrier.barrier_id)
-        # but DISTINCT is incompatible with FOR UPDATE in Postgres.
-        # We therefore do this filtering in Python instead.
-        processed_barriers = set()
-        for link in barrier_links:
-            if link.barrier_id not in processed_barriers:
-                barrier = link.get_barrier()
-                barrier.process_potential_releases()
-                processed_barriers.add(link.barrier_id)
+            # Participants who arrive after the rows were locked are not included here,
+            # so their links stay unchecked and the barrier is checked again on the next run.
+            # Time-dependent barriers are left unchecked so that they are checked on every run.
+            if not barrier.time_dependent:
+                for link in barrier_links:
+                    link.checked = True
 
     @scheduled_task("interval", seconds=2.5, max_instances=1)
     @log_time_taken
     @staticmethod
+    @log_query_count
     @with_transaction
     def _check_sync_groups():
         if not is_experiment_launched():
@@ -1838,12 +2020,16 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
 
     @classmethod
     def amount_spent(cls):
-        return sum(
-            [
-                (0.0 if p.base_payment is None else p.base_payment)
-                + (0.0 if p.bonus is None else p.bonus)
-                for p in Participant.query.all()
-            ]
+        return float(
+            db.session.query(
+                func.coalesce(
+                    func.sum(
+                        func.coalesce(Participant.base_payment, 0.0)
+                        + func.coalesce(Participant.bonus, 0.0)
+                    ),
+                    0.0,
+                )
+            ).scalar()
         )
 
     @classmethod
@@ -1934,6 +2120,11 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
             "resource_danger_pct": 0.95,
             "minimal_disk_space_warning_gb": 5,
             "minimal_disk_space_danger_gb": 2,
+            "request_metrics_flush_interval": 5.0,
+            "slow_request_log_threshold": 0.0,
+            "count_sql_queries": False,
+            "local_async_process_max_workers": 4,
+            "python_object_storage": "text",
             **cls.config,
         }
 
@@ -2485,6 +2676,9 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
                 client_ip_address=client_ip_address,
                 answer=answer,
             )
+            # Page makers may depend on the participant's answer,
+            # so we need to make sure that they are re-evaluated from here on.
+            get_page_maker_memo().invalidate(participant)
             validation = event.validate(
                 response=response,
                 answer=response.answer,
@@ -2505,8 +2699,14 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
             participant.inc_time_credit(event.time_estimate)
             participant.inc_progress(event.time_estimate)
 
-            self.timeline.advance_page(self, participant)
-            return self.response_approved(participant)
+            page = self.timeline.advance_page(self, participant)
+            memo = get_page_maker_memo()
+            logger.debug(
+                f"Processed response from participant {participant_id} "
+                f"(page maker resolutions: {memo.n_resolutions}, "
+                f"memoized resolutions reused: {memo.n_hits})."
+            )
+            return self.response_approved(participant, page)
         except Exception as err:
             if os.getenv("PASSTHROUGH_ERRORS"):
                 raise
@@ -2528,9 +2728,10 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
                 )
             return error_response(participant=participant)
 
-    def response_approved(self, participant):
+    def response_approved(self, participant, page=None):
         logger.debug("The response was approved.")
-        page = self.timeline.get_current_elt(self, participant)
+        if page is None:
+            page = self.timeline.get_current_elt(self, participant)
         return success_response(submission="approved", page=page.__json__(participant))
 
     def response_rejected(self, message):
@@ -2859,6 +3060,22 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
         config.register(
             "minimal_disk_space_danger_gb", float, validators=[is_positive_float]
         )
+        config.register("request_metrics_flush_interval", float)
+        config.register("slow_request_log_threshold", float)
+        config.register("count_sql_queries", bool)
+        config.register("local_async_process_max_workers", int)
+
+        def is_valid_python_object_storage(value):
+            assert value in ["text", "jsonb"], (
+                f"Invalid value for python_object_storage: {value} "
+                "(must be 'text' or 'jsonb')"
+            )
+
+        config.register(
+            "python_object_storage",
+            unicode,
+            validators=[is_valid_python_object_storage],
+        )
 
         def color_mode_validator(value):
             assert value in ["light", "dark", "auto"]
@@ -3082,6 +3299,15 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
 
         return report_resource_use()
 
+    @dashboard_tab("Tracing")
+    @classmethod
+    def dashboard_tracing(cls):
+        return render_template(
+            "dashboard_tracing.html",
+            title="Request tracing",
+            spans=SpanStatistics.load(),
+        )
+
     @dashboard_tab("Lucid")
     @classmethod
     def dashboard_lucid(cls):
@@ -4077,12 +4303,12 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
             )
 
     @classmethod
-    @log_time_taken
+    @traced
     def get_current_page(cls, experiment, participant):
         if participant.elt_id == [-1]:
-            experiment.timeline.advance_page(experiment, participant)
-
-        page = experiment.timeline.get_current_elt(experiment, participant)
+            page = experiment.timeline.advance_page(experiment, participant)
+        else:
+            page = experiment.timeline.get_current_elt(experiment, participant)
         page.pre_render()
 
         return page
@@ -4128,6 +4354,24 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
             }
         return data
 
+    @experiment_route("/wait_for_notification", methods=["GET"])
+    @staticmethod
+    def route_wait_for_notification():
+        """
+        Long-poll endpoint for wait pages created with ``wake_on_notification=True``
+        (see :mod:`psynet.push`). Returns once the participant receives a notification
+        beyond ``since`` or after ``timeout`` seconds, whichever comes first.
+        Deliberately does not touch the database.
+        """
+        from .push import wait_for_notification
+
+        participant_id = int(request.args["participantId"])
+        since = int(request.args.get("since", 0))
+        timeout = min(
+            float(request.args.get("timeout", 20.0)), MAX_NOTIFICATION_WAIT_TIME
+        )
+        return {"notified": wait_for_notification(participant_id, since, timeout)}
+
     @experiment_route("/response", methods=["POST"])
     @classmethod
     @with_transaction
@@ -4222,6 +4466,13 @@ class Experiment(dallinger.experiment.Experiment, metaclass=ExperimentMeta):
             )
         )
 
+        from .process import local_process_pool
+
+        # Only covers the local async processes launched by the current server process.
+        stats["Local async processes"] = OrderedDict(
+            local_process_pool.statistics.items()
+        )
+
         return stats
 
     def check_consents(self):
@@ -1,10 +1,17 @@
+import json
+import math
 import re
 from datetime import datetime
+from functools import lru_cache
 
+import sqlalchemy
+from dallinger import db
 from jsonpickle.unpickler import loadclass
 from jsonpickle.util import importable_name
-from sqlalchemy import Boolean, Column, Float, Integer, String, types
+from sqlalchemy import Boolean, Column, Float, Integer, String, and_, event, types
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.mutable import MutableDict, MutableList
+from sqlalchemy.orm.attributes import flag_modified
 from sqlalchemy.types import TypeDecorator
 
 from .utils import get_logger
@@ -12,14 +19,155 @@ from .utils import get_logger
 logger = get_logger()
 marker = object()
 
+# Key under which values that need jsonpickle type tags are wrapped in JSONB storage.
+# JSONB doesn't preserve key order, which jsonpickle's ``py/id`` references rely on,
+# so such values are stored as an opaque jsonpickle string. For dictionaries, each
+# top-level value is wrapped separately so that individual keys can still be
+# updated in place (see ``VarStore``).
+JSONPICKLE_KEY = "py/jsonpickle"
+
+
+def is_plain_json(value) -> bool:
+    """
+    Returns ``True`` if the value consists only of dicts with string keys, lists,
+    strings, finite numbers, booleans and ``None``. Such values round-trip through
+    ``json`` unchanged, so they don't need jsonpickle.
+    """
+    value_type = type(value)
+    if value_type is str or value_type is bool or value_type is int or value is None:
+        return True
+    if value_type is float:
+        return math.isfinite(value)
+    if value_type is list:
+        return all(is_plain_json(x) for x in value)
+    if value_type is dict:
+        return all(
+            type(key) is str and not key.startswith("py/") and is_plain_json(x)
+            for key, x in value.items()
+        )
+    return False
+
+
+def encode_python_object(value) -> str:
+    """
+    Serializes a value to a JSON string, using ``json`` directly for plain JSON values
+    and falling back to jsonpickle for everything else.
+    """
+    if is_plain_json(value):
+        return json.dumps(value)
+
+    from .serialize import serialize
+
+    return serialize(value)
+
+
+def is_jsonpickle_wrapper(value) -> bool:
+    return type(value) is dict and len(value) == 1 and JSONPICKLE_KEY in value
+
+
+def _wrap_for_jsonb(value):
+    if is_plain_json(value):
+        return value
+
+    from .serialize import serialize
+
+    return {JSONPICKLE_KEY: serialize(value)}
+
+
+def encode_jsonb(value):
+    """
+    Converts a value to the JSON document stored in a ``JSONB`` column.
+    Plain JSON values are stored as they are; values that need jsonpickle are wrapped
+    as ``{"py/jsonpickle": "<jsonpickle text>"}``, separately for each key of a dictionary.
+    """
+    if type(value) is dict and all(
+        type(key) is str and not key.startswith("py/") for key in value
+    ):
+        return {key: _wrap_for_jsonb(x) for key, x in value.items()}
+    return _wrap_for_jsonb(value)
+
+
+def decode_python_object(value):
+    """
+    Inverse of :func:`encode_python_object`. Also accepts JSON text produced from
+    :func:`encode_jsonb`, and values already parsed from JSON (see :func:`decode_jsonb`).
+    """
+    if isinstance(value, str):
+        if '"py/' not in value:
+            return json.loads(value)
+        if f'"{JSONPICKLE_KEY}"' not in value:
+            from .serialize import unserialize
+
+            return unserialize(value)
+        value = json.loads(value)
+
+    return decode_jsonb(value)
+
+
+def decode_jsonb(value):
+    """
+    Inverse of :func:`encode_jsonb`, for JSON documents that have already been parsed
+    (e.g. by the database driver when reading a ``JSONB`` column).
+    Strings are returned as they are.
+    """
+    if type(value) is dict:
+        from .serialize import unserialize
+
+        if is_jsonpickle_wrapper(value):
+            return unserialize(value[JSONPICKLE_KEY])
+        if any(is_jsonpickle_wrapper(x) for x in value.values()):
+            return {
+                key: unserialize(x[JSONPICKLE_KEY]) if is_jsonpickle_wrapper(x) else x
+                for key, x in value.items()
+            }
+
+    return value
+
+
+@lru_cache()
+def get_python_object_storage() -> str:
+    """
+    Returns the storage mode for ``PythonObject`` columns,
+    as set by the ``python_object_storage`` config variable.
+    The result is cached (see ``psynet.utils.clear_all_caches``).
+    """
+    from .utils import get_config
+
+    return get_config().get("python_object_storage", "text")
+
 
 class PythonObject(TypeDecorator):
+    """
+    Stores arbitrary Python objects in the database.
+
+    Plain JSON values are encoded with ``json``; other values are encoded with jsonpickle.
+    By default values are stored as text; if the ``python_object_storage`` config variable
+    is set to ``jsonb``, Postgres ``JSONB`` is used instead, which makes plain JSON values
+    queryable from SQL. Existing databases can be converted with ``psynet migrate-jsonb``.
+    Reading works with either column type.
+    """
+
     @property
     def python_type(self):
         return object
 
     impl = types.String
 
+    # Set to False for subclasses whose serialized form is not JSON.
+    supports_jsonb = True
+
+    def load_dialect_impl(self, dialect):
+        if self.uses_jsonb(dialect):
+            return dialect.type_descriptor(JSONB())
+        return super().load_dialect_impl(dialect)
+
+    def uses_jsonb(self, dialect):
+        return (
+            self.supports_jsonb
+            and dialect.name == "postgresql"
+            and get_python_object_storage() == "jsonb"
+        )
+
     def sanitize(self, value):
         return value
 
@@ -27,6 +175,9 @@ class PythonObject(TypeDecorator):
         if value is None:
             return value
         try:
+            value = self.sanitize(value)
+            if self.uses_jsonb(dialect):
+                return encode_jsonb(value)
             return self.serialize(value)
         except Exception:
             logger.error(
@@ -41,6 +192,9 @@ class PythonObject(TypeDecorator):
         if value is None:
             return None
         try:
+            if self.uses_jsonb(dialect):
+                # The driver has already parsed the JSON document.
+                return self.unserialize_jsonb(value)
             return self.unserialize(value)
         except Exception:
             logger.error(
@@ -50,26 +204,28 @@ class PythonObject(TypeDecorator):
 
     @classmethod
     def serialize(cls, value):
-        from .serialize import serialize
-
-        return serialize(value)
+        return encode_python_object(value)
 
     @classmethod
     def unserialize(cls, value):
-        from .serialize import unserialize
+        return decode_python_object(value)
 
-        return unserialize(value)
+    @classmethod
+    def unserialize_jsonb(cls, value):
+        return decode_jsonb(value)
 
 
 class _PythonList(PythonObject):
-    def serialize(self, value):
-        return super().serialize(list(value))
+    def sanitize(self, value):
+        return list(value)
 
 
 PythonList = MutableList.as_mutable(_PythonList)
 
 
 class PythonClass(PythonObject):
+    supports_jsonb = False
+
     @property
     def python_type(self):
         return type
@@ -356,6 +512,13 @@ class VarStore(BaseVarStore):
 
     **TIP 3:** avoid storing large objects here on account of the performance cost
     of converting to and from JSON.
+
+    When the ``python_object_storage`` config variable is set to ``jsonb``,
+    setting a variable on an object that already exists in the database doesn't rewrite
+    the whole ``vars`` column. Instead, the changed keys are collected and merged into
+    the stored document with a single ``UPDATE ... SET vars = vars || :patch``
+    before the session is flushed or committed, or before the next ORM query
+    (respecting ``autoflush``).
     """
 
     def __init__(self, owner):
@@ -388,13 +551,116 @@ class VarStore(BaseVarStore):
         if name == "_owner":
             self.__dict__["_owner"] = value
         else:
-            if self.__dict__["_owner"].vars is None:
-                self.__dict__["_owner"].vars = {}
-            self.__dict__["_owner"].vars[name] = value
+            owner = self.__dict__["_owner"]
+            if owner.vars is None:
+                owner.vars = {}
+            session = get_var_patch_session(owner)
+            if session is not None:
+                # Bypass MutableDict's change tracking so that the column isn't rewritten
+                dict.__setitem__(owner.vars, name, value)
+                patches = session.info.setdefault("psynet_var_patches", {})
+                patches.setdefault(id(owner), (owner, {}))[1][name] = value
+            else:
+                owner.vars[name] = value
             # self[name] = value
             # self.set_var(name, value)
 
 
+def get_var_patch_session(owner):
+    """
+    Returns the session in which a per-key update of ``owner.vars`` can be queued,
+    or ``None`` if the whole column needs to be written as usual
+    (e.g. text storage, or an object that hasn't been inserted yet).
+    """
+    if get_python_object_storage() != "jsonb":
+        return None
+    try:
+        state = sqlalchemy.inspect(owner)
+    except sqlalchemy.exc.NoInspectionAvailable:
+        return None
+    if not state.persistent:
+        return None
+    column = state.mapper.columns.get("vars")
+    if not (isinstance(column.type, PythonObject) and column.type.supports_jsonb):
+        return None
+    if state.attrs.vars.history.has_changes():
+        # The whole column will be written anyway.
+        return None
+    session = state.session
+    if session.get_bind().dialect.name != "postgresql":
+        return None
+    return session
+
+
+def build_var_patch_statement(owner, patch: dict):
+    """
+    Builds the ``UPDATE`` statement that merges ``patch`` into the stored ``vars``
+    of ``owner``. Rows whose ``vars`` are stored as a single jsonpickle wrapper
+    (e.g. after ``psynet migrate-jsonb``) are left untouched, and need a full write instead.
+    """
+    state = sqlalchemy.inspect(owner)
+    column = state.mapper.columns["vars"]
+    identity = state.mapper.primary_key_from_instance(owner)
+    patch_document = sqlalchemy.cast(
+        sqlalchemy.bindparam("patch", json.dumps(encode_jsonb(patch)), type_=String),
+        JSONB,
+    )
+    return (
+        column.table.update()
+        .where(
+            and_(
+                *[
+                    key_column == value
+                    for key_column, value in zip(state.mapper.primary_key, identity)
+                ]
+            ),
+            sqlalchemy.not_(
+                column.op("?")(sqlalchemy.literal(JSONPICKLE_KEY, type_=String))
+            ),
+        )
+        .values({column.name: column.op("||")(patch_document)})
+    )
+
+
+def apply_var_patches(session):
+    patches = session.info.pop("psynet_var_patches", None)
+    if not patches:
+        return
+    for owner, patch in patches.values():
+        state = sqlalchemy.inspect(owner)
+        if not state.persistent or state.attrs.vars.history.has_changes():
+            continue
+        result = session.execute(build_var_patch_statement(owner, patch))
+        if result.rowcount == 0:
+            flag_modified(owner, "vars")
+
+
+@event.listens_for(db.session, "before_flush")
+def receive_before_flush(session, flush_context, instances):
+    apply_var_patches(session)
+
+
+@event.listens_for(db.session, "do_orm_execute")
+def receive_do_orm_execute(orm_execute_state):
+    # Queued patches don't make the session dirty, so autoflush doesn't apply them;
+    # we apply them here instead so that queries see the updated ``vars``.
+    session = orm_execute_state.session
+    if session.autoflush and orm_execute_state.execution_options.get("autoflush", True):
+        apply_var_patches(session)
+
+
+@event.listens_for(db.session, "before_commit")
+def receive_before_commit(session):
+    apply_var_patches(session)
+
+
+@event.listens_for(db.session, "after_transaction_end")
+def receive_after_transaction_end(session, transaction):
+    if transaction.parent is None:
+        # Discard patches that were never applied, e.g. after a rollback.
+        session.info.pop("psynet_var_patches", None)
+
+
 # class DotDict(dict, BaseVarStore):
 #     def __setattr__(self, key, value):
 #         self[key] = value
@@ -496,8 +762,21 @@ def json_format_vars(x):
 class _PythonDict(PythonObject):
     cache_ok = True
 
-    def serialize(cls, value):
-        return super().serialize(dict(value))
+    def sanitize(self, value):
+        return dict(value)
 
 
 PythonDict = MutableDict.as_mutable(_PythonDict)
+
+
+def get_python_object_columns(metadata):
+    """
+    Lists the ``(table_name, column_name)`` pairs of all columns in ``metadata``
+    that hold JSON-serialized Python objects.
+    """
+    return [
+        (table.name, column.name)
+        for table in metadata.sorted_tables
+        for column in table.columns
+        if isinstance(column.type, PythonObject) and column.type.supports_jsonb
+    ]
@@ -0,0 +1,142 @@
+import atexit
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from .log import bold
+from .utils import get_logger
+
+logger = get_logger()
+
+
+class RequestMetricsBuffer:
+    """
+    Write-behind buffer for request timing metrics.
+
+    Recording a request is just an append to an in-memory ring buffer;
+    a background thread periodically drains the buffer and passes the
+    accumulated rows to ``write`` in a single batch. This keeps the metrics
+    bookkeeping off the request path, where it previously cost an extra
+    ``INSERT`` and ``COMMIT`` per request.
+
+    Each (gunicorn) worker process keeps its own buffer. The flusher thread
+    is started lazily on the first call to :meth:`record`, and is restarted
+    if the process has been forked since. Any remaining rows are flushed
+    when the process exits.
+
+    Parameters
+    ----------
+    write :
+        Function that receives a list of row dictionaries and persists them,
+        typically via a single bulk ``INSERT``.
+
+    capacity :
+        Maximum number of rows held in memory. If the buffer is full
+        (e.g. because the database is unavailable), the oldest rows are dropped.
+
+    flush_interval :
+        Number of seconds between flushes. If ``0``, rows are written synchronously
+        as soon as they are recorded, and write errors are raised to the caller.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[List[dict]], None],
+        capacity: int = 10000,
+        flush_interval: float = 5.0,
+    ):
+        self.write = write
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.rows = deque(maxlen=capacity)
+        self.n_dropped = 0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.pid: Optional[int] = None
+        self.registered_atexit = False
+
+    def __len__(self):
+        return len(self.rows)
+
+    def record(self, **row):
+        """
+        Adds a row to the buffer. If no ``creation_time`` is provided,
+        the current time is used.
+        """
+        row.setdefault("creation_time", datetime.now())
+        with self.lock:
+            if len(self.rows) == self.capacity:
+                self.n_dropped += 1
+            self.rows.append(row)
+
+        if self.flush_interval <= 0:
+            self.flush(raise_errors=True)
+        else:
+            self.ensure_started()
+
+    def drain(self) -> List[dict]:
+        with self.lock:
+            rows = list(self.rows)
+            self.rows.clear()
+        return rows
+
+    def flush(self, raise_errors: bool = False) -> int:
+        """
+        Writes all buffered rows in one batch and returns the number of rows written.
+        Unless ``raise_errors`` is ``True``, errors are logged rather than raised
+        so that a failing flush never takes down the worker;
+        either way the affected rows are discarded.
+        """
+        rows = self.drain()
+        if rows:
+            try:
+                self.write(rows)
+            except Exception:
+                if raise_errors:
+                    raise
+                logger.error(
+                    f"Failed to write {len(rows)} buffered request metrics.",
+                    exc_info=True,
+                )
+                return 0
+        if self.n_dropped > 0:
+            logger.warning(
+                bold(
+                    f"The request metrics buffer overflowed, dropping {self.n_dropped} "
+                    "rows. Consider increasing its capacity."
+                )
+            )
+            self.n_dropped = 0
+        return len(rows)
+
+    def ensure_started(self):
+        if self.pid == os.getpid() and self.thread is not None:
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread is not None:
+                return
+            self.pid = os.getpid()
+            self.stop_event = threading.Event()
+            self.thread = threading.Thread(
+                target=self._run, name="request-metrics-flusher", daemon=True
+            )
+            self.thread.start()
+            if not self.registered_atexit:
+                # The registration survives forks, so we only need it once.
+                atexit.register(self.stop)
+                self.registered_atexit = True
+
+    def _run(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def stop(self):
+        """
+        Stops the flusher thread and writes any remaining rows.
+        """
+        self.stop_event.set()
+        self.thread = None
+        self.flush()
@@ -184,25 +184,48 @@ class WaitPage(Page):
         Message to display to the participant while they wait.
         Default: "Please wait, the experiment should continue shortly..."
 
+    wake_on_notification:
+        If ``True``, the page advances as soon as the participant receives a push notification
+        (see :mod:`psynet.push`), for example when a barrier releases them or one of their
+        asynchronous processes finishes, with ``wait_time`` serving as the maximum wait.
+        This allows for longer wait times, and hence fewer page reloads, without delaying participants.
+        Default: ``False``.
+
     **kwargs:
         Further arguments to pass to :class:`psynet.timeline.Page`.
     """
 
     content = "Please wait, the experiment should continue shortly..."
 
-    def __init__(self, wait_time: float, content=None, **kwargs):
+    def __init__(
+        self,
+        wait_time: float,
+        content=None,
+        wake_on_notification: bool = False,
+        **kwargs,
+    ):
         assert wait_time >= 0
         self.wait_time = wait_time
+        self.wake_on_notification = wake_on_notification
         if content is not None:
             self.content = content
         super().__init__(
             label="wait",
             time_estimate=wait_time,
             template_str=get_template("wait-page.html"),
-            template_arg={"content": self.content, "wait_time": self.wait_time},
+            template_arg={
+                "content": self.content,
+                "wait_time": self.wait_time,
+                "wake_on_notification": self.wake_on_notification,
+            },
             **kwargs,
         )
 
+    def get_notification_count(self, participant):
+        from .push import get_notification_count
+
+        return get_notification_count(participant.id)
+
     def metadata(self, **kwargs):
         return {"wait_time": self.wait_time}
 
@@ -222,6 +245,7 @@ def wait_while(
     wait_page=WaitPage,
     log_message: Optional[str] = None,
     fail_on_timeout=True,
+    wake_on_notification: bool = False,
 ):
     """
     Displays the participant a waiting page while a given condition
@@ -260,6 +284,11 @@ def wait_while(
         Setting this to ``False`` will not return the ``UnsuccessfulEndPage`` when maximum time has elapsed
         but allow them to proceed to the next page.
 
+    wake_on_notification
+        If ``True``, the wait page re-checks the condition as soon as the participant receives
+        a push notification (see :mod:`psynet.push`) rather than only every ``check_interval`` seconds.
+        The wait page must accept the ``wake_on_notification`` argument of :class:`~psynet.page.WaitPage`.
+
     Returns
     -------
 
@@ -270,7 +299,10 @@ def wait_while(
     assert check_interval > 0
     expected_repetitions = ceil(expected_wait / check_interval)
 
-    _wait_page = wait_page(wait_time=check_interval)
+    if wake_on_notification:
+        _wait_page = wait_page(wait_time=check_interval, wake_on_notification=True)
+    else:
+        _wait_page = wait_page(wait_time=check_interval)
 
     def log(participant):
         logger.info(f"Participant {participant.id}: {log_message}")
@@ -1,6 +1,8 @@
 import datetime
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 import dallinger.db
 from dallinger import db
@@ -25,8 +27,9 @@ from tenacity import retry, retry_if_exception_type, stop_after_delay, wait_expo
 from .data import SQLBase, SQLMixin, register_table
 from .db import with_transaction
 from .field import PythonDict, PythonObject
+from .push import notify_participant
 from .serialize import prepare_function_for_serialization
-from .utils import get_logger
+from .utils import get_config, get_logger
 
 logger = get_logger()
 
@@ -44,6 +47,8 @@ class AsyncProcess(SQLBase, SQLMixin):
     time_started = Column(DateTime)
     time_finished = Column(DateTime)
     time_taken = Column(Float)
+    timeout = Column(Float)
+    timeout_scheduled_for = Column(DateTime)
     _unique_key = Column(PythonDict, unique=True)
 
     participant_id = Column(Integer, ForeignKey("participant.id"), index=True)
@@ -74,10 +79,19 @@ class AsyncProcess(SQLBase, SQLMixin):
 
     errors = relationship("ErrorRecord")
 
-    launch_queue = []
+    # Processes are launched once the transaction that created them commits.
+    # The queue of processes awaiting launch lives in the session's ``info`` dictionary,
+    # so that each thread (and each session) only ever launches its own processes.
+    launch_queue_key = "psynet_async_process_launch_queue"
+
+    @classmethod
+    def get_launch_queue(cls, session=None) -> list:
+        if session is None:
+            session = db.session()
+        return session.info.setdefault(cls.launch_queue_key, [])
 
     def add_to_launch_queue(self):
-        self.launch_queue.append(self.get_launch_spec())
+        self.get_launch_queue().append(self.get_launch_spec())
 
     def get_launch_spec(self) -> dict:
         db.session.flush([self])
@@ -85,15 +99,32 @@ class AsyncProcess(SQLBase, SQLMixin):
             "obj": self,
             "class": self.__class__,
             "id": self.id,
+            "timeout": self.timeout,
         }
 
     @classmethod
-    def launch_all(cls):
-        while cls.launch_queue:
-            process = cls.launch_queue.pop(0)
+    def launch_all(cls, session=None):
+        if session is None:
+            session = db.session()
+        processes = session.info.pop(cls.launch_queue_key, [])
+
+        processes_by_class = {}
+        for process in processes:
             assert process["obj"].id is not None
-            logger.info("Launching async process %s...", process["id"])
-            process["class"].launch(process)
+            processes_by_class.setdefault(process["class"], []).append(process)
+
+        for process_class, _processes in processes_by_class.items():
+            logger.info(
+                "Launching async process(es) %s...",
+                ", ".join(str(process["id"]) for process in _processes),
+            )
+            process_class.launch_many(_processes)
+
+    @classmethod
+    def discard_launch_queue(cls, session=None):
+        if session is None:
+            session = db.session()
+        session.info.pop(cls.launch_queue_key, None)
 
     def __init__(
         self,
@@ -107,10 +138,17 @@ class AsyncProcess(SQLBase, SQLMixin):
         asset=None,
         label=None,
         unique=False,
+        timeout=None,
     ):
         if label is None:
             label = function.__name__
 
+        self.timeout = timeout
+        if timeout:
+            self.timeout_scheduled_for = datetime.datetime.now() + datetime.timedelta(
+                seconds=timeout
+            )
+
         if arguments is None:
             arguments = {}
 
@@ -199,6 +237,11 @@ class AsyncProcess(SQLBase, SQLMixin):
     def launch(cls, process: dict):
         raise NotImplementedError
 
+    @classmethod
+    def launch_many(cls, processes: list):
+        for process in processes:
+            cls.launch(process)
+
     @classproperty
     def redis_queue(cls):
         return Queue("default", connection=redis_conn)
@@ -242,6 +285,13 @@ class AsyncProcess(SQLBase, SQLMixin):
             experiment = get_experiment()
 
             process = cls.get_process(process_id)
+            if process.failed:
+                # e.g. the process timed out or was cancelled before it got to run.
+                logger.info(
+                    "Skipping process_id %i as it has already failed.", process_id
+                )
+                return
+
             function = process.function
 
             arguments = cls.preprocess_args(process.arguments)
@@ -273,6 +323,9 @@ class AsyncProcess(SQLBase, SQLMixin):
                 process.fail(f"Exception in asynchronous process: {repr(err)}")
 
         finally:
+            if process is not None and process.participant_id is not None:
+                # Lets the participant's wait page (if any) advance without waiting for its next reload.
+                notify_participant(process.participant_id)
             db.session.commit()
 
     @classmethod
@@ -291,6 +344,23 @@ class AsyncProcess(SQLBase, SQLMixin):
             db.session.refresh(arg)
         return arg
 
+    @classmethod
+    def check_timeouts(cls):
+        """
+        Fails pending processes that have exceeded their timeout.
+        """
+        processes = cls.query.filter(
+            cls.pending,
+            ~cls.failed,
+            cls.timeout != None,  # noqa -- this is special SQLAlchemy syntax
+            cls.timeout_scheduled_for < datetime.datetime.now(),
+        ).all()
+        for p in processes:
+            p.fail(
+                "Asynchronous process timed out",
+            )
+            db.session.commit()
+
     @classmethod
     def log(cls, msg):
         raise NotImplementedError
@@ -308,16 +378,132 @@ class AsyncProcess(SQLBase, SQLMixin):
 
 @event.listens_for(db.session, "after_commit")
 def receive_after_commit(session):
-    AsyncProcess.launch_all()
+    AsyncProcess.launch_all(session)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def receive_after_soft_rollback(session, previous_transaction):
+    # Processes created within a rolled-back transaction no longer exist in the database.
+    # Rolling back a savepoint leaves the enclosing transaction's processes intact.
+    if previous_transaction.parent is None:
+        AsyncProcess.discard_launch_queue(session)
+
+
+class LocalProcessPool:
+    """
+    A bounded pool of threads for running :class:`LocalAsyncProcess` es.
+
+    At most ``max_workers`` processes run at once (and hence hold a database connection);
+    further processes wait in a queue until a worker becomes free. The pool keeps track of
+    how many processes are queued and running, and logs a warning when the queue grows
+    beyond ``queue_warning_threshold``.
+
+    Parameters
+    ----------
+
+    max_workers
+        Number of worker threads. If ``None`` (default), it is taken from the
+        ``local_async_process_max_workers`` config variable when the first process is submitted.
+
+    queue_warning_threshold
+        Queue length above which a warning is logged.
+    """
+
+    def __init__(
+        self, max_workers: Optional[int] = None, queue_warning_threshold: int = 50
+    ):
+        self.max_workers = max_workers
+        self.queue_warning_threshold = queue_warning_threshold
+        self.lock = threading.Lock()
+        self.executor = None
+        self.n_queued = 0
+        self.n_running = 0
+        self.n_finished = 0
+        self.max_n_queued = 0
+        self.queue_warning_logged = False
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        with self.lock:
+            if self.executor is None:
+                if self.max_workers is None:
+                    self.max_workers = get_config().get(
+                        "local_async_process_max_workers", 4
+                    )
+                self.executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="psynet-local-async-process",
+                )
+            return self.executor
+
+    def submit(self, function, **kwargs):
+        executor = self.get_executor()
+        with self.lock:
+            self.n_queued += 1
+            self.max_n_queued = max(self.max_n_queued, self.n_queued)
+            n_queued = self.n_queued
+            log_warning = (
+                n_queued > self.queue_warning_threshold
+                and not self.queue_warning_logged
+            )
+            if log_warning:
+                self.queue_warning_logged = True
+            elif n_queued <= self.queue_warning_threshold:
+                self.queue_warning_logged = False
+        if log_warning:
+            logger.warning(
+                "%i local async processes are waiting for one of %i workers.",
+                n_queued,
+                self.max_workers,
+            )
+        executor.submit(self._run, function, kwargs)
+
+    def _run(self, function, kwargs):
+        with self.lock:
+            self.n_queued -= 1
+            self.n_running += 1
+        try:
+            function(**kwargs)
+        except Exception:
+            logger.error("Error in local async process worker.", exc_info=True)
+        finally:
+            with self.lock:
+                self.n_running -= 1
+                self.n_finished += 1
+
+    @property
+    def statistics(self) -> dict:
+        with self.lock:
+            return {
+                "max_workers": self.max_workers,
+                "n_queued": self.n_queued,
+                "n_running": self.n_running,
+                "n_finished": self.n_finished,
+                "max_n_queued": self.max_n_queued,
+            }
+
+    def shutdown(self, wait: bool = True):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+local_process_pool = LocalProcessPool()
 
 
 class LocalAsyncProcess(AsyncProcess):
+    """
+    An asynchronous process that runs in a thread of the current server process,
+    using the bounded :class:`LocalProcessPool` ``local_process_pool``.
+    As with other processes, a ``timeout`` can be specified, after which the process
+    is failed by :meth:`AsyncProcess.check_timeouts`; note that time spent waiting
+    in the pool's queue counts towards the timeout, and that a process that times out
+    before it starts is not run at all.
+    """
+
     @classmethod
     def launch(cls, process: dict):
-        thr = threading.Thread(
-            target=cls.thread_function, kwargs={"process_id": process["id"]}
-        )
-        thr.start()
+        local_process_pool.submit(cls.thread_function, process_id=process["id"])
 
     @classmethod
     def thread_function(cls, process_id):
@@ -359,15 +545,8 @@ class LocalAsyncProcess(AsyncProcess):
 
 class WorkerAsyncProcess(AsyncProcess):
     redis_job_id = Column(String)
-    timeout = Column(Float)  # note -- currently only applies to non-local proceses
-    timeout_scheduled_for = Column(DateTime)
     cancelled = Column(Boolean, default=False)
 
-    def get_launch_spec(self) -> dict:
-        spec = super().get_launch_spec()
-        spec["timeout"] = self.timeout
-        return spec
-
     def __init__(
         self,
         function,
@@ -379,14 +558,8 @@ class WorkerAsyncProcess(AsyncProcess):
         asset=None,
         label=None,
         unique=False,
-        timeout=None,  # <-- new argument for this class
+        timeout=None,
     ):
-        self.timeout = timeout
-        if timeout:
-            self.timeout_scheduled_for = datetime.datetime.now() + datetime.timedelta(
-                seconds=timeout
-            )
-
         super().__init__(
             function,
             arguments,
@@ -397,33 +570,30 @@ class WorkerAsyncProcess(AsyncProcess):
             asset=asset,
             label=label,
             unique=unique,
+            timeout=timeout,
         )
 
     @classmethod
     def launch(cls, process: dict):
+        cls.launch_many([process])
+
+    @classmethod
+    def launch_many(cls, processes: list):
         # Previously we took the id of the enqueue_call and saved that in Process.redis_job_id,
         # but this is not possible now that the Process object is not accessible.
-        cls.redis_queue.enqueue_call(
-            func=cls.call_function_with_logger,
-            args=(),
-            kwargs=dict(process_id=process["id"]),
-            timeout=process["timeout"],
+        # enqueue_many enqueues all jobs using a single Redis pipeline.
+        cls.redis_queue.enqueue_many(
+            [
+                Queue.prepare_data(
+                    cls.call_function_with_logger,
+                    args=(),
+                    kwargs=dict(process_id=process["id"]),
+                    timeout=process["timeout"],
+                )
+                for process in processes
+            ]
         )
 
-    @classmethod
-    def check_timeouts(cls):
-        processes = cls.query.filter(
-            cls.pending,
-            ~cls.failed,
-            cls.timeout != None,  # noqa -- this is special SQLAlchemy syntax
-            cls.timeout_scheduled_for < datetime.datetime.now(),
-        ).all()
-        for p in processes:
-            p.fail(
-                "Asynchronous process timed out",
-            )
-            db.session.commit()
-
     @property
     def redis_job(self):
         return Job.fetch(self.redis_job_id, connection=redis_conn)
@@ -0,0 +1,188 @@
+"""
+Push notifications for participants waiting on a :class:`~psynet.page.WaitPage`.
+
+Wait pages normally advance by reloading the timeline every few seconds.
+When something happens that may allow a waiting participant to continue
+(e.g. a barrier releases them, or one of their asynchronous processes finishes),
+:func:`notify_participant` queues a notification on the current database session.
+Once the session commits, the notification is published, which wakes up the
+long-poll request (``/wait_for_notification``) made by wait pages created with
+``wake_on_notification=True``, so that the participant advances immediately.
+
+Each participant has a notification count that is incremented on every notification.
+Wait pages embed the count at render time and only wait for notifications beyond it,
+so that notifications published between rendering the page and starting the long-poll
+are not lost.
+
+By default notifications go through Redis (a counter plus a pub/sub channel per participant),
+so that they reach whichever server process holds the participant's long-poll request.
+:class:`LocalPushBackend` is an in-process alternative for tests and single-process deployments,
+see :func:`set_push_backend`.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from dallinger import db
+from sqlalchemy import event
+
+from .utils import get_logger
+
+logger = get_logger()
+
+
+class PushBackend:
+    """
+    Stores participants' notification counts and lets callers wait for them to change.
+    """
+
+    def publish(self, participant_ids: Iterable[int]):
+        raise NotImplementedError
+
+    def get_count(self, participant_id: int) -> int:
+        raise NotImplementedError
+
+    def wait(self, participant_id: int, since: int, timeout: float) -> bool:
+        """
+        Waits up to ``timeout`` seconds for the participant's notification count to exceed ``since``.
+        Returns ``True`` if it did, ``False`` if the wait timed out.
+        """
+        raise NotImplementedError
+
+
+class LocalPushBackend(PushBackend):
+    """
+    Keeps notification counts in memory, so notifications only reach
+    long-poll requests handled by the same process.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.counts = defaultdict(int)
+
+    def publish(self, participant_ids: Iterable[int]):
+        with self.condition:
+            for participant_id in participant_ids:
+                self.counts[participant_id] += 1
+            self.condition.notify_all()
+
+    def get_count(self, participant_id: int) -> int:
+        with self.condition:
+            return self.counts.get(participant_id, 0)
+
+    def wait(self, participant_id: int, since: int, timeout: float) -> bool:
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.counts.get(participant_id, 0) > since, timeout=timeout
+            )
+
+
+class RedisPushBackend(PushBackend):
+    """
+    Keeps notification counts in Redis and announces new notifications on a
+    pub/sub channel per participant.
+    """
+
+    key_prefix = "psynet_push"
+    expire_after = 24 * 60 * 60
+
+    def get_key(self, participant_id: int) -> str:
+        return f"{self.key_prefix}:{participant_id}"
+
+    def publish(self, participant_ids: Iterable[int]):
+        from dallinger.db import redis_conn
+
+        pipeline = redis_conn.pipeline(transaction=False)
+        for participant_id in participant_ids:
+            key = self.get_key(participant_id)
+            pipeline.incr(key)
+            pipeline.expire(key, self.expire_after)
+            pipeline.publish(key, 1)
+        pipeline.execute()
+
+    def get_count(self, participant_id: int) -> int:
+        from dallinger.db import redis_conn
+
+        return int(redis_conn.get(self.get_key(participant_id)) or 0)
+
+    def wait(self, participant_id: int, since: int, timeout: float) -> bool:
+        from dallinger.db import redis_conn
+
+        deadline = time.monotonic() + timeout
+        pubsub = redis_conn.pubsub(ignore_subscribe_messages=True)
+        try:
+            # We subscribe before checking the count so that a notification
+            # published in between cannot be missed.
+            pubsub.subscribe(self.get_key(participant_id))
+            while True:
+                if self.get_count(participant_id) > since:
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                pubsub.get_message(timeout=remaining)
+        finally:
+            pubsub.close()
+
+
+_push_backend: Optional[PushBackend] = None
+
+
+def get_push_backend() -> PushBackend:
+    global _push_backend
+    if _push_backend is None:
+        _push_backend = RedisPushBackend()
+    return _push_backend
+
+
+def set_push_backend(backend: Optional[PushBackend]):
+    """
+    Sets the backend used for push notifications in this process;
+    ``None`` restores the default (Redis) backend.
+    """
+    global _push_backend
+    _push_backend = backend
+
+
+_SESSION_KEY = "psynet_pending_push_notifications"
+
+
+def notify_participant(participant_id: int):
+    """
+    Notifies the participant's wait page (if any) that they may be able to advance.
+    The notification is sent once the current database transaction commits,
+    and discarded if it is rolled back.
+    """
+    session = db.session()
+    if not session.in_transaction():
+        # Ties the notification to a transaction, so that it is discarded by a rollback.
+        session.begin()
+    session.info.setdefault(_SESSION_KEY, set()).add(participant_id)
+
+
+def get_notification_count(participant_id: int) -> int:
+    return get_push_backend().get_count(participant_id)
+
+
+def wait_for_notification(participant_id: int, since: int, timeout: float) -> bool:
+    return get_push_backend().wait(participant_id, since, timeout)
+
+
+@event.listens_for(db.session, "after_commit")
+def publish_pending_notifications(session):
+    participant_ids = session.info.pop(_SESSION_KEY, None)
+    if participant_ids:
+        try:
+            get_push_backend().publish(sorted(participant_ids))
+        except Exception:
+            # Wait pages still advance on their own once their wait time elapses.
+            logger.error("Failed to publish push notifications.", exc_info=True)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def discard_pending_notifications(session, previous_transaction):
+    # Rolling back a savepoint leaves the enclosing transaction (and its notifications) intact.
+    if previous_transaction.parent is None:
+        session.info.pop(_SESSION_KEY, None)
@@ -42,6 +42,7 @@ from .command_line import (
 from .data import init_db
 from .experiment import get_experiment, import_local_experiment
 from .modular_page import ModularPage, PushButtonControl
+from .query_counter import assert_max_queries, count_queries  # noqa: F401
 from .redis import redis_vars
 from .trial.main import TrialNetwork
 from .trial.static import StaticNode, StaticTrial, StaticTrialMaker
@@ -458,6 +459,25 @@ def db_session(in_experiment_directory):
 dallinger.pytest_dallinger.db_session = db_session
 
 
+@pytest.fixture
+def query_counter():
+    """
+    Counts the SQL statements executed in the test's own process, for example:
+
+    ::
+
+        def test_process_response(self, query_counter):
+            ...
+            assert query_counter.n_queries <= 50, query_counter.format_report()
+
+    For tighter scopes use ``assert_max_queries`` as a context manager.
+    Requests handled by the experiment server are counted there instead
+    when the ``count_sql_queries`` config variable is set (see ``Request.n_queries``).
+    """
+    with count_queries() as counter:
+        yield counter
+
+
 @pytest.fixture(scope="class")
 def imported_experiment(launched_experiment):
     return import_local_experiment()
@@ -0,0 +1,234 @@
+"""
+Opt-in counting of SQL statements, used to find N+1 query patterns.
+
+Within :func:`count_queries`, every SQL statement executed in the current context
+is recorded under its normalized form (literals and parameter lists stripped)
+together with the PsyNet or experiment code that triggered it. Statements of the
+same shape issued many times from the same call site usually indicate a lazy
+relationship or property being evaluated inside a loop.
+
+Query counting is enabled for HTTP requests and scheduled tasks by setting the
+``count_sql_queries`` config variable; it can also be used directly in tests,
+see :func:`assert_max_queries`.
+"""
+
+import os
+import re
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import List, Optional, Tuple
+
+from .utils import get_logger
+
+logger = get_logger()
+
+_current_counter: ContextVar[Optional["QueryCounter"]] = ContextVar(
+    "psynet_query_counter", default=None
+)
+
+# Frames from these packages are skipped when determining a statement's call site.
+_IGNORED_PATH_FRAGMENTS = tuple(
+    os.sep + package + os.sep
+    for package in ["sqlalchemy", "dallinger", "flask", "werkzeug"]
+) + (__file__,)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER_LIST = re.compile(
+    r"\(\s*(?:%\(\w+\)s|\?|:\w+)(?:\s*,\s*(?:%\(\w+\)s|\?|:\w+))*\s*\)"
+)
+_PARAMETER = re.compile(r"%\(\w+\)s|:\w+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Reduces a SQL statement to its shape, so that statements differing only
+    in their parameters are grouped together.
+    """
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PARAMETER_LIST.sub("(?)", statement)
+    statement = _PARAMETER.sub("?", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def get_call_site() -> str:
+    """
+    Returns ``path:line in function`` for the innermost stack frame outside SQLAlchemy,
+    Dallinger and other library code.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not any(fragment in filename for fragment in _IGNORED_PATH_FRAGMENTS):
+            return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+class QueryCounter:
+    """
+    Records the SQL statements executed while it is active.
+
+    Parameters
+    ----------
+    n_plus_one_threshold :
+        Number of repetitions of the same statement shape from the same call site
+        above which the statement is reported as a likely N+1 pattern.
+    """
+
+    def __init__(self, n_plus_one_threshold: int = 10):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.queries = Counter()
+
+    def __len__(self):
+        return self.n_queries
+
+    @property
+    def n_queries(self) -> int:
+        return sum(self.queries.values())
+
+    def record(self, statement: str):
+        self.queries[(normalize_sql(statement), get_call_site())] += 1
+
+    def repeated_queries(self) -> List[Tuple[str, str, int]]:
+        """
+        Returns ``(statement, call_site, count)`` tuples for statement shapes repeated
+        more than ``n_plus_one_threshold`` times from the same call site,
+        most frequent first.
+        """
+        return [
+            (statement, call_site, count)
+            for (statement, call_site), count in self.queries.most_common()
+            if count > self.n_plus_one_threshold
+        ]
+
+    def format_report(self, limit: int = 10) -> str:
+        lines = [
+            f"{self.n_queries} SQL queries ({len(self.queries)} distinct statement/call site pairs)."
+        ]
+        for (statement, call_site), count in self.queries.most_common(limit):
+            flag = " [N+1?]" if count > self.n_plus_one_threshold else ""
+            lines.append(f"  {count}x{flag} {call_site}: {statement[:200]}")
+        return "\n".join(lines)
+
+    def log_repeated_queries(self, label: str):
+        repeated = self.repeated_queries()
+        if repeated:
+            logger.warning(
+                "%s issued %i SQL queries, including repeated statements "
+                "that may indicate N+1 query patterns:\n%s",
+                label,
+                self.n_queries,
+                "\n".join(
+                    f"  {count}x {call_site}: {statement[:200]}"
+                    for statement, call_site, count in repeated
+                ),
+            )
+
+
+_listener_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.record(statement)
+
+
+def install_query_counting():
+    global _listener_installed
+    if _listener_installed:
+        return
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    _listener_installed = True
+
+
+def start_counting_queries(**kwargs) -> QueryCounter:
+    install_query_counting()
+    counter = QueryCounter(**kwargs)
+    _current_counter.set(counter)
+    return counter
+
+
+def stop_counting_queries() -> Optional[QueryCounter]:
+    counter = _current_counter.get()
+    _current_counter.set(None)
+    return counter
+
+
+@contextmanager
+def count_queries(**kwargs):
+    """
+    Context manager that counts the SQL statements executed within its body.
+
+    Example
+    -------
+
+    ::
+
+        with count_queries() as counter:
+            participant.module_states
+        print(counter.format_report())
+    """
+    previous = _current_counter.get()
+    counter = start_counting_queries(**kwargs)
+    try:
+        yield counter
+    finally:
+        _current_counter.set(previous)
+
+
+@contextmanager
+def assert_max_queries(n: int, **kwargs):
+    """
+    Context manager for tests that fails if its body executes more than ``n`` SQL statements.
+
+    Example
+    -------
+
+    ::
+
+        with assert_max_queries(20):
+            exp.process_response(...)
+    """
+    with count_queries(**kwargs) as counter:
+        yield counter
+    if counter.n_queries > n:
+        raise AssertionError(
+            f"Expected at most {n} SQL queries, but got {counter.n_queries}.\n"
+            + counter.format_report()
+        )
+
+
+def query_counting_enabled() -> bool:
+    from .utils import get_config
+
+    return get_config().get("count_sql_queries", False)
+
+
+def log_query_count(fun):
+    """
+    Decorator for scheduled tasks: if ``count_sql_queries`` is enabled,
+    counts the task's SQL statements and logs likely N+1 patterns.
+    """
+
+    @wraps(fun)
+    def wrapper(*args, **kwargs):
+        if not query_counting_enabled():
+            return fun(*args, **kwargs)
+        with count_queries() as counter:
+            res = fun(*args, **kwargs)
+        logger.info("Task '%s' issued %i SQL queries.", fun.__name__, counter.n_queries)
+        counter.log_repeated_queries(f"Task '{fun.__name__}'")
+        return res
+
+    return wrapper
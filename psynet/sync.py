@@ -1,10 +1,24 @@
 import random
+from itertools import chain
 from math import floor
 from typing import Callable, List, Optional, Union
 
 from dallinger import db
 from dallinger.models import timenow
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    and_,
+    event,
+    inspect,
+    or_,
+    select,
+)
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import backref, joinedload, relationship
 
@@ -12,6 +26,7 @@ from psynet.data import SQLBase, SQLMixin, register_table
 from psynet.field import PythonClass
 from psynet.page import UnsuccessfulEndPage, WaitPage
 from psynet.participant import Participant
+from psynet.push import notify_participant
 from psynet.timeline import CodeBlock, EltCollection, conditional
 from psynet.utils import call_function_with_context, get_logger
 
@@ -35,6 +50,7 @@ class Barrier(EltCollection):
         Either a single timeline element or a list of timeline elements (created by ``join``) that is to be displayed
         to the participant while they are waiting at the barrier. If left at the default value of ``None``
         then the participant will be shown a default waiting page.
+        See also ``wake_on_notification``.
 
     waiting_logic_expected_repetitions
         The number of times that the participant is expected to experience the waiting_logic during a given barrier
@@ -48,8 +64,27 @@ class Barrier(EltCollection):
     fix_time_credit
         If set to ``True``, then the amount of time 'credit' that the participant receives will be capped
         according to the estimate derived from ``waiting_logic`` and ``waiting_logic_expected_repetitions``.
+
+    wake_on_notification
+        If ``True``, the default waiting page advances as soon as the participant receives a push notification
+        (see :mod:`psynet.push`), which happens when the barrier releases them. The page then only needs
+        to reload every 5 seconds rather than every 0.5 seconds, which reduces server load.
+        Has no effect if ``waiting_logic`` is provided; pass e.g.
+        ``WaitPage(wait_time=5, wake_on_notification=True)`` there instead. Default: ``False``.
+
+    Attributes
+    ----------
+
+    time_dependent : bool
+        Barriers are re-evaluated whenever participants arrive at them, and whenever the status
+        or sync group membership of their waiting participants changes. If the decision about who
+        to release also depends on time (e.g. on how long participants have been waiting),
+        set this to ``True`` so that the barrier is re-evaluated on every barrier check
+        (twice a second) rather than only every few seconds. Default: ``False``.
     """
 
+    time_dependent = False
+
     def __init__(
         self,
         id_: str,
@@ -57,9 +92,13 @@ class Barrier(EltCollection):
         waiting_logic_expected_repetitions=3,
         max_wait_time=20,
         fix_time_credit=False,
+        wake_on_notification=False,
     ):
         if waiting_logic is None:
-            waiting_logic = WaitPage(wait_time=0.5)
+            if wake_on_notification:
+                waiting_logic = WaitPage(wait_time=5.0, wake_on_notification=True)
+            else:
+                waiting_logic = WaitPage(wait_time=0.5)
 
         self.id = id_
         self.waiting_logic = waiting_logic
@@ -178,6 +217,7 @@ class Barrier(EltCollection):
                 f"(participant_id = {participant.id}, barrier_id = '{self.id}')."
             )
         link.release()
+        notify_participant(participant.id)
 
     def can_participant_exit(self, participant: "Participant"):
         barrier_is_active = self.id in participant.active_barriers
@@ -245,6 +285,10 @@ class GroupBarrier(Barrier):
     fix_time_credit
         If set to ``True``, then the amount of time 'credit' that the participant receives will be fixed
         according to the estimate derived from ``waiting_logic`` and ``waiting_logic_expected_repetitions``.
+
+    wake_on_notification
+        If ``True``, the default waiting page advances as soon as the participant is released;
+        see :class:`~psynet.sync.Barrier`.
     """
 
     def __init__(
@@ -256,6 +300,7 @@ class GroupBarrier(Barrier):
         max_wait_time=20,
         on_release: Optional[Callable] = None,
         fix_time_credit=False,
+        wake_on_notification=False,
     ):
         super().__init__(
             id_=id_,
@@ -263,6 +308,7 @@ class GroupBarrier(Barrier):
             waiting_logic_expected_repetitions=waiting_logic_expected_repetitions,
             max_wait_time=max_wait_time,
             fix_time_credit=fix_time_credit,
+            wake_on_notification=wake_on_notification,
         )
         self.group_type = group_type
         self.on_release = on_release
@@ -340,6 +386,10 @@ class Grouper(Barrier):
         The maximum amount of time in seconds that the participant will be allowed to wait at the barrier;
         if this time is exceeded and the participant is still not released, then the participant will be failed
         and sent to the end of the experiment.
+
+    wake_on_notification
+        If ``True``, the default waiting page advances as soon as the participant is released;
+        see :class:`~psynet.sync.Barrier`.
     """
 
     def __init__(
@@ -349,6 +399,7 @@ class Grouper(Barrier):
         waiting_logic=None,
         waiting_logic_expected_repetitions=3,
         max_wait_time=20,
+        wake_on_notification=False,
     ):
         if not id_:
             id_ = group_type + "_" + "grouper"
@@ -357,6 +408,7 @@ class Grouper(Barrier):
             waiting_logic=waiting_logic,
             waiting_logic_expected_repetitions=waiting_logic_expected_repetitions,
             max_wait_time=max_wait_time,
+            wake_on_notification=wake_on_notification,
         )
         self.group_type = group_type
 
@@ -741,6 +793,10 @@ class ParticipantLinkBarrier(SQLBase, SQLMixin):
     departure_time = Column(DateTime)
     released = Column(Boolean, default=False)
 
+    # Set to ``True`` once the barrier has been evaluated with this participant waiting,
+    # see :meth:`psynet.experiment.Experiment.check_barriers`.
+    checked = Column(Boolean, default=False, server_default="false")
+
     def get_barrier(self):
         from .experiment import get_experiment
 
@@ -768,6 +824,23 @@ class ParticipantLinkBarrier(SQLBase, SQLMixin):
         )
 
 
+# Supports looking up the participants waiting at a given barrier.
+Index(
+    "ix_participant_link_barrier_waiting",
+    ParticipantLinkBarrier.barrier_id,
+    postgresql_where=~ParticipantLinkBarrier.released,
+)
+
+# Supports looking up the barriers whose waiting participants changed since they were last checked.
+Index(
+    "ix_participant_link_barrier_unchecked",
+    ParticipantLinkBarrier.barrier_id,
+    postgresql_where=and_(
+        ~ParticipantLinkBarrier.released, ~ParticipantLinkBarrier.checked
+    ),
+)
+
+
 Participant.sync_group_links = relationship(
     "ParticipantLinkSyncGroup",
     cascade="all, delete-orphan",
@@ -781,6 +854,77 @@ Participant.sync_groups = association_proxy(
 # No association proxy for barrier links because barriers aren't represented as database objects (yet)
 
 
+def get_barrier_recheck_statement(participant_ids, sync_group_ids):
+    """
+    Builds the ``UPDATE`` statement that marks as unchecked the barriers where the given participants,
+    or members of the given sync groups (or of the participants' sync groups), are waiting.
+    """
+    group_ids = select(ParticipantLinkSyncGroup.sync_group_id).where(
+        ParticipantLinkSyncGroup.participant_id.in_(participant_ids)
+    )
+    group_members = select(ParticipantLinkSyncGroup.participant_id).where(
+        or_(
+            ParticipantLinkSyncGroup.sync_group_id.in_(sync_group_ids),
+            ParticipantLinkSyncGroup.sync_group_id.in_(group_ids),
+        )
+    )
+    barrier_ids = select(ParticipantLinkBarrier.barrier_id).where(
+        ~ParticipantLinkBarrier.released,
+        or_(
+            ParticipantLinkBarrier.participant_id.in_(participant_ids),
+            ParticipantLinkBarrier.participant_id.in_(group_members),
+        ),
+    )
+    table = ParticipantLinkBarrier.__table__
+    return (
+        table.update()
+        .where(
+            ~table.c.released,
+            table.c.checked,
+            table.c.barrier_id.in_(barrier_ids),
+        )
+        .values(checked=False)
+    )
+
+
+@event.listens_for(db.session, "before_flush")
+def mark_barriers_for_recheck(session, flush_context, instances):
+    # Barriers are normally only re-evaluated when a participant arrives
+    # (see Experiment.check_barriers), but their decisions also depend on the status
+    # of the waiting participants and on the membership of their sync groups.
+    # When these change, we mark the affected barriers as unchecked so that they
+    # are re-evaluated by the next barrier check.
+    participant_ids = set()
+    sync_group_ids = set()
+    for obj in session.dirty:
+        if isinstance(obj, Participant):
+            attrs = inspect(obj).attrs
+            if attrs.status.history.has_changes() or attrs.failed.history.has_changes():
+                participant_ids.add(obj.id)
+        elif isinstance(obj, SyncGroup):
+            attrs = inspect(obj).attrs
+            if (
+                attrs.n_active_participants.history.has_changes()
+                or attrs.active.history.has_changes()
+            ):
+                sync_group_ids.add(obj.id)
+    for obj in chain(session.new, session.deleted):
+        if isinstance(obj, ParticipantLinkSyncGroup):
+            if obj.participant is not None:
+                participant_ids.add(obj.participant.id)
+            if obj.sync_group is not None:
+                sync_group_ids.add(obj.sync_group.id)
+
+    participant_ids.discard(None)
+    sync_group_ids.discard(None)
+    if participant_ids or sync_group_ids:
+        session.execute(
+            get_barrier_recheck_statement(
+                sorted(participant_ids), sorted(sync_group_ids)
+            )
+        )
+
+
 class GroupCloser(GroupBarrier):
     """
     A timeline construct for closing a previously created group.
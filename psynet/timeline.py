@@ -14,16 +14,29 @@ from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Unio
 from dallinger import db
 from dominate import tags
 from markupsafe import Markup
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    and_,
+    case,
+    distinct,
+    func,
+    select,
+)
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import backref, relationship
 from sqlalchemy.orm.attributes import flag_modified
 from sqlalchemy.orm.collections import attribute_mapped_collection
 
 from . import templates
-from .data import SQLBase, SQLMixin, register_table
+from .data import SQLBase, SQLMixin, defer_heavy_columns, register_table
 from .field import PythonObject, VarStore
 from .serialize import is_lambda_function
+from .trace import traced
 from .utils import (
     NoArgumentProvided,
     call_function,
@@ -34,7 +47,6 @@ from .utils import (
     get_language_dict,
     get_locale,
     get_logger,
-    log_time_taken,
     merge_dicts,
     pretty_format_seconds,
     render_string_with_translations,
@@ -1095,7 +1107,7 @@ class Page(Elt):
     def on_complete(self, experiment, participant):
         pass
 
-    @log_time_taken
+    @traced
     def process_response(
         self,
         raw_answer,
@@ -1320,6 +1332,7 @@ class Page(Elt):
         """
         pass
 
+    @traced
     def render(self, experiment, participant):
         from .utils import get_config
 
@@ -1419,6 +1432,21 @@ class PageMaker(Elt):
         ``time_estimate`` values, then these ``time_estimate`` values will be imputed by dividing
         the parent :class:`psynet.timeline.PageMaker`'s ``time_estimate``
         by the number of produced elements.
+
+    cache_resolution:
+        If ``True`` (default), the output of ``function`` is reused for the rest of the
+        current request, rather than being recomputed every time the timeline looks up
+        the participant's current position while handling that request
+        (see :class:`psynet.timeline.PageMakerMemo`). Each new request re-evaluates
+        ``function``. Within a request, the memo is invalidated whenever
+        the participant submits a response or passes through a timeline element with
+        side effects (e.g. a :class:`psynet.timeline.CodeBlock`). Note that this
+        invalidation is not targeted: PsyNet can't tell which state such an element
+        modifies, so all of the participant's page makers are re-evaluated afterwards,
+        including any page makers that enclose the element.
+        Set this to ``False`` if ``function`` must be re-evaluated on every lookup,
+        for example because it depends on state that is modified outside the timeline
+        during the request.
     """
 
     returns_time_credit = True
@@ -1429,6 +1457,7 @@ class PageMaker(Elt):
         time_estimate: Optional[float] = None,
         accumulate_answers: bool = False,
         label: str = "page_maker",
+        cache_resolution: bool = True,
     ):
         super().__init__()
 
@@ -1439,7 +1468,9 @@ class PageMaker(Elt):
         self.accumulate_answers = accumulate_answers
         self.expected_repetitions = 1
         self.label = label
+        self.cache_resolution = cache_resolution
 
+    @traced
     def resolve(self, experiment, participant, position):
         """
         This function 'resolves' the page maker by calling its underlying
@@ -1523,6 +1554,117 @@ class PageMakerFinishedError(Exception):
     pass
 
 
+class PageMakerMemo:
+    """
+    An in-request memo of the elements produced by resolving :class:`psynet.timeline.PageMaker`
+    objects. A single request typically looks up the participant's current position
+    in the timeline several times (e.g. when processing a response and then advancing
+    to the next page); the memo prevents these lookups from re-running the same
+    page maker functions.
+
+    Entries are keyed by participant ID and by the position of the page maker
+    within the timeline (i.e. a prefix of ``participant.elt_id``). Each participant's
+    entries are tagged with the participant's ``page_uuid``; if this changes,
+    the entries are discarded.
+
+    The memo lives in the database session (see :func:`psynet.timeline.get_page_maker_memo`),
+    so it never outlives the current request, and every request resolves the participant's
+    page makers at least once. This is deliberate: the elements produced
+    by page makers often hold references to database objects (e.g. the current trial),
+    which cannot be safely reused once the session has been closed.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        # These counters are reported in the logs, to help diagnose
+        # how often page maker functions are being run per request.
+        self.n_resolutions = 0
+        self.n_hits = 0
+
+    def get(self, participant, position):
+        try:
+            token, resolved = self.entries[participant.id]
+        except KeyError:
+            return None
+        if token != participant.page_uuid:
+            del self.entries[participant.id]
+            return None
+        elts = resolved.get(tuple(position))
+        if elts is not None:
+            self.n_hits += 1
+        return elts
+
+    def set(self, participant, position, elts):
+        if participant.id is None:
+            return
+        token, resolved = self.entries.get(participant.id, (None, {}))
+        if token != participant.page_uuid:
+            resolved = {}
+        resolved[tuple(position)] = elts
+        self.entries[participant.id] = (participant.page_uuid, resolved)
+
+    def invalidate(self, participant, position=None):
+        """
+        Discards memoized resolutions for a participant. If ``position`` is provided,
+        only the page maker at that position and the page makers nested within it
+        are discarded.
+        """
+        if position is None:
+            self.entries.pop(participant.id, None)
+            return
+
+        try:
+            _, resolved = self.entries[participant.id]
+        except KeyError:
+            return
+
+        position = tuple(position)
+        n = len(position)
+        for key in list(resolved):
+            if key[:n] == position:
+                del resolved[key]
+
+    def update_token(self, participant):
+        """
+        Re-tags the participant's entries with their current ``page_uuid``.
+        This is called once the participant reaches a new page, because the
+        memoized resolutions are exactly the ones that produced this page.
+        """
+        try:
+            _, resolved = self.entries[participant.id]
+        except KeyError:
+            return
+        self.entries[participant.id] = (participant.page_uuid, resolved)
+
+
+def get_page_maker_memo() -> PageMakerMemo:
+    """
+    Returns the :class:`psynet.timeline.PageMakerMemo` for the current database session.
+    """
+    info = db.session.info
+    if "psynet_page_maker_memo" not in info:
+        info["psynet_page_maker_memo"] = PageMakerMemo()
+    return info["psynet_page_maker_memo"]
+
+
+def is_no_op(elt: Elt):
+    """
+    Returns ``True`` if consuming the element does nothing at all.
+    """
+    return isinstance(elt, NullElt) and type(elt).consume is NullElt.consume
+
+
+def invalidates_page_maker_memo(elt: Elt):
+    """
+    Returns ``False`` if consuming the element is known not to change anything
+    that a page maker could depend on.
+    """
+    if isinstance(elt, (StartFixElt, EndFixElt)):
+        # These only do progress and time credit bookkeeping.
+        return False
+    return not is_no_op(elt)
+
+
 class Timeline:
     def __init__(self, *args):
         # Todo - don't add SuccessfulEndLogic if it's already there.
@@ -1535,6 +1677,7 @@ class Timeline:
         self.modules, self.module_list = self.compile_modules()
         self.check_elts()
         self.add_elt_ids()
+        self.jump_table = self.compile_jump_table()
         self.estimated_time_credit = CreditEstimate(self.elts)
 
     def compile_modules(self):
@@ -1623,6 +1766,65 @@ class Timeline:
 
             elt.id = [i]
 
+    def compile_jump_table(self):
+        """
+        Precompiles the control flow of the top level of the timeline.
+        The resulting list maps each index in the timeline to the index of the next element
+        that actually needs to be visited when advancing from that position.
+        Runs of no-op markers (e.g. ``StartWhile``, ``EndSwitch``) are skipped,
+        and ``GoTo`` elements with fixed targets are replaced by their targets.
+        Elements produced by page makers are not covered, because they are only
+        known at runtime.
+        """
+        n = len(self.elts)
+
+        # First pass: skip runs of no-op markers.
+        next_effective = [n] * (n + 1)
+        for i in reversed(range(n)):
+            if is_no_op(self.elts[i]):
+                next_effective[i] = next_effective[i + 1]
+            else:
+                next_effective[i] = i
+
+        # Second pass: follow GoTos with fixed targets.
+        jump_table = []
+        for i in range(n):
+            target = next_effective[i]
+            visited = set()
+            while target < n and target not in visited:
+                visited.add(target)
+                go_to_target = self._get_static_go_to_target(self.elts[target])
+                if go_to_target is None:
+                    break
+                target = next_effective[go_to_target]
+            else:
+                if target < n:
+                    # The GoTos form an infinite loop; we leave them for
+                    # advance_page to deal with as before.
+                    target = next_effective[i]
+            jump_table.append(target)
+
+        return jump_table
+
+    def _get_static_go_to_target(self, elt):
+        """
+        Returns the index of the GoTo's target if the GoTo always jumps to the same
+        top-level element, otherwise ``None``.
+        """
+        if not (
+            isinstance(elt, GoTo)
+            and type(elt).consume is GoTo.consume
+            and type(elt).get_target is GoTo.get_target
+            and isinstance(elt.target, Elt)
+        ):
+            return None
+        target_id = elt.target.id
+        if target_id is None or len(target_id) != 1:
+            return None
+        if self.elts[target_id[0]] is not elt.target:
+            return None
+        return target_id[0]
+
     def __len__(self):
         return len(self.elts)
 
@@ -1644,7 +1846,7 @@ class Timeline:
 
         return elt.id
 
-    @log_time_taken
+    @traced
     def get_current_elt(self, experiment, participant):
         # Remember, ``participant.elt_id`` corresponds to a list representation
         # of the participant's position in the timeline, where the first element corresponds
@@ -1667,6 +1869,7 @@ class Timeline:
         #
         num_levels = len(participant.elt_id)
         selected = self.elts
+        memo = get_page_maker_memo()
 
         for depth, index in enumerate(participant.elt_id):
             # Suppose ``participant.elt_id`` = ``[10, 3, 2]``
@@ -1691,7 +1894,9 @@ class Timeline:
                     if index_max is not None and index > index_max:
                         raise IndexError
                     position = participant.elt_id[0:depth]
-                    selected = selected.resolve(experiment, participant, position)
+                    selected = self.resolve_page_maker(
+                        selected, experiment, participant, position, memo
+                    )
                     if index_max is None:
                         participant.elt_id_max.append(len(selected) - 1)
                 except IndexError:
@@ -1712,12 +1917,40 @@ class Timeline:
 
         return selected
 
-    @log_time_taken
-    def advance_page(self, experiment, participant):
+    @staticmethod
+    def resolve_page_maker(page_maker, experiment, participant, position, memo):
+        if page_maker.cache_resolution:
+            elts = memo.get(participant, position)
+            if elts is not None:
+                return elts
+
+        elts = page_maker.resolve(experiment, participant, position)
+        memo.n_resolutions += 1
+
+        if page_maker.cache_resolution:
+            memo.set(participant, position, elts)
+
+        return elts
+
+    @traced
+    def advance_page(self, experiment, participant) -> Page:
+        """
+        Advances the participant through the timeline until they reach the next page,
+        consuming all the intervening elements.
+
+        Returns
+        -------
+
+        The page that the participant has arrived at.
+        """
+        memo = get_page_maker_memo()
         finished = False
         while not finished:
             participant.elt_id[-1] += 1
 
+            if len(participant.elt_id) == 1 and participant.elt_id[0] < len(self):
+                participant.elt_id[0] = self.jump_table[participant.elt_id[0]]
+
             try:
                 new_elt = self.get_current_elt(experiment, participant)
             except PageMakerFinishedError:
@@ -1725,13 +1958,21 @@ class Timeline:
                 participant.elt_id_max = participant.elt_id_max[:-1]
                 continue
             if isinstance(new_elt, PageMaker):
+                # The participant is entering the page maker afresh,
+                # so any previous resolution is no longer relevant.
+                memo.invalidate(participant, position=participant.elt_id)
                 participant.elt_id.append(-1)
                 continue
 
             new_elt.consume(experiment, participant)
 
             if isinstance(new_elt, Page):
+                memo.update_token(participant)
                 finished = True
+            elif invalidates_page_maker_memo(new_elt):
+                memo.invalidate(participant)
+
+        return new_elt
 
     def estimated_max_reward(self, wage_per_hour):
         return self.estimated_time_credit.get_max("reward", wage_per_hour=wage_per_hour)
@@ -2648,47 +2889,97 @@ class Module(EltCollection):
             cls.median_finish_time_in_s(participants, module_id)
         )
 
-    @property
-    def aborted_participants(self):
+    def _get_participants(self, flag: str, time_column: str):
+        # Participants with a module state for this module where ``flag`` is set,
+        # ordered by the corresponding time of their first such state.
         from .participant import Participant
 
-        aborted_participants = (
+        state = self.state_class
+        times = (
+            select(
+                state.participant_id,
+                func.min(getattr(state, time_column)).label("time"),
+            )
+            .where(state.module_id == self.id, getattr(state, flag))
+            .group_by(state.participant_id)
+            .subquery()
+        )
+        return (
             db.session.query(Participant)
-            .filter(self.state_class.module_id == self.id, self.state_class.aborted)
+            .options(*defer_heavy_columns(Participant))
+            .join(times, times.c.participant_id == Participant.id)
+            .order_by(times.c.time)
             .all()
         )
-        return sorted(
-            [p for p in aborted_participants if self.id in p.aborted_modules],
-            key=lambda p: p.module_states[self.id][0].time_aborted,
-        )
 
     @property
-    def started_participants(self):
-        from .participant import Participant
+    def aborted_participants(self):
+        return self._get_participants("aborted", "time_aborted")
 
-        started_participants = (
-            db.session.query(Participant)
-            .filter(self.state_class.module_id == self.id, self.state_class.started)
-            .all()
-        )
-        return sorted(
-            [p for p in started_participants if self.id in p.started_modules],
-            key=lambda p: p.module_states[self.id][0].time_started,
-        )
+    @property
+    def started_participants(self):
+        return self._get_participants("started", "time_started")
 
     @property
     def finished_participants(self):
-        from .participant import Participant
+        return self._get_participants("finished", "time_finished")
 
-        finished_participants = (
-            db.session.query(Participant)
-            .filter(self.state_class.module_id == self.id, self.state_class.finished)
-            .all()
+    def get_participant_statistics(self):
+        """
+        Summarizes the participants' progress through the module with a single aggregate query.
+
+        Returns
+        -------
+
+        A dictionary with the number of participants who started, finished, and aborted the module
+        (``n_started``, ``n_finished``, ``n_aborted``), the time of the latest such event
+        (``last_started``, ``last_finished``, ``last_aborted``), and the median time taken
+        to finish the module in seconds (``median_finish_time_in_s``, ``None`` if nobody has finished).
+        """
+        state = self.state_class
+        finish_time_in_s = case(
+            (
+                and_(
+                    state.finished,
+                    state.time_started.isnot(None),
+                    state.time_finished.isnot(None),
+                ),
+                func.extract("epoch", state.time_finished - state.time_started),
+            )
         )
-        return sorted(
-            [p for p in finished_participants if self.id in p.finished_modules],
-            key=lambda p: p.module_states[self.id][0].time_finished,
+        row = (
+            db.session.query(
+                func.count(distinct(state.participant_id))
+                .filter(state.started)
+                .label("n_started"),
+                func.count(distinct(state.participant_id))
+                .filter(state.finished)
+                .label("n_finished"),
+                func.count(distinct(state.participant_id))
+                .filter(state.aborted)
+                .label("n_aborted"),
+                func.max(state.time_started)
+                .filter(state.started)
+                .label("last_started"),
+                func.max(state.time_finished)
+                .filter(state.finished)
+                .label("last_finished"),
+                func.max(state.time_aborted)
+                .filter(state.aborted)
+                .label("last_aborted"),
+                func.percentile_cont(0.5)
+                .within_group(finish_time_in_s)
+                .label("median_finish_time_in_s"),
+            )
+            .filter(state.module_id == self.id)
+            .one()
         )
+        statistics = row._asdict()
+        if statistics["median_finish_time_in_s"] is not None:
+            statistics["median_finish_time_in_s"] = float(
+                statistics["median_finish_time_in_s"]
+            )
+        return statistics
 
     def resolve(self):
         return join(
@@ -2698,21 +2989,7 @@ class Module(EltCollection):
         )
 
     def visualize(self):
-        if self.started_participants:
-            time_started_last = (
-                self.started_participants[-1].module_states[self.id][0].time_started
-            )
-        if self.finished_participants:
-            time_finished_last = (
-                self.finished_participants[-1].module_states[self.id][0].time_finished
-            )
-            median_finish_time_in_min_and_s = Module.median_finish_time_in_min_and_s(
-                self.finished_participants, self.id
-            )
-        if self.aborted_participants:
-            time_aborted_last = (
-                self.aborted_participants[-1].module_states[self.id][0].time_aborted
-            )
+        statistics = self.get_participant_statistics()
 
         div = tags.div()
         with div:
@@ -2720,45 +2997,45 @@ class Module(EltCollection):
                 tags.b(f"Module: {self.id}")
             with tags.ul(cls="details"):
                 tags.b("Participants:")
-                if self.started_participants:
+                if statistics["n_started"]:
                     tags.li(
-                        f"{len(self.started_participants)} started (last at {format_datetime(time_started_last)})"
+                        f"{statistics['n_started']} started (last at {format_datetime(statistics['last_started'])})"
                     )
-                if self.finished_participants:
+                if statistics["n_finished"]:
                     tags.li(
-                        f"{len(self.finished_participants)} finished (last at {format_datetime(time_finished_last)})"
+                        f"{statistics['n_finished']} finished (last at {format_datetime(statistics['last_finished'])})"
                     )
-                if self.aborted_participants:
+                if statistics["n_aborted"]:
                     tags.li(
-                        f"{len(self.aborted_participants)} aborted (last at {format_datetime(time_aborted_last)})"
+                        f"{statistics['n_aborted']} aborted (last at {format_datetime(statistics['last_aborted'])})"
                     )
 
-                if self.finished_participants:
+                if statistics["n_finished"]:
                     tags.br()
                     tags.li(
-                        f"Median time spent to finish: {median_finish_time_in_min_and_s}"
+                        "Median time spent to finish: "
+                        + pretty_format_seconds(statistics["median_finish_time_in_s"])
                     )
 
         return div.render()
 
     def visualize_tooltip(self):
-        if self.finished_participants:
-            median_finish_time_in_min_and_s = Module.median_finish_time_in_min_and_s(
-                self.finished_participants, self.id
-            )
+        statistics = self.get_participant_statistics()
 
         span = tags.span()
         with span:
             tags.b(self.id)
             tags.br()
             tags.span(
-                f"{len(self.started_participants)} started, {len(self.finished_participants)} finished,"
+                f"{statistics['n_started']} started, {statistics['n_finished']} finished,"
             )
             tags.br()
-            tags.span(f"{len(self.aborted_participants)} aborted")
-            if self.finished_participants:
+            tags.span(f"{statistics['n_aborted']} aborted")
+            if statistics["n_finished"]:
                 tags.br()
-                tags.span(f"{median_finish_time_in_min_and_s} (median)")
+                tags.span(
+                    f"{pretty_format_seconds(statistics['median_finish_time_in_s'])} (median)"
+                )
 
         return span.render()
 
@@ -0,0 +1,374 @@
+"""
+Lightweight hierarchical tracing of HTTP requests.
+
+A trace is started at the beginning of each request and finished at the end.
+Functions decorated with :func:`traced` (and, if installed, every SQL statement)
+open a child span within the current trace, so that each request yields a tree
+of spans with total and self time. Outside a trace, decorated functions run
+without any bookkeeping.
+
+Finished traces are summarized into per-span aggregates, which a background thread
+periodically pushes to Redis so that the dashboard can combine the statistics of all
+server workers. Optionally, the span tree of requests exceeding a time threshold
+is written to the log.
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional
+
+from .log import bold
+from .utils import get_logger
+
+logger = get_logger()
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar(
+    "psynet_current_span", default=None
+)
+
+
+class Span:
+    """
+    A timed section of a request. Spans form a tree whose root is the request itself.
+    """
+
+    __slots__ = ("name", "parent", "children", "time_started", "time_finished")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None):
+        self.name = name
+        self.parent = parent
+        self.children: List["Span"] = []
+        self.time_started = time.perf_counter()
+        self.time_finished = None
+
+        if parent is not None:
+            parent.children.append(self)
+
+    def __repr__(self):
+        return f"Span({self.name!r}, total_time={self.total_time:.4f})"
+
+    def finish(self):
+        self.time_finished = time.perf_counter()
+
+    @property
+    def total_time(self) -> float:
+        end = (
+            self.time_finished
+            if self.time_finished is not None
+            else time.perf_counter()
+        )
+        return end - self.time_started
+
+    @property
+    def self_time(self) -> float:
+        return self.total_time - sum(child.total_time for child in self.children)
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def format(self, indent: int = 0) -> str:
+        """
+        Formats the span tree as indented text. Consecutive siblings with the same name
+        (e.g. repeated SQL statements) are collapsed into a single line.
+        """
+        lines = [
+            "  " * indent
+            + f"{self.name}: {self.total_time * 1000:.1f} ms "
+            + f"(self: {self.self_time * 1000:.1f} ms)"
+        ]
+        i = 0
+        while i < len(self.children):
+            child = self.children[i]
+            j = i
+            while (
+                j + 1 < len(self.children)
+                and self.children[j + 1].name == child.name
+                and not self.children[j + 1].children
+                and not child.children
+            ):
+                j += 1
+            if j > i:
+                run = self.children[i : j + 1]
+                total = sum(span.total_time for span in run)
+                lines.append(
+                    "  " * (indent + 1)
+                    + f"{child.name} x{len(run)}: {total * 1000:.1f} ms"
+                )
+            else:
+                lines.append(child.format(indent + 1))
+            i = j + 1
+        return "\n".join(lines)
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_trace(name: str) -> Span:
+    """
+    Starts a new trace in the current context, discarding any unfinished trace
+    (e.g. one left behind by a request that raised an exception).
+    """
+    root = Span(name)
+    _current_span.set(root)
+    return root
+
+
+def finish_trace() -> Optional[Span]:
+    """
+    Finishes the trace in the current context and returns its root span,
+    or ``None`` if no trace is active.
+    """
+    span = _current_span.get()
+    if span is None:
+        return None
+    while span.parent is not None:
+        span = span.parent
+    # Finishes the spans left open by the request, e.g. because of an exception.
+    for child in span.walk():
+        if child.time_finished is None:
+            child.finish()
+    _current_span.set(None)
+    return span
+
+
+@contextmanager
+def trace_span(name: str):
+    """
+    Context manager that records its body as a child span of the current span.
+    Does nothing if no trace is active.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    span = Span(name, parent)
+    _current_span.set(span)
+    try:
+        yield span
+    finally:
+        span.finish()
+        _current_span.set(parent)
+
+
+def traced(fun):
+    """
+    Decorator that records each call of the function as a span named
+    after the function's qualified name.
+    """
+    name = fun.__qualname__
+
+    @wraps(fun)
+    def wrapper(*args, **kwargs):
+        parent = _current_span.get()
+        if parent is None:
+            return fun(*args, **kwargs)
+        span = Span(name, parent)
+        _current_span.set(span)
+        try:
+            return fun(*args, **kwargs)
+        finally:
+            span.finish()
+            _current_span.set(parent)
+
+    return wrapper
+
+
+SQL_SPAN_NAME = "SQL"
+
+_sql_tracing_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current_span.get()
+    if parent is not None and context is not None:
+        context._psynet_span = Span(SQL_SPAN_NAME, parent)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, "_psynet_span", None)
+    if span is not None:
+        span.finish()
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute isn't called if the statement raises.
+    _after_cursor_execute(
+        None, None, None, None, exception_context.execution_context, None
+    )
+
+
+def install_sql_tracing():
+    """
+    Records every SQL statement executed within a trace as a span.
+    Safe to call more than once.
+    """
+    global _sql_tracing_installed
+    if _sql_tracing_installed:
+        return
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _sql_tracing_installed = True
+
+
+class SpanStatistics:
+    """
+    Aggregates finished traces by span name.
+
+    For each span name we keep the number of calls, the summed total and self time,
+    and the maximum total time of a single call. Adding a trace only updates these
+    in-memory aggregates; as with :class:`psynet.metrics.RequestMetricsBuffer`,
+    a background thread adds the aggregates accumulated since the last push
+    to a Redis hash every ``push_interval`` seconds, so that the statistics of all workers
+    can be combined without any Redis round trips on the request path.
+    If ``push_interval`` is ``0``, aggregates are pushed synchronously as soon as
+    they are added; if it is infinite, they are only pushed when :meth:`push` is called.
+    """
+
+    redis_key = "psynet_trace_statistics"
+    fields = ("count", "total_time", "self_time", "max_time")
+
+    def __init__(self, push_interval: float = 10.0):
+        self.push_interval = push_interval
+        self.lock = threading.Lock()
+        self.pending: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.pid: Optional[int] = None
+        self.registered_atexit = False
+
+    def add(self, root: Span):
+        with self.lock:
+            for span in root.walk():
+                stats = self.pending[span.name]
+                total_time = span.total_time
+                stats[0] += 1
+                stats[1] += total_time
+                stats[2] += span.self_time
+                stats[3] = max(stats[3], total_time)
+
+        if self.push_interval <= 0:
+            self.push()
+        elif self.push_interval < float("inf"):
+            self.ensure_started()
+
+    def push(self):
+        from dallinger.db import redis_conn
+
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(
+                lambda: [0, 0.0, 0.0, 0.0]
+            )
+
+        if not pending:
+            return
+
+        try:
+            names = list(pending)
+            maxima = redis_conn.hmget(
+                self.redis_key, [f"{name}|max_time" for name in names]
+            )
+            pipeline = redis_conn.pipeline(transaction=False)
+            for name, previous_max in zip(names, maxima):
+                count, total_time, self_time, max_time = pending[name]
+                pipeline.hincrby(self.redis_key, f"{name}|count", count)
+                pipeline.hincrbyfloat(self.redis_key, f"{name}|total_time", total_time)
+                pipeline.hincrbyfloat(self.redis_key, f"{name}|self_time", self_time)
+                if max_time > float(previous_max or 0):
+                    pipeline.hset(self.redis_key, f"{name}|max_time", max_time)
+            pipeline.execute()
+        except Exception:
+            logger.error("Failed to push trace statistics to Redis.", exc_info=True)
+
+    def ensure_started(self):
+        if self.pid == os.getpid() and self.thread is not None:
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread is not None:
+                return
+            self.pid = os.getpid()
+            self.stop_event = threading.Event()
+            self.thread = threading.Thread(
+                target=self._run, name="trace-statistics-pusher", daemon=True
+            )
+            self.thread.start()
+            if not self.registered_atexit:
+                # The registration survives forks, so we only need it once.
+                atexit.register(self.stop)
+                self.registered_atexit = True
+
+    def _run(self):
+        while not self.stop_event.wait(self.push_interval):
+            self.push()
+
+    def stop(self):
+        """
+        Stops the background thread and pushes any remaining aggregates.
+        """
+        self.stop_event.set()
+        self.thread = None
+        self.push()
+
+    @classmethod
+    def load(cls) -> List[dict]:
+        """
+        Returns the aggregated statistics of all workers, one dictionary per span name,
+        sorted by decreasing self time.
+        """
+        from dallinger.db import redis_conn
+
+        stats = defaultdict(dict)
+        for key, value in redis_conn.hgetall(cls.redis_key).items():
+            name, field = key.decode().rsplit("|", 1)
+            stats[name][field] = float(value)
+
+        rows = []
+        for name, values in stats.items():
+            count = int(values.get("count", 0))
+            rows.append(
+                {
+                    "name": name,
+                    "count": count,
+                    "total_time": values.get("total_time", 0.0),
+                    "self_time": values.get("self_time", 0.0),
+                    "mean_time": (
+                        values.get("total_time", 0.0) / count if count else 0.0
+                    ),
+                    "max_time": values.get("max_time", 0.0),
+                }
+            )
+        return sorted(rows, key=lambda row: row["self_time"], reverse=True)
+
+    @classmethod
+    def reset(cls):
+        from dallinger.db import redis_conn
+
+        redis_conn.delete(cls.redis_key)
+
+
+span_statistics = SpanStatistics()
+
+
+def record_trace(root: Span, slow_request_threshold: float = 0.0):
+    """
+    Adds a finished trace to the span statistics, and logs its span tree
+    if it took longer than ``slow_request_threshold`` seconds (``0`` disables this).
+    """
+    span_statistics.add(root)
+    if 0 < slow_request_threshold < root.total_time:
+        logger.warning(
+            bold(f"Slow request ({root.total_time:.3f} s):") + "\n" + root.format()
+        )
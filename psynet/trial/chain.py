@@ -1,4 +1,5 @@
 import random
+import time
 from typing import List, Optional, Type, Union
 
 from dallinger import db
@@ -6,30 +7,48 @@ from dallinger.models import Vector
 from sqlalchemy import (
     Boolean,
     Column,
+    Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
+    all_,
+    and_,
+    bindparam,
+    case,
+    event,
     func,
+    inspect,
     or_,
+    update,
 )
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import column_property, relationship, subqueryload
+from sqlalchemy.orm import (
+    aliased,
+    column_property,
+    joinedload,
+    relationship,
+    subqueryload,
+)
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.sql.expression import not_, select
 from tqdm import tqdm
 
-from ..data import SQLMixinDallinger
+from ..data import SQLMixinDallinger, defer_heavy_columns
 from ..field import PythonList, PythonObject, VarStore
 from ..page import wait_while
 from ..participant import Participant
 from ..sync import SyncGroup
 from ..timeline import is_list_of
+from ..trace import traced
 from ..utils import (
     NoArgumentProvided,
     call_function_with_context,
     get_logger,
-    log_time_taken,
+    is_method_overridden,
     negate,
 )
 from .main import (
@@ -153,12 +172,25 @@ class ChainNetwork(TrialNetwork):
         in the chain before another chain will be added.
         Most paradigms have this equal to 1.
         Set by default in the ``__init__`` function.
+
+    head_degree
+        Copy of the head node's ``degree``, kept in sync automatically.
+
+    head_n_viable_trials
+        Copy of the head node's ``n_viable_trials``, kept in sync automatically.
+
+    random_key
+        Random number between 0 and 1 used to choose randomly between equally
+        suitable networks.
+
+    has_head_space
+        Whether the head node can receive another trial.
     """
 
     # pylint: disable=abstract-method
 
     chain_type = Column(String)
-    head_id = Column(Integer, ForeignKey("node.id"))
+    head_id = Column(Integer, ForeignKey("node.id"), index=True)
     trials_per_node = Column(Integer)
     definition = Column(PythonObject)
     context = Column(PythonObject)
@@ -168,6 +200,14 @@ class ChainNetwork(TrialNetwork):
         "ChainNode", foreign_keys=[head_id], post_update=True, lazy="joined"
     )
 
+    # Copies of the head's ``degree`` and ``n_viable_trials``, kept in sync whenever the head
+    # changes or receives a trial. Together with ``random_key`` they form the registry of networks
+    # that can take another trial (see ``ix_network_registry`` and
+    # :meth:`~psynet.trial.chain.ChainTrialMaker.find_networks`).
+    head_degree = Column(Integer)
+    head_n_viable_trials = Column(Integer)
+    random_key = Column(Float, default=random.random)
+
     def __init__(
         self,
         trial_maker_id: str,
@@ -385,6 +425,17 @@ class ChainNetwork(TrialNetwork):
             .scalar_subquery()
         )
 
+    @hybrid_property
+    def has_head_space(self):
+        return (
+            self.head_n_viable_trials is not None
+            and self.head_n_viable_trials < self.trials_per_node
+        )
+
+    @has_head_space.expression
+    def has_head_space(cls):
+        return cls.head_n_viable_trials < cls.trials_per_node
+
     @hybrid_property
     def n_viable_trials_at_head(self):
         return self.head.n_viable_trials
@@ -498,6 +549,15 @@ class ChainNode(TrialNode):
         excluding those that are awaiting some asynchronous processing.
         excludes failed nodes.
 
+    n_completed_and_processed_trials
+        Counts the completed and processed non-repeat trials associated with the node,
+        excluding failed trials. Stored as a counter column that is updated
+        when trials are finalized or failed; see ``psynet repair-counters``.
+
+    n_viable_trials
+        Counts the non-repeat trials associated with the node, excluding failed trials.
+        Stored as a counter column that is updated when trials are created or failed.
+
     completed_trials
         Returns all completed trials associated with the node.
         Excludes failed nodes and repeat trials.
@@ -526,6 +586,8 @@ class ChainNode(TrialNode):
     degree = Column(Integer)
     target_n_trials = Column(Integer)
     ready_to_spawn = Column(Boolean)
+    n_viable_trials = Column(Integer, default=0, server_default="0")
+    n_completed_and_processed_trials = Column(Integer, default=0, server_default="0")
     child_id = Column(Integer, ForeignKey("node.id"), index=True)
     parent_id = Column(Integer, ForeignKey("node.id"), index=True)
     seed = Column(PythonObject, default=lambda: {})
@@ -602,6 +664,8 @@ class ChainNode(TrialNode):
 
         self.degree = degree
         self.ready_to_spawn = False
+        self.n_viable_trials = 0
+        self.n_completed_and_processed_trials = 0
 
         if module_id is None:
             if parent:
@@ -733,23 +797,46 @@ class ChainNode(TrialNode):
             if (t.complete and t.finalized and not t.is_repeat_trial)
         ]
 
-    @hybrid_property
-    def n_completed_and_processed_trials(self):
-        return len(self.completed_and_processed_trials)
-
-    @n_completed_and_processed_trials.expression
-    def n_completed_and_processed_trials(cls):
-        return (
-            select(func.count(Trial.id))
-            .where(
-                Trial.node_id == TrialNode.id,
-                Trial.complete,
-                Trial.finalized,
-                ~Trial.failed,
-                ~Trial.is_repeat_trial,
-            )
-            .scalar_subquery()
+    def increment_trial_counter(self, name: str, delta: int = 1):
+        """
+        Atomically adds ``delta`` to one of the node's trial counters
+        (``n_viable_trials`` or ``n_completed_and_processed_trials``).
+        For nodes already in the database this is done with an ``UPDATE`` statement,
+        so that concurrent updates from other processes are not lost.
+        """
+        if not inspect(self).persistent:
+            setattr(self, name, (getattr(self, name) or 0) + delta)
+            network = self.__dict__.get("network")
+            if name == "n_viable_trials" and network is not None:
+                if network.head is self:
+                    network.head_n_viable_trials = self.n_viable_trials
+            return
+        if name == "n_viable_trials":
+            # The network is updated first, so that rows are locked in the same order
+            # as in Experiment.grow_networks (network, then head node).
+            self._increment_head_n_viable_trials(delta)
+        table = self.__table__
+        value = db.session.execute(
+            update(table)
+            .where(table.c.id == self.id)
+            .values({name: table.c[name] + delta})
+            .returning(table.c[name])
+        ).scalar_one()
+        set_committed_value(self, name, value)
+
+    def _increment_head_n_viable_trials(self, delta: int):
+        table = ChainNetwork.__table__
+        values = dict(
+            db.session.execute(
+                update(table)
+                .where(table.c.head_id == self.id)
+                .values(head_n_viable_trials=table.c.head_n_viable_trials + delta)
+                .returning(table.c.id, table.c.head_n_viable_trials)
+            ).all()
         )
+        network = self.__dict__.get("network")
+        if network is not None and network.id in values:
+            set_committed_value(network, "head_n_viable_trials", values[network.id])
 
     @hybrid_property
     def reached_target_n_trials(self):
@@ -801,18 +888,184 @@ class ChainNode(TrialNode):
     #     )
 
 
-TrialNode.n_viable_trials = column_property(
-    select(func.count(Trial.id))
-    .where(
-        Trial.node_id == TrialNode.id,
-        ~Trial.is_repeat_trial,
-        ~Trial.failed,
+UniqueConstraint(ChainNode.module_id, ChainNode.key)
+
+
+def get_trial_counter_expressions(node):
+    """
+    Returns, for each trial counter column of :class:`~psynet.trial.chain.ChainNode`,
+    the SQL expression that recomputes it from the trials of ``node``
+    (a node table or alias).
+    """
+    return {
+        "n_viable_trials": (
+            select(func.count(Trial.id))
+            .where(
+                Trial.node_id == node.c.id,
+                ~Trial.is_repeat_trial,
+                ~Trial.failed,
+            )
+            .scalar_subquery()
+        ),
+        "n_completed_and_processed_trials": (
+            select(func.count(Trial.id))
+            .where(
+                Trial.node_id == node.c.id,
+                Trial.complete,
+                Trial.finalized,
+                ~Trial.failed,
+                ~Trial.is_repeat_trial,
+            )
+            .scalar_subquery()
+        ),
+    }
+
+
+def get_trial_counter_repair_statements():
+    """
+    Returns two statements for checking the trial counters of all chain nodes
+    against the trial table: a ``SELECT`` listing the inconsistent nodes
+    (node ID followed by stored and actual value of each counter),
+    and an ``UPDATE`` correcting them.
+    """
+    node = ChainNode.__table__
+    node_types = [
+        mapper.polymorphic_identity
+        for mapper in inspect(ChainNode).self_and_descendants
+    ]
+    counters = get_trial_counter_expressions(node)
+    inconsistent = and_(
+        node.c.type.in_(node_types),
+        or_(
+            *[
+                node.c[name].is_distinct_from(expression)
+                for name, expression in counters.items()
+            ]
+        ),
     )
-    .scalar_subquery()
+    check = (
+        select(
+            node.c.id,
+            *[
+                column
+                for name, expression in counters.items()
+                for column in (node.c[name], expression)
+            ],
+        )
+        .where(inconsistent)
+        .order_by(node.c.id)
+    )
+    repair = update(node).where(inconsistent).values(**counters)
+    return check, repair
+
+
+def get_chain_registry_repair_statements():
+    """
+    Returns two statements for checking the copies of the head's ``degree`` and
+    ``n_viable_trials`` stored on chain networks against their head nodes:
+    a ``SELECT`` listing the inconsistent networks (network ID followed by stored
+    and actual value of each column), and an ``UPDATE`` correcting them.
+    The ``UPDATE`` also assigns a ``random_key`` to networks that lack one.
+    """
+    network = ChainNetwork.__table__
+    node = ChainNode.__table__
+    network_types = [
+        mapper.polymorphic_identity
+        for mapper in inspect(ChainNetwork).self_and_descendants
+    ]
+    columns = {
+        "head_degree": (
+            select(node.c.degree).where(node.c.id == network.c.head_id)
+        ).scalar_subquery(),
+        "head_n_viable_trials": (
+            select(node.c.n_viable_trials).where(node.c.id == network.c.head_id)
+        ).scalar_subquery(),
+    }
+    is_chain_network = network.c.type.in_(network_types)
+    inconsistent = or_(
+        *[
+            network.c[name].is_distinct_from(expression)
+            for name, expression in columns.items()
+        ]
+    )
+    check = (
+        select(
+            network.c.id,
+            *[
+                column
+                for name, expression in columns.items()
+                for column in (network.c[name], expression)
+            ],
+        )
+        .where(is_chain_network, inconsistent)
+        .order_by(network.c.id)
+    )
+    repair = (
+        update(network)
+        .where(is_chain_network, or_(inconsistent, network.c.random_key.is_(None)))
+        .values(
+            **columns,
+            random_key=func.coalesce(network.c.random_key, func.random()),
+        )
+    )
+    return check, repair
+
+
+# Supports Experiment.grow_networks, which looks up the (few) nodes that are ready to spawn.
+Index(
+    "ix_node_ready_to_spawn",
+    ChainNode.ready_to_spawn,
+    postgresql_where=ChainNode.ready_to_spawn,
 )
 
 
-UniqueConstraint(ChainNode.module_id, ChainNode.key)
+@event.listens_for(ChainNetwork.head, "set", propagate=True)
+def receive_head_set(network, head, oldvalue, initiator):
+    if head is None:
+        network.head_degree = None
+        network.head_n_viable_trials = None
+    else:
+        network.head_degree = head.degree
+        network.head_n_viable_trials = head.n_viable_trials or 0
+
+
+# Supports ChainTrialMaker.find_networks, which looks up the open chains
+# of a given trial maker, participant group and block.
+Index(
+    "ix_network_open_chains",
+    ChainNetwork.trial_maker_id,
+    ChainNetwork.participant_group,
+    ChainNetwork.block,
+    postgresql_where=and_(~ChainNetwork.full, ~ChainNetwork.failed),
+)
+
+# The registry of networks that can take another trial: open networks whose head has space.
+# Its entries are ordered in the way ChainTrialMaker.find_networks prefers them,
+# so that choosing a network only takes a few index lookups (see ChainTrialMaker._choose_network_in_sql).
+# The condition must be matched exactly by the queries that are meant to use these indexes.
+CHAIN_REGISTRY_CONDITION = and_(
+    ~ChainNetwork.full, ~ChainNetwork.failed, ChainNetwork.has_head_space
+)
+
+Index(
+    "ix_network_registry",
+    ChainNetwork.trial_maker_id,
+    ChainNetwork.participant_group,
+    ChainNetwork.block,
+    ChainNetwork.random_key,
+    postgresql_where=CHAIN_REGISTRY_CONDITION,
+)
+
+Index(
+    "ix_network_registry_balanced",
+    ChainNetwork.trial_maker_id,
+    ChainNetwork.participant_group,
+    ChainNetwork.block,
+    ChainNetwork.head_degree,
+    ChainNetwork.head_n_viable_trials,
+    ChainNetwork.random_key,
+    postgresql_where=CHAIN_REGISTRY_CONDITION,
+)
 
 
 class ChainTrial(Trial):
@@ -958,6 +1211,8 @@ class ChainTrial(Trial):
         ):
             self.block_position = participant.module_state.block_position
             self.block = participant.module_state.block
+        if isinstance(node, ChainNode) and not self.is_repeat_trial:
+            node.increment_trial_counter("n_viable_trials")
 
     # @property
     # @extra_var(__extra_vars__)
@@ -969,8 +1224,15 @@ class ChainTrial(Trial):
     #     return self.origin
 
     def fail(self, reason=None):
+        newly_failed = not self.failed
         super().fail(reason)
         if isinstance(self.node, ChainNode):
+            if newly_failed and not self.is_repeat_trial:
+                self.node.increment_trial_counter("n_viable_trials", -1)
+                if self.complete and self.finalized:
+                    self.node.increment_trial_counter(
+                        "n_completed_and_processed_trials", -1
+                    )
             self.node.check_ready_to_spawn()
 
     @property
@@ -987,6 +1249,8 @@ class ChainTrial(Trial):
 
     def on_finalized(self):
         super().on_finalized()
+        if self.complete and not self.is_repeat_trial:
+            self.node.increment_trial_counter("n_completed_and_processed_trials")
         self.node.check_ready_to_spawn()
         if self.trial_maker and self.trial_maker.chain_type == "within":
             self.trial_maker.call_grow_network(network=self.network)
@@ -1251,9 +1515,23 @@ class ChainTrialMaker(NetworkTrialMaker):
     end_performance_check_waits : bool
         If ``True`` (default), then the final performance check waits until all trials no
         longer have any pending asynchronous processes.
+
+    wake_on_notification : bool
+        If ``True``, the trial maker's built-in wait pages (e.g. waiting for feedback, for a trial,
+        or for trials that are awaiting further processing) advance as soon as the participant
+        receives a push notification (see :mod:`psynet.push`), for example when one of their
+        asynchronous processes finishes, rather than only when their check interval elapses.
+        Defaults to ``False``.
+
+    n_trials_still_required_cache_sec : float
+        How long the result of :attr:`~psynet.trial.chain.ChainTrialMaker.n_trials_still_required`
+        is reused by the current process, in seconds (default = 0, i.e. no caching).
+        Setting this to a few seconds reduces database load from recruitment checks
+        in experiments with many participants finishing at once.
     """
 
     state_class = ChainTrialMakerState
+    n_trials_still_required_cache_sec = 0.0
 
     def __init__(
         self,
@@ -1535,6 +1813,7 @@ class ChainTrialMaker(NetworkTrialMaker):
                 expected_wait=5.0,
                 log_message="Waiting for participant networks to be ready.",
                 max_wait_time=self.max_time_waiting_for_trial,
+                wake_on_notification=self.wake_on_notification,
             )
         return None
 
@@ -1558,7 +1837,56 @@ class ChainTrialMaker(NetworkTrialMaker):
     @property
     def n_trials_still_required(self):
         assert self.chain_type == "across"
-        return sum([network.n_trials_still_required for network in self.networks])
+        if self.n_trials_still_required_cache_sec > 0:
+            cached = getattr(self, "_n_trials_still_required_cache", None)
+            if (
+                cached is not None
+                and time.monotonic() - cached[0]
+                < self.n_trials_still_required_cache_sec
+            ):
+                return cached[1]
+
+        n_trials_still_required = self._count_trials_still_required()
+
+        if self.n_trials_still_required_cache_sec > 0:
+            self._n_trials_still_required_cache = (
+                time.monotonic(),
+                n_trials_still_required,
+            )
+        return n_trials_still_required
+
+    def _count_trials_still_required(self):
+        # Equivalent to summing ChainNetwork.n_trials_still_required over self.networks,
+        # but computed in a single query: completed trials are counted per network
+        # in one grouped subquery rather than one subquery per network.
+        network_class = self.network_class
+        n_completed_trials = (
+            select(Trial.network_id, func.count(Trial.id).label("n"))
+            .where(
+                Trial.trial_maker_id == self.id,
+                ~Trial.failed,
+                Trial.complete,
+                ~Trial.is_repeat_trial,
+            )
+            .group_by(Trial.network_id)
+            .subquery()
+        )
+        n_still_required = case(
+            (network_class.full, 0),
+            else_=network_class.target_n_trials
+            - func.coalesce(n_completed_trials.c.n, 0),
+        )
+        total = (
+            db.session.query(func.sum(n_still_required))
+            .select_from(network_class)
+            .outerjoin(
+                n_completed_trials,
+                n_completed_trials.c.network_id == network_class.id,
+            )
+            .filter(network_class.trial_maker_id == self.id)
+            .scalar()
+        )
+        return int(total or 0)
 
     #########################
     # Participated networks #
@@ -1650,7 +1978,7 @@ class ChainTrialMaker(NetworkTrialMaker):
         start_node.set_network(network)
         return network
 
-    @log_time_taken
+    @traced
     def find_networks(self, participant, experiment):
         """
 
@@ -1707,8 +2035,6 @@ class ChainTrialMaker(NetworkTrialMaker):
         #
         networks = self.network_class.query.filter_by(
             trial_maker_id=self.id, full=False, failed=False
-        ).options(
-            subqueryload(self.network_class.head),
         )
 
         # logger.info(
@@ -1739,7 +2065,10 @@ class ChainTrialMaker(NetworkTrialMaker):
         #     participant_group,
         # )
 
-        networks = networks.all()
+        if self.choose_network_in_sql:
+            return self._choose_network_in_sql(networks, participant)
+
+        networks = networks.options(subqueryload(self.network_class.head)).all()
 
         networks = self.custom_network_filter(
             candidates=networks,
@@ -1843,6 +2172,127 @@ class ChainTrialMaker(NetworkTrialMaker):
 
         return [chosen]
 
+    @property
+    def choose_network_in_sql(self):
+        """
+        Whether :meth:`~psynet.trial.chain.ChainTrialMaker.find_networks` can delegate
+        the choice of network to the database. This is not possible if
+        :meth:`~psynet.trial.chain.ChainTrialMaker.custom_network_filter` or
+        :meth:`~psynet.trial.chain.ChainTrialMaker.prioritize_networks` have been overridden,
+        because these need to see the full list of candidate networks.
+        """
+        return not (
+            is_method_overridden(self, ChainTrialMaker, "custom_network_filter")
+            or is_method_overridden(self, ChainTrialMaker, "prioritize_networks")
+        )
+
+    def _choose_network_in_sql(self, candidates, participant):
+        # Applies the same selection rules as the Python implementation in find_networks,
+        # but picks the network from the chain registry (see ix_network_registry),
+        # which lists the open networks whose head has space in the order we prefer them.
+        # Each pick is therefore a few index lookups that stop at the first suitable row,
+        # rather than a sort over all candidate networks.
+        # If there is no suitable network, a single query determines
+        # whether the participant should wait or exit.
+        network_class = self.network_class
+        not_pending = self._not_pending_condition()
+        available = self._available_networks(candidates)
+
+        remaining_blocks = participant.module_state.remaining_blocks
+        for block in dict.fromkeys(remaining_blocks):
+            chosen = self._pick_from_registry(
+                available.filter(network_class.block == block)
+            )
+            if chosen is not None:
+                current_block = participant.module_state.block
+                if chosen.block != current_block:
+                    logger.info(
+                        f"Advanced from block '{current_block}' to '{chosen.block}' "
+                        "because there weren't any spots available in the former."
+                    )
+                return [chosen]
+
+        any_candidates, any_not_pending, any_available = db.session.query(
+            candidates.exists(),
+            candidates.filter(not_pending).exists(),
+            available.exists(),
+        ).one()
+
+        if not any_not_pending and any_candidates and self.wait_for_networks:
+            logger.info("Will wait for a network to become available.")
+            return "wait"
+
+        if any_not_pending and not any_available:
+            logger.info(
+                "All of these chains have head nodes that have already received their full complement of trials. "
+                "They need to grow before a new participant can join them."
+            )
+            if self.wait_for_networks:
+                return "wait"
+
+        return "exit"
+
+    def _not_pending_condition(self):
+        network_class = self.network_class
+        head = aliased(self.node_class)
+        head_pending = (
+            select(head.id)
+            .where(head.id == network_class.head_id, head.async_on_deploy_pending)
+            .exists()
+        )
+        return and_(
+            not_(func.coalesce(network_class.async_post_grow_network_pending, False)),
+            ~head_pending,
+        )
+
+    def _available_networks(self, candidates):
+        # Restricts the candidates to the chain registry (repeating the condition of its
+        # indexes, so that the database can use them) and drops networks with pending processes.
+        network_class = self.network_class
+        return candidates.filter(
+            ~network_class.full, ~network_class.failed, network_class.has_head_space
+        ).filter(self._not_pending_condition())
+
+    def _pick_from_registry(self, available):
+        # Picks a random network among the most preferred available networks of a block.
+        # With balancing, these are the networks whose head has the lowest degree
+        # and then the fewest viable trials; this tie group is found with a first
+        # index lookup. The random choice then takes the first network whose random_key
+        # follows a random pivot, wrapping around to the start of the tie group.
+        network_class = self.network_class
+
+        if self.balance_across_chains:
+            best = (
+                available.with_entities(
+                    network_class.head_degree, network_class.head_n_viable_trials
+                )
+                .order_by(
+                    network_class.head_degree,
+                    network_class.head_n_viable_trials,
+                    network_class.random_key,
+                )
+                .first()
+            )
+            if best is None:
+                return None
+            available = available.filter(
+                network_class.head_degree == best.head_degree,
+                network_class.head_n_viable_trials == best.head_n_viable_trials,
+            )
+
+        available = available.options(
+            *defer_heavy_columns(network_class),
+            joinedload(network_class.head).options(
+                *defer_heavy_columns(self.node_class)
+            ),
+        ).order_by(network_class.random_key)
+
+        pivot = random.random()
+        return (
+            available.filter(network_class.random_key >= pivot).first()
+            or available.first()
+        )
+
     def prioritize_networks(self, networks, participant, experiment):
         return networks
 
@@ -1877,10 +2327,16 @@ class ChainTrialMaker(NetworkTrialMaker):
         return query
 
     def exclude_participated(self, networks, participant):
+        # participated_networks is the source of truth: it lists the networks in which
+        # the participant has finalized a trial during the current visit to this trial maker.
+        # The IDs are passed as a single array parameter (``id <> ALL(:ids)``) rather than as
+        # a NOT IN list, so that the statement doesn't grow with the participant's history.
+        participated = participant.module_state.participated_networks
         query = networks.filter(
-            not_(
-                self.network_class.id.in_(
-                    participant.module_state.participated_networks
+            self.network_class.id
+            != all_(
+                bindparam(
+                    "participated_networks", list(participated), type_=ARRAY(Integer)
                 )
             )
         )
@@ -1890,7 +2346,7 @@ class ChainTrialMaker(NetworkTrialMaker):
         # )
         return query
 
-    @log_time_taken
+    @traced
     def grow_network(self, network, experiment):
         # We set participant = None because of Dallinger's constraint of not allowing participants
         # to create nodes after they have finished working.
@@ -1912,7 +2368,7 @@ class ChainTrialMaker(NetworkTrialMaker):
             return True
         return False
 
-    @log_time_taken
+    @traced
     def find_node(self, network, participant, experiment):
         return network.head
 
@@ -179,6 +179,13 @@ class DenseTrialMaker(StaticTrialMaker):
     end_performance_check_waits : bool
         If ``True`` (default), then the final performance check waits until all trials no
         longer have any pending asynchronous processes.
+
+    wake_on_notification : bool
+        If ``True``, the trial maker's built-in wait pages (e.g. waiting for feedback, for a trial,
+        or for trials that are awaiting further processing) advance as soon as the participant
+        receives a push notification (see :mod:`psynet.push`), for example when one of their
+        asynchronous processes finishes, rather than only when their check interval elapses.
+        Defaults to ``False``.
     """
 
     def __init__(
@@ -17,6 +17,7 @@ from sqlalchemy import (
     Column,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     and_,
@@ -35,14 +36,14 @@ from sqlalchemy.orm.collections import attribute_mapped_collection
 from psynet import field
 
 from ..asset import Asset, AssetNetwork, AssetNode, AssetTrial
-from ..data import SQLMixinDallinger
+from ..data import SQLMixinDallinger, defer_heavy_columns
 from ..error import (  # noqa  # Importing the error module is important to ensure sqlalchemy is happy
     ErrorRecord,
 )
 from ..field import PythonDict, PythonObject, VarStore
 from ..page import InfoPage, UnsuccessfulEndPage, WaitPage, wait_while
 from ..participant import Participant
-from ..process import WorkerAsyncProcess
+from ..process import AsyncProcess, WorkerAsyncProcess
 from ..sync import GroupBarrier, SyncGroup
 from ..timeline import (
     CodeBlock,
@@ -59,6 +60,7 @@ from ..timeline import (
     switch,
     while_loop,
 )
+from ..trace import traced
 from ..utils import (
     NoArgumentProvided,
     call_function,
@@ -66,7 +68,6 @@ from ..utils import (
     corr,
     get_logger,
     is_method_overridden,
-    log_time_taken,
 )
 
 logger = get_logger()
@@ -741,7 +742,11 @@ class Trial(SQLMixinDallinger, Info):
         return repeat_trial
 
     def check_if_can_mark_as_finalized(self):
-        if self.failed:
+        if self.finalized:
+            # This method may be called several times, e.g. after the answer is submitted
+            # and again after async_post_trial; on_finalized must only run once.
+            pass
+        elif self.failed:
             logger.info("Cannot mark as finalized because the trial is failed.")
         elif self.asset_deposit_pending:
             logger.info(
@@ -993,6 +998,9 @@ class Trial(SQLMixinDallinger, Info):
                     expected_wait=0,
                     log_message="Waiting for feedback to be ready.",
                     check_interval=1.0,
+                    wake_on_notification=(
+                        trial_maker.wake_on_notification if trial_maker else False
+                    ),
                 ),
                 PageMaker(
                     lambda experiment, participant: (
@@ -1023,6 +1031,13 @@ class Trial(SQLMixinDallinger, Info):
         )
 
 
+# Supports lookups of a participant's trials within a given trial maker,
+# e.g. TrialMaker.get_participant_trials.
+Index(
+    "ix_info_participant_id_trial_maker_id", Trial.participant_id, Trial.trial_maker_id
+)
+
+
 class TrialMakerState(ModuleState):
     participant_group = Column(String)
     in_repeat_phase = Column(Boolean)
@@ -1196,6 +1211,13 @@ class TrialMaker(Module):
         If ``True`` (default), then the final performance check waits until all trials no
         longer have any pending asynchronous processes.
 
+    wake_on_notification : bool
+        If ``True``, the trial maker's built-in wait pages (e.g. waiting for feedback, for a trial,
+        or for trials that are awaiting further processing) advance as soon as the participant
+        receives a push notification (see :mod:`psynet.push`), for example when one of their
+        asynchronous processes finishes, rather than only when their check interval elapses.
+        Defaults to ``False``.
+
     sync_group_type
         Optional SyncGroup type to use for synchronizing participant allocation to nodes.
         When this is set, then the ordinary node allocation logic will only apply to the 'leader'
@@ -1438,6 +1460,7 @@ class TrialMaker(Module):
     response_timeout_sec = 60 * 5
     async_timeout_sec = 300
     end_performance_check_waits = True
+    wake_on_notification = False
 
     def participant_fail_routine(self, participant, experiment):
         if (
@@ -1458,7 +1481,7 @@ class TrialMaker(Module):
     def check_timeout(self):
         # pylint: disable=no-member
         self.check_old_trials()
-        WorkerAsyncProcess.check_timeouts()
+        AsyncProcess.check_timeouts()
 
     def selected_recruit_criterion(self, experiment):
         if self.recruit_mode not in self.recruit_criteria:
@@ -1792,7 +1815,14 @@ class TrialMaker(Module):
         assert type in ["trial", "end"]
 
         def eval_checks(experiment, participant):
-            participant_trials = self.get_participant_trials(participant)
+            # The default performance check only looks at the trials' scores,
+            # but custom checks typically look at their answers too.
+            participant_trials = self.get_participant_trials(
+                participant,
+                load_heavy_columns=is_method_overridden(
+                    self, TrialMaker, "performance_check"
+                ),
+            )
             results = self.performance_check(
                 experiment=experiment,
                 participant=participant,
@@ -1837,6 +1867,7 @@ class TrialMaker(Module):
                     lambda participant: any_trials_awaiting_processing(participant),
                     expected_wait=5,
                     log_message="Waiting for remaining trials that are awaiting further processing.",
+                    wake_on_notification=self.wake_on_notification,
                 ),
                 logic,
             )
@@ -1852,7 +1883,15 @@ class TrialMaker(Module):
         )
         return [record[0] for record in records]
 
-    def get_participant_trials(self, participant):
+    def get_participant_trials(
+        self,
+        participant,
+        *,
+        finalized=None,
+        failed=None,
+        is_repeat_trial=None,
+        load_heavy_columns=False,
+    ):
         """
         Returns all trials (complete and incomplete) owned by the current participant,
         including repeat trials. Not intended for overriding.
@@ -1864,13 +1903,37 @@ class TrialMaker(Module):
             An instantiation of :class:`psynet.participant.Participant`,
             corresponding to the current participant.
 
-        """
-        all_participant_trials = self.trial_class.query.filter_by(
-            participant_id=participant.id
-        ).all()
-        return [t for t in all_participant_trials if t.trial_maker_id == self.id]
+        finalized:
+            If not ``None``, only returns trials whose ``finalized`` attribute equals this value.
+
+        failed:
+            If not ``None``, only returns trials whose ``failed`` attribute equals this value.
+
+        is_repeat_trial:
+            If not ``None``, only returns trials whose ``is_repeat_trial`` attribute equals this value.
 
-    @log_time_taken
+        load_heavy_columns:
+            If ``False`` (default), the trials' serialized columns (e.g. ``definition`` and ``answer``,
+            see :func:`psynet.data.defer_heavy_columns`) are only loaded once they are accessed,
+            which takes one query per trial. Set this to ``True`` if you are going to access them
+            for many trials.
+
+        """
+        query = self.trial_class.query.filter_by(
+            participant_id=participant.id, trial_maker_id=self.id
+        )
+        if not load_heavy_columns:
+            query = query.options(*defer_heavy_columns(self.trial_class))
+        for attribute, value in [
+            ("finalized", finalized),
+            ("failed", failed),
+            ("is_repeat_trial", is_repeat_trial),
+        ]:
+            if value is not None:
+                query = query.filter(getattr(self.trial_class, attribute) == value)
+        return query.order_by(self.trial_class.id).all()
+
+    @traced
     def _prepare_trial(self, experiment, participant, leader=None):
         if not participant.module_state.in_repeat_phase:
             if leader is None:
@@ -1921,7 +1984,12 @@ class TrialMaker(Module):
         return trial, trial_status
 
     def _init_trials_to_repeat(self, participant):
-        completed_trial_ids = [t.id for t in self.get_participant_trials(participant)]
+        completed_trial_ids = [
+            trial_id
+            for (trial_id,) in db.session.query(self.trial_class.id).filter_by(
+                participant_id=participant.id, trial_maker_id=self.id
+            )
+        ]
         actual_n_repeat_trials = min(len(completed_trial_ids), self.n_repeat_trials)
         participant.module_state.trials_to_repeat = random.sample(
             completed_trial_ids, actual_n_repeat_trials
@@ -2012,7 +2080,9 @@ class TrialMaker(Module):
                 lambda participant: participant.trial_status == "wait",
                 logic=join(
                     try_to_prepare_trial(),
-                    WaitPage(wait_time=2.0),
+                    WaitPage(
+                        wait_time=2.0, wake_on_notification=self.wake_on_notification
+                    ),
                 ),
                 expected_repetitions=0,
                 max_loop_time=self.max_time_waiting_for_trial,
@@ -2221,6 +2291,13 @@ class NetworkTrialMaker(TrialMaker):
         If ``True`` (default), then the final performance check waits until all trials no
         longer have any pending asynchronous processes.
 
+    wake_on_notification : bool
+        If ``True``, the trial maker's built-in wait pages (e.g. waiting for feedback, for a trial,
+        or for trials that are awaiting further processing) advance as soon as the participant
+        receives a push notification (see :mod:`psynet.push`), for example when one of their
+        asynchronous processes finishes, rather than only when their check interval elapses.
+        Defaults to ``False``.
+
     performance_threshold : float (default = -1.0)
         The performance threshold that is used in the
         :meth:`~psynet.trial.main.NetworkTrialMaker.performance_check` method.
@@ -2289,7 +2366,7 @@ class NetworkTrialMaker(TrialMaker):
         self.network_class = network_class
         self.wait_for_networks = wait_for_networks
 
-    @log_time_taken
+    @traced
     def prepare_trial(self, experiment, participant: Participant):
         logger.info("Preparing trial for participant %i.", participant.id)
 
@@ -2416,7 +2493,7 @@ class NetworkTrialMaker(TrialMaker):
         """
         raise NotImplementedError
 
-    @log_time_taken
+    @traced
     def _create_trial(self, node, participant, experiment):
         trial_class = self.get_trial_class(node, participant, experiment)
         if trial_class is None:
@@ -13,6 +13,8 @@ import os
 import re
 import sys
 import time
+import weakref
+from collections.abc import Mapping, MutableMapping, MutableSequence
 from datetime import datetime
 from functools import lru_cache, reduce, wraps
 from os.path import exists
@@ -93,7 +95,8 @@ def call_function(function, *args, **kwargs):
     Calls a function with ``*args`` and ``**kwargs``, but omits any ``**kwargs`` that are
     not requested explicitly.
     """
-    kwargs = {key: value for key, value in kwargs.items() if key in get_args(function)}
+    requested = _get_arg_names(function)
+    kwargs = {key: value for key, value in kwargs.items() if key in requested}
     return function(*args, **kwargs)
 
 
@@ -115,7 +118,6 @@ def find_git_repo():
 
 
 def call_function_with_context(function, *args, **kwargs):
-    from psynet.participant import Participant
     from psynet.trial.main import Trial
 
     participant = kwargs.get("participant", NoArgumentProvided)
@@ -125,7 +127,7 @@ def call_function_with_context(function, *args, **kwargs):
     trial_maker = kwargs.get("trial_maker", NoArgumentProvided)
     trial = kwargs.get("trial", NoArgumentProvided)
 
-    requested = get_args(function)
+    requested = _get_arg_names(function)
 
     if experiment == NoArgumentProvided:
         from .experiment import get_experiment
@@ -133,35 +135,13 @@ def call_function_with_context(function, *args, **kwargs):
         experiment = get_experiment()
 
     if "assets" in requested and assets == NoArgumentProvided:
-        from psynet.asset import Asset
-
-        # We initially query just assets that are not participant-specific.
-        # We will add participant-specific assets later, looking specifically at
-        # assets that are associated with the participant's module state.
-        assets = Asset.query.filter_by(participant_id=None)
-
-        if participant != NoArgumentProvided:
-            assert isinstance(participant, Participant)
-            participant_module_id = (
-                participant.module_state.module_id if participant.module_state else None
-            )
-            assets = assets.filter_by(module_id=participant_module_id)
-
-        assets = {asset.local_key: asset for asset in assets.all()}
-
-        if participant != NoArgumentProvided and participant.module_state:
-            assets.update(participant.module_state.assets)
+        assets = LazyAssets(
+            participant=None if participant == NoArgumentProvided else participant
+        )
 
     if participant != NoArgumentProvided and participant.module_state:
         if "nodes" in requested and nodes == NoArgumentProvided:
-            from psynet.trial.main import TrialNode
-
-            nodes = TrialNode.query.filter(
-                or_(
-                    TrialNode.module_id == participant.module_state.module_id,
-                    TrialNode.module_id.is_(None),
-                )
-            ).all()
+            nodes = LazyNodes(participant.module_state.module_id)
 
     if "trial" in requested and trial == NoArgumentProvided:
         if participant != NoArgumentProvided and isinstance(
@@ -189,6 +169,180 @@ def call_function_with_context(function, *args, **kwargs):
     return call_function(function, *args, **new_kwargs)
 
 
+class LazyAssets(MutableMapping):
+    """
+    The ``assets`` object provided to functions called via :func:`call_function_with_context`.
+    It behaves like a dictionary mapping ``local_key`` to :class:`~psynet.asset.Asset`,
+    comprising the assets that are not participant-specific
+    (restricted to the participant's current module, if a participant is provided),
+    overridden by any participant-specific assets in the participant's current module state.
+    Assets are only retrieved from the database once they are accessed,
+    and each asset is retrieved at most once.
+    It can be modified like a dictionary; the first modification loads all assets.
+    Modifications only affect this object, not the database.
+    """
+
+    def __init__(self, participant=None):
+        from psynet.participant import Participant
+
+        assert participant is None or isinstance(participant, Participant)
+
+        self.participant = participant
+        self.module_state = participant.module_state if participant else None
+        self._cache = {}
+        self._all = None
+
+    def _query(self):
+        from psynet.asset import Asset
+
+        # We initially query just assets that are not participant-specific.
+        # Participant-specific assets are taken from the participant's module state.
+        query = Asset.query.filter_by(participant_id=None)
+        if self.participant is not None:
+            query = query.filter_by(
+                module_id=self.module_state.module_id if self.module_state else None
+            )
+        return query
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+
+        if self._all is not None:
+            raise KeyError(key)
+
+        from psynet.asset import Asset
+
+        asset = None
+        if self.module_state:
+            asset = self.module_state.assets.get(key)
+        if asset is None:
+            asset = (
+                self._query().filter_by(local_key=key).order_by(Asset.id.desc()).first()
+            )
+        if asset is None:
+            raise KeyError(key)
+
+        self._cache[key] = asset
+        return asset
+
+    def _load_all(self):
+        if self._all is None:
+            from psynet.asset import Asset
+
+            assets = {
+                asset.local_key: asset
+                for asset in self._query().order_by(Asset.id).all()
+            }
+            if self.module_state:
+                assets.update(self.module_state.assets)
+            self._all = assets
+            self._cache = assets
+        return self._all
+
+    def __setitem__(self, key, value):
+        self._load_all()[key] = value
+
+    def __delitem__(self, key):
+        del self._load_all()[key]
+
+    def __iter__(self):
+        return iter(self._load_all())
+
+    def __len__(self):
+        return len(self._load_all())
+
+    def copy(self):
+        return dict(self._load_all())
+
+    def __repr__(self):
+        return f"LazyAssets(participant={self.participant!r})"
+
+
+class LazyNodes(MutableSequence):
+    """
+    The ``nodes`` object provided to functions called via :func:`call_function_with_context`.
+    It behaves like a list of the :class:`~psynet.trial.main.TrialNode` objects belonging
+    to the participant's current module (plus nodes that don't belong to any module),
+    but nodes are only loaded from the database when they are needed.
+    Use :meth:`get` or :meth:`filter_by` to retrieve particular nodes without loading
+    the full list.
+    It can be modified like a list (e.g. ``random.shuffle(nodes)`` or ``nodes.sort(...)``);
+    the first modification loads all nodes. Modifications only affect this object,
+    not the database or the results of :meth:`get` and :meth:`filter_by`.
+    """
+
+    def __init__(self, module_id):
+        self.module_id = module_id
+        self._by_id = {}
+        self._all = None
+
+    def query(self):
+        from psynet.trial.main import TrialNode
+
+        return TrialNode.query.filter(
+            or_(
+                TrialNode.module_id == self.module_id,
+                TrialNode.module_id.is_(None),
+            )
+        )
+
+    def get(self, id_):
+        """
+        Returns the node with the given ID, or ``None`` if no such node is available.
+        """
+        from psynet.trial.main import TrialNode
+
+        if id_ not in self._by_id:
+            self._by_id[id_] = self.query().filter(TrialNode.id == id_).one_or_none()
+        return self._by_id[id_]
+
+    def filter_by(self, **kwargs):
+        """
+        Returns a list of the nodes matching the provided column values.
+        """
+        return self.query().filter_by(**kwargs).all()
+
+    def _load_all(self):
+        if self._all is None:
+            from psynet.trial.main import TrialNode
+
+            self._all = self.query().order_by(TrialNode.id).all()
+            self._by_id.update({node.id: node for node in self._all})
+        return self._all
+
+    def __getitem__(self, index):
+        return self._load_all()[index]
+
+    def __setitem__(self, index, value):
+        self._load_all()[index] = value
+
+    def __delitem__(self, index):
+        del self._load_all()[index]
+
+    def insert(self, index, value):
+        self._load_all().insert(index, value)
+
+    def sort(self, *, key=None, reverse=False):
+        self._load_all().sort(key=key, reverse=reverse)
+
+    def copy(self):
+        return list(self._load_all())
+
+    def __len__(self):
+        if self._all is None:
+            return self.query().count()
+        return len(self._all)
+
+    def __iter__(self):
+        return iter(self._load_all())
+
+    def __repr__(self):
+        return f"LazyNodes(module_id={self.module_id!r})"
+
+
 config_defaults = {}
 
 
@@ -215,7 +369,38 @@ def get_from_config(key):
 
 
 def get_args(f):
-    return [str(x) for x in inspect.signature(f).parameters]
+    return list(_get_arg_names(f))
+
+
+# Argument names are looked up every time PsyNet calls a user-provided function
+# (code blocks, page makers, conditions, etc.), so we cache them per callable.
+# The caches hold weak references so that they don't keep callables alive.
+_arg_names_cache = weakref.WeakKeyDictionary()
+_method_arg_names_cache = weakref.WeakKeyDictionary()
+
+
+def _get_arg_names(f) -> tuple:
+    if inspect.ismethod(f):
+        # Bound methods are created afresh on every attribute access,
+        # so we key them by their underlying function instead.
+        cache, key = _method_arg_names_cache, f.__func__
+    else:
+        cache, key = _arg_names_cache, f
+
+    try:
+        return cache[key]
+    except (KeyError, TypeError):
+        pass
+
+    arg_names = tuple(str(x) for x in inspect.signature(f).parameters)
+
+    try:
+        cache[key] = arg_names
+    except TypeError:
+        # Some callables (e.g. builtins, unhashable objects) can't be weakly referenced.
+        pass
+
+    return arg_names
 
 
 def get_object_from_module(module_name: str, object_name: str):
@@ -614,27 +799,44 @@ def require_requirements_txt(f):
     return wrapper
 
 
-def _render_with_translations(
-    locale, template_name=None, template_string=None, all_template_args=None
-):
-    """Render a template with translations applied."""
-    from psynet.utils import get_config
+class _ConfigView(Mapping):
+    """
+    A read-only view of the non-sensitive config variables, passed to templates as ``config``.
+    Values are looked up on access, so we don't need to copy the whole config for every render.
+    """
 
-    if all_template_args is None:
-        all_template_args = {}
+    def __init__(self, config):
+        self._config = config
 
-    all_template_args["config"] = dict(get_config().as_dict().items())
+    def __getitem__(self, key):
+        if key not in self._config.types or key in self._config.sensitive:
+            raise KeyError(key)
+        return self._config.get(key)
 
-    assert [template_name, template_string].count(
-        None
-    ) == 1, "Only one of template_name or template_string should be provided."
+    def __iter__(self):
+        for key in self._config.types:
+            if key not in self._config.sensitive and key in self:
+                yield key
 
-    if locale is None:
-        locale = get_locale()
+    def __contains__(self, key):
+        try:
+            self[key]
+            return True
+        except KeyError:
+            return False
 
-    app = current_app._get_current_object()  # type: ignore[attr-defined]
-    gettext = get_translator()
-    pgettext = get_translator(context=True)
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+@lru_cache(maxsize=None)
+def _get_translation_environment(app, locale):
+    """
+    Returns a Jinja environment with translations installed for the given locale.
+    Environments are cached per Flask app (i.e. per worker process) and locale.
+    """
+    gettext = get_translator(namespace="psynet")
+    pgettext = get_translator(context=True, namespace="psynet")
 
     jinja_functions = {
         **app.jinja_env.globals,
@@ -652,10 +854,39 @@ def _render_with_translations(
 
     environment.globals.update(**jinja_functions)
 
+    return environment
+
+
+@lru_cache(maxsize=512)
+def _compile_template_string(environment, template_string):
+    return environment.from_string(template_string)
+
+
+def _render_with_translations(
+    locale, template_name=None, template_string=None, all_template_args=None
+):
+    """Render a template with translations applied."""
+    from psynet.utils import get_config
+
+    if all_template_args is None:
+        all_template_args = {}
+
+    all_template_args["config"] = _ConfigView(get_config())
+
+    assert [template_name, template_string].count(
+        None
+    ) == 1, "Only one of template_name or template_string should be provided."
+
+    if locale is None:
+        locale = get_locale()
+
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+    environment = _get_translation_environment(app, locale)
+
     if template_name is not None:
         template = environment.get_template(template_name)
     else:
-        template = environment.from_string(template_string)
+        template = _compile_template_string(environment, template_string)
     return _render(app, template, all_template_args)
 
 
@@ -821,37 +1052,6 @@ def get_translator(
         else:
             namespace = package_name
 
-    def _get_translators(locales_dir, locale, namespace):
-        if locales_dir is None:
-            locales_dir = get_locales_dir(namespace)
-
-        compile_mo_file_if_necessary(locales_dir, locale, namespace)
-
-        translator = gettext.translation(namespace, locales_dir, [locale])
-
-        if namespace not in REGISTERED_TRANSLATIONS:
-            REGISTERED_TRANSLATIONS[namespace] = {}
-
-        if locale not in REGISTERED_TRANSLATIONS[namespace]:
-            po_path = join_path(locales_dir, locale, "LC_MESSAGES", f"{namespace}.po")
-            po = load_po(po_path)
-            keys = []
-            for entry in po:
-                msgctxt = None if entry.msgctxt == "" else entry.msgctxt
-                keys.append((msgctxt, entry.msgid))
-            REGISTERED_TRANSLATIONS[namespace][locale] = keys
-
-        def _(message):
-            context = None
-            check_translation_is_available(message, context, locale, namespace)
-            return translator.gettext(message)
-
-        def _p(context, message):
-            check_translation_is_available(message, context, locale, namespace)
-            return translator.pgettext(context, message)
-
-        return _, _p
-
     if not in_deployment_package():
         if locale is None:
             # We cannot load translations when we're not in the deployment package and the locale cannot be identified
@@ -860,7 +1060,7 @@ def get_translator(
             _, _p = null_translator, null_translator_with_context
         else:
             # Provide translation when locale is specified
-            _, _p = _get_translators(locales_dir, locale, namespace)
+            _, _p = _get_registered_translators(locales_dir, locale, namespace)
     else:
         if locale is None:
             locale = get_locale()
@@ -869,7 +1069,7 @@ def get_translator(
             # Skill translation if English
             _, _p = null_translator, null_translator_with_context
         else:
-            _, _p = _get_translators(locales_dir, locale, namespace)
+            _, _p = _get_registered_translators(locales_dir, locale, namespace)
 
     _.namespace = namespace
     _p.namespace = namespace
@@ -883,6 +1083,93 @@ def get_translator(
         return _
 
 
+# Translators are expensive to construct (compiling .mo files, parsing .po files),
+# so we keep one pair of translators per (namespace, locale, locales_dir) for the lifetime
+# of the process. We periodically check the .po file's modification time so that
+# edited translations are still picked up.
+TRANSLATOR_MTIME_CHECK_INTERVAL = 5.0
+_TRANSLATOR_REGISTRY = {}
+
+
+def _get_registered_translators(locales_dir, locale, namespace):
+    key = (namespace, locale, str(locales_dir) if locales_dir else None)
+    entry = _TRANSLATOR_REGISTRY.get(key)
+    now = time.monotonic()
+
+    if entry is not None:
+        if now < entry["next_check"]:
+            return entry["translators"]
+        if os.path.getmtime(entry["po_path"]) == entry["po_mtime"]:
+            entry["next_check"] = now + TRANSLATOR_MTIME_CHECK_INTERVAL
+            return entry["translators"]
+        logger.info(f"Reloading modified translation file {entry['po_path']}.")
+
+    if locales_dir is None:
+        locales_dir = get_locales_dir(namespace)
+
+    po_path = join_path(locales_dir, locale, "LC_MESSAGES", f"{namespace}.po")
+    translators = _load_translators(locales_dir, locale, namespace)
+
+    _TRANSLATOR_REGISTRY[key] = {
+        "translators": translators,
+        "po_path": po_path,
+        "po_mtime": os.path.getmtime(po_path),
+        "next_check": now + TRANSLATOR_MTIME_CHECK_INTERVAL,
+    }
+    return translators
+
+
+def _load_translators(locales_dir, locale, namespace):
+    compile_mo_file_if_necessary(locales_dir, locale, namespace)
+
+    # We don't use gettext.translation here because it caches translations
+    # by file path, which would prevent modified translations from being reloaded.
+    mo_path = gettext.find(namespace, locales_dir, [locale])
+    if mo_path is None:
+        raise FileNotFoundError(
+            f"No translation file found for namespace = {namespace}, locale = {locale}."
+        )
+    with open(mo_path, "rb") as file:
+        translator = gettext.GNUTranslations(file)
+
+    po_path = join_path(locales_dir, locale, "LC_MESSAGES", f"{namespace}.po")
+    po = load_po(po_path)
+    keys = []
+    for entry in po:
+        msgctxt = None if entry.msgctxt == "" else entry.msgctxt
+        keys.append((msgctxt, entry.msgid))
+    REGISTERED_TRANSLATIONS.setdefault(namespace, {})[locale] = keys
+
+    def _(message):
+        context = None
+        check_translation_is_available(message, context, locale, namespace)
+        return translator.gettext(message)
+
+    def _p(context, message):
+        check_translation_is_available(message, context, locale, namespace)
+        return translator.pgettext(context, message)
+
+    return _, _p
+
+
+def preload_translators(locales, namespaces=("psynet", "experiment")):
+    """
+    Loads the translators for the provided locales and namespaces into the translator registry,
+    so that the first requests handled by a worker don't have to pay for loading them.
+    Combinations without a translation file are skipped.
+    """
+    for namespace in namespaces:
+        for locale in locales:
+            if locale == "en":
+                continue
+            try:
+                _get_registered_translators(None, locale, namespace)
+            except (FileNotFoundError, AssertionError, ModuleNotFoundError):
+                logger.debug(
+                    f"No translations found for namespace = {namespace}, locale = {locale}."
+                )
+
+
 def get_locales_dir(namespace: str):
     if namespace == "experiment":
         package_name = "dallinger_experiment"
@@ -0,0 +1,96 @@
+"""
+Benchmarks the ways of excluding the networks a participant has already visited
+in ChainTrialMaker.exclude_participated, against the PostgreSQL test database.
+
+Run with::
+
+    pytest tests/benchmarks/benchmark_exclude_participated.py -s
+
+The benchmark inserts ``N_NETWORKS`` open networks, marks the first ``n`` of them
+as participated, and times picking one of the remaining networks:
+
+* ``NOT IN (list)``: a NOT IN filter with one bind parameter per participated network
+  (the implementation before ``<> ALL``);
+* ``<> ALL (array)``: the current implementation, passing the participated networks
+  as a single array parameter.
+
+The picked network is the first in ``random_key`` order, as in
+ChainTrialMaker._pick_from_registry.
+"""
+
+import time
+
+import pytest
+from dallinger import db
+from sqlalchemy import not_, text
+
+from psynet.pytest_psynet import path_to_test_experiment
+from psynet.trial.chain import ChainNetwork
+
+N_NETWORKS = 20000
+N_PARTICIPATED = [10, 100, 1000, 5000]
+N_REPETITIONS = 20
+
+
+def time_query(query):
+    start = time.perf_counter()
+    for _ in range(N_REPETITIONS):
+        query.first()
+    return (time.perf_counter() - start) / N_REPETITIONS * 1000
+
+
+@pytest.mark.usefixtures("in_experiment_directory")
+@pytest.mark.parametrize(
+    "experiment_directory", [path_to_test_experiment("gibbs")], indirect=True
+)
+def test_benchmark_exclude_participated(db_session):
+    from psynet.trial.chain import ChainTrialMaker
+
+    db.session.bulk_insert_mappings(
+        ChainNetwork,
+        [
+            dict(
+                type=ChainNetwork.__mapper__.polymorphic_identity,
+                trial_maker_id="benchmark",
+                participant_group="default",
+                block="default",
+                full=False,
+                failed=False,
+            )
+            for _ in range(N_NETWORKS)
+        ],
+    )
+    network_ids = [
+        id_
+        for (id_,) in db.session.query(ChainNetwork.id)
+        .filter_by(trial_maker_id="benchmark")
+        .order_by(ChainNetwork.id)
+    ]
+    db.session.commit()
+    db.session.execute(text("ANALYZE network"))
+
+    class State:
+        participated_networks = []
+
+    class Participant:
+        module_state = State()
+
+    trial_maker = object.__new__(ChainTrialMaker)
+    trial_maker.network_class = ChainNetwork
+    networks = ChainNetwork.query.filter_by(
+        trial_maker_id="benchmark", full=False, failed=False
+    ).with_entities(ChainNetwork.id)
+
+    print()
+    print(f"{N_NETWORKS} open networks, time per pick (ms)")
+    print("participated   NOT IN (list)   <> ALL (array)")
+    for n in N_PARTICIPATED:
+        participated = network_ids[:n]
+        Participant.module_state.participated_networks = participated
+        not_in = networks.filter(not_(ChainNetwork.id.in_(participated)))
+        not_all = trial_maker.exclude_participated(networks, Participant)
+        times = [
+            time_query(query.order_by(ChainNetwork.random_key))
+            for query in [not_in, not_all]
+        ]
+        print(f"{n:12}   " + "   ".join(f"{t:13.1f}" for t in times))
@@ -0,0 +1,157 @@
+"""
+Benchmarks Timeline.advance_page on a timeline with many control-flow constructs.
+
+Run with::
+
+    pytest tests/benchmarks/benchmark_timeline.py -s
+
+The timeline contains ``N_CONSTRUCTS`` while loops and ``N_CONSTRUCTS`` conditionals,
+all of whose conditions are false, between a first and a last page. Each measurement
+advances a participant from the first page to the last page and reports the median
+over ``N_REPETITIONS`` runs. Each benchmark compares the current implementation with
+a version in which the optimization in question is disabled:
+
+* the top-level jump table (``Timeline.jump_table``), disabled by replacing it
+  with the identity mapping;
+* the cache of callable signatures used by ``call_function`` and
+  ``call_function_with_context``, disabled by inspecting the signature on every call.
+
+No database is needed.
+"""
+
+import inspect
+import statistics
+import time
+
+from psynet import utils
+from psynet.page import InfoPage
+from psynet.timeline import Timeline, conditional, while_loop
+
+N_CONSTRUCTS = 300
+N_REPETITIONS = 30
+
+
+class MockExperiment:
+    def make_uuid(self):
+        return "uuid"
+
+
+class MockVarStore(dict):
+    def set(self, key, value):
+        self[key] = value
+
+    def get(self, key, default=None):
+        return super().get(key, default)
+
+
+class MockParticipant:
+    def __init__(self, timeline, id_):
+        self.id = id_
+        self.elt_id = [-1]
+        self.elt_id_max = [len(timeline) - 1]
+        self.page_uuid = None
+        self.page_count = 0
+        self.progress = 0.0
+        self.progress_fixes = []
+        self.estimated_max_time_credit = 10.0
+        self.module_state = None
+        self.var = MockVarStore()
+        self.branch_log = []
+
+    def append_branch_log(self, entry):
+        self.branch_log.append(entry)
+
+
+def make_timeline():
+    return Timeline(
+        InfoPage("First page", time_estimate=1),
+        *[
+            while_loop(
+                f"loop_{i}",
+                lambda participant: False,
+                InfoPage("Loop page", time_estimate=1),
+                expected_repetitions=1,
+                fix_time_credit=False,
+            )
+            for i in range(N_CONSTRUCTS)
+        ],
+        *[
+            conditional(
+                f"conditional_{i}",
+                lambda participant: False,
+                InfoPage("Conditional page", time_estimate=1),
+            )
+            for i in range(N_CONSTRUCTS)
+        ],
+        InfoPage("Last page", time_estimate=1),
+    )
+
+
+def measure(timeline, monkeypatch):
+    """
+    Returns the median time (in seconds) taken to advance from the first page to the last page,
+    and the number of timeline elements visited in doing so.
+    """
+    experiment = MockExperiment()
+    n_visited = 0
+    original_get_current_elt = Timeline.get_current_elt
+
+    def get_current_elt(self, experiment, participant):
+        nonlocal n_visited
+        n_visited += 1
+        return original_get_current_elt(self, experiment, participant)
+
+    times = []
+    for i in range(N_REPETITIONS):
+        participant = MockParticipant(timeline, id_=i)
+        timeline.advance_page(experiment, participant)
+        assert timeline.get_current_elt(experiment, participant).content == "First page"
+
+        with monkeypatch.context() as m:
+            m.setattr(Timeline, "get_current_elt", get_current_elt)
+            n_visited = 0
+            start = time.perf_counter()
+            page = timeline.advance_page(experiment, participant)
+            times.append(time.perf_counter() - start)
+
+        assert page.content == "Last page"
+
+    return statistics.median(times), n_visited
+
+
+def test_benchmark_jump_table(monkeypatch):
+    timeline = make_timeline()
+    with_table = measure(timeline, monkeypatch)
+
+    monkeypatch.setattr(timeline, "jump_table", list(range(len(timeline))))
+    without_table = measure(timeline, monkeypatch)
+
+    print()
+    print(f"Timeline of {len(timeline)} elements, advancing from first to last page")
+    print("                  elements visited   median time (s)")
+    for label, (seconds, n_visited) in [
+        ("no jump table", without_table),
+        ("jump table", with_table),
+    ]:
+        print(f"{label:16}  {n_visited:16}   {seconds:15.3f}")
+
+
+def test_benchmark_signature_cache(monkeypatch):
+    timeline = make_timeline()
+    with_cache = measure(timeline, monkeypatch)
+
+    monkeypatch.setattr(
+        utils,
+        "_get_arg_names",
+        lambda f: tuple(str(x) for x in inspect.signature(f).parameters),
+    )
+    without_cache = measure(timeline, monkeypatch)
+
+    print()
+    print(f"Timeline of {len(timeline)} elements, advancing from first to last page")
+    print("                    median time (s)")
+    for label, (seconds, _) in [
+        ("no signature cache", without_cache),
+        ("signature cache", with_cache),
+    ]:
+        print(f"{label:18}  {seconds:15.3f}")
@@ -0,0 +1,51 @@
+"""
+Benchmarks the write amplification of setting a single variable with
+``python_object_storage = jsonb``.
+
+Run with::
+
+    pytest tests/benchmarks/benchmark_var_patches.py -s
+
+For ``vars`` holding ``n`` small dictionary entries, the benchmark compares what
+is sent to the database when one variable changes:
+
+* ``full column``: the whole ``vars`` document, as written when the column is flagged as modified;
+* ``JSONB patch``: the single-key document merged in by ``VarStore`` patches
+  (see ``psynet.field.build_var_patch_statement``).
+
+It reports the size of the JSON parameter and the median time taken to encode it.
+No database is needed.
+"""
+
+import json
+import statistics
+import time
+
+from psynet.field import encode_jsonb
+
+N_ENTRIES = [100, 500]
+N_REPETITIONS = 200
+
+
+def measure(document):
+    times = []
+    for _ in range(N_REPETITIONS):
+        start = time.perf_counter()
+        encoded = json.dumps(encode_jsonb(document))
+        times.append(time.perf_counter() - start)
+    return len(encoded.encode()), statistics.median(times)
+
+
+def test_benchmark_var_patches():
+    print()
+    print("entries   full column (B, us)   JSONB patch (B, us)")
+    for n in N_ENTRIES:
+        vars_ = {f"var_{i}": {"value": i, "label": f"Label {i}"} for i in range(n)}
+        vars_["counter"] = 1
+
+        full_bytes, full_time = measure(vars_)
+        patch_bytes, patch_time = measure({"counter": 2})
+        print(
+            f"{n:7}   {full_bytes:8} {full_time * 1e6:10.1f}"
+            f"   {patch_bytes:8} {patch_time * 1e6:8.1f}"
+        )
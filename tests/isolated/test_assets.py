@@ -257,6 +257,41 @@ def test_access_assets(
         assert t.assets["trial_asset"].export_path.endswith(".txt")
 
 
+@pytest.mark.usefixtures("in_experiment_directory")
+@pytest.mark.parametrize(
+    "experiment_directory", [path_to_test_experiment("static")], indirect=True
+)
+def test_lazy_assets(db_session, debug_storage, deployment_info):
+    from psynet.utils import LazyAssets, call_function_with_context
+
+    with tempfile.NamedTemporaryFile("w", suffix=".txt") as f:
+        f.write("Hello!")
+        f.flush()
+
+        asset = ExperimentAsset(local_key="lazy_asset", input_path=f.name)
+        asset.deposit(debug_storage)
+
+    db.session.commit()
+
+    assets = call_function_with_context(lambda assets: assets)
+    assert isinstance(assets, LazyAssets)
+    assert assets["lazy_asset"] == asset
+    assert "lazy_asset" in assets
+    assert "missing_asset" not in assets
+    with pytest.raises(KeyError):
+        assets["missing_asset"]
+    assert dict(assets)["lazy_asset"] == asset
+
+    assets = call_function_with_context(lambda assets: assets)
+    assets["extra_asset"] = asset
+    assert assets["extra_asset"] == asset
+    assert assets["lazy_asset"] == asset
+    del assets["lazy_asset"]
+    assert "lazy_asset" not in assets
+    unchanged = call_function_with_context(lambda assets: assets)
+    assert set(assets) == set(unchanged) - {"lazy_asset"} | {"extra_asset"}
+
+
 # Test function asset - cached
 def placeholder_function(path, param):
     with open(path, "w") as f:
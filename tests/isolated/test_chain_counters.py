@@ -0,0 +1,95 @@
+import pytest
+from dallinger import db
+from sqlalchemy import text
+
+from psynet.bot import BotDriver
+from psynet.command_line import _schema_upgrade_statements
+from psynet.pytest_psynet import path_to_test_experiment
+from psynet.trial.chain import (
+    ChainNode,
+    get_chain_registry_repair_statements,
+    get_trial_counter_repair_statements,
+)
+
+
+@pytest.mark.parametrize(
+    "experiment_directory", [path_to_test_experiment("gibbs")], indirect=True
+)
+@pytest.mark.usefixtures("launched_experiment")
+class TestChainCounters:
+    def test_trial_counters(self):
+        bot = BotDriver()
+        for _ in range(4):
+            bot.take_page()
+
+        db.session.expire_all()
+        nodes = ChainNode.query.all()
+        assert sum(node.n_viable_trials for node in nodes) > 0
+        for node in nodes:
+            assert node.n_viable_trials == len(node.viable_trials)
+            assert node.n_completed_and_processed_trials == len(
+                node.completed_and_processed_trials
+            )
+
+        check, repair = get_trial_counter_repair_statements()
+        assert db.session.execute(check).all() == []
+
+        node = nodes[0]
+        expected = node.n_viable_trials
+        node.n_viable_trials = expected + 5
+        db.session.commit()
+
+        inconsistent = db.session.execute(check).all()
+        assert [row[0] for row in inconsistent] == [node.id]
+
+        db.session.execute(repair)
+        db.session.commit()
+        assert db.session.execute(check).all() == []
+        assert node.n_viable_trials == expected
+
+    def test_schema_upgrade(self):
+        bot = BotDriver()
+        for _ in range(4):
+            bot.take_page()
+
+        # Simulate a database created before these columns were introduced.
+        db.session.commit()
+        for statement in [
+            "ALTER TABLE network DROP COLUMN head_degree",
+            "ALTER TABLE network DROP COLUMN head_n_viable_trials",
+            "ALTER TABLE network DROP COLUMN random_key",
+            "ALTER TABLE node DROP COLUMN n_viable_trials",
+            "ALTER TABLE node DROP COLUMN n_completed_and_processed_trials",
+        ]:
+            db.session.execute(text(statement))
+        db.session.commit()
+
+        # The upgrade can safely be run more than once.
+        for _ in range(2):
+            for statement in _schema_upgrade_statements(db.Base.metadata):
+                db.session.execute(text(statement))
+            db.session.commit()
+
+        indexes = {
+            row[0]
+            for row in db.session.execute(
+                text("SELECT indexname FROM pg_indexes WHERE tablename = 'network'")
+            )
+        }
+        assert {"ix_network_registry", "ix_network_registry_balanced"} <= indexes
+
+        statements = [
+            get_trial_counter_repair_statements(),
+            get_chain_registry_repair_statements(),
+        ]
+        for _, repair in statements:
+            db.session.execute(repair)
+        db.session.commit()
+        for check, _ in statements:
+            assert db.session.execute(check).all() == []
+
+        db.session.expire_all()
+        nodes = ChainNode.query.all()
+        assert sum(node.n_viable_trials for node in nodes) > 0
+        for node in nodes:
+            assert node.n_viable_trials == len(node.viable_trials)
@@ -0,0 +1,32 @@
+import pytest
+
+from psynet.bot import BotDriver
+from psynet.experiment import get_trial_maker
+from psynet.pytest_psynet import path_to_test_experiment
+from psynet.query_counter import count_queries
+
+
+@pytest.mark.parametrize(
+    "experiment_directory", [path_to_test_experiment("gibbs")], indirect=True
+)
+@pytest.mark.usefixtures("launched_experiment")
+class TestChainRecruitment:
+    def test_n_trials_still_required(self):
+        trial_maker = get_trial_maker("gibbs_demo")
+
+        def expected():
+            return sum(
+                network.n_trials_still_required for network in trial_maker.networks
+            )
+
+        with count_queries() as counter:
+            n_trials_still_required = trial_maker.n_trials_still_required
+        assert counter.n_queries == 1
+        assert n_trials_still_required == expected() == 8 * 2 * 2
+
+        bot = BotDriver()
+        for _ in range(4):
+            bot.take_page()
+
+        assert trial_maker.n_trials_still_required == expected()
+        assert trial_maker.n_trials_still_required < 8 * 2 * 2
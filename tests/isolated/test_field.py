@@ -0,0 +1,162 @@
+import json
+
+import pytest
+from sqlalchemy import Column
+from sqlalchemy.dialects import postgresql, sqlite
+
+from psynet import field
+from psynet.field import (
+    PythonClass,
+    PythonDict,
+    PythonObject,
+    decode_python_object,
+    encode_python_object,
+    is_plain_json,
+)
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def __eq__(self, other):
+        return (self.x, self.y) == (other.x, other.y)
+
+
+def test_is_plain_json():
+    assert is_plain_json({"a": [1, 2.5, "x", None, True], "b": {"c": []}})
+    assert not is_plain_json({"a": (1, 2)})
+    assert not is_plain_json({1: "a"})
+    assert not is_plain_json({"a": float("nan")})
+    assert not is_plain_json({"a": Point(1, 2)})
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"a": [1, 2.5, "x", None, True]},
+        "hello",
+        [1, (2, 3)],
+        {"point": Point(1, 2), "points": [Point(3, 4)]},
+        float("inf"),
+    ],
+)
+def test_codec_round_trip(value):
+    assert decode_python_object(encode_python_object(value)) == value
+
+
+def test_plain_values_bypass_jsonpickle():
+    value = {"a": [1, 2, 3], "b": "c"}
+    assert encode_python_object(value) == json.dumps(value)
+
+
+def test_jsonb_storage(monkeypatch):
+    monkeypatch.setattr(field, "get_python_object_storage", lambda: "jsonb")
+    column_type = PythonObject()
+    dialect = postgresql.dialect()
+
+    plain = {"a": [1, 2]}
+    assert column_type.process_bind_param(plain, dialect) == plain
+    assert column_type.process_result_value(plain, dialect) == plain
+
+    point = Point(1, 2)
+    stored = column_type.process_bind_param(point, dialect)
+    assert set(stored) == {field.JSONPICKLE_KEY}
+    assert column_type.process_result_value(stored, dialect) == point
+
+    # Other dialects and non-JSON types keep using text storage.
+    assert column_type.process_bind_param(plain, sqlite.dialect()) == json.dumps(plain)
+    assert not PythonClass().uses_jsonb(dialect)
+
+
+def test_text_storage_reads_jsonb_wrapper():
+    wrapped = json.dumps({field.JSONPICKLE_KEY: encode_python_object(Point(1, 2))})
+    assert decode_python_object(wrapped) == Point(1, 2)
+
+
+def test_python_dict_sanitizes_mutable_dict():
+    column_type = PythonDict
+    value = column_type.process_bind_param({"a": 1}, sqlite.dialect())
+    assert value == '{"a": 1}'
+
+
+def test_var_patch_statement():
+    from sqlalchemy import Integer
+    from sqlalchemy.orm import declarative_base
+
+    from psynet.field import build_var_patch_statement
+
+    Base = declarative_base()
+
+    class Owner(Base):
+        __tablename__ = "owner"
+        id = Column(Integer, primary_key=True)
+        vars = Column(PythonDict)
+
+    owner = Owner(id=3, vars={f"var_{i}": i for i in range(500)})
+    statement = build_var_patch_statement(owner, {"var_0": Point(1, 2)})
+    compiled = statement.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+
+    assert "vars || CAST(%(patch)s AS JSONB)" in sql
+    assert "owner.id = %(id_1)s" in sql
+    assert "NOT (owner.vars ? %(param_1)s)" in sql
+    assert compiled.params["id_1"] == 3
+    assert compiled.params["param_1"] == field.JSONPICKLE_KEY
+
+    patch = json.loads(compiled.params["patch"])
+    assert list(patch) == ["var_0"]
+    assert decode_python_object(patch) == {"var_0": Point(1, 2)}
+
+
+def test_encode_jsonb_wraps_dict_values_separately():
+    stored = field.encode_jsonb({"a": 1, "b": Point(1, 2)})
+    assert stored["a"] == 1
+    assert set(stored["b"]) == {field.JSONPICKLE_KEY}
+    assert decode_python_object(stored) == {"a": 1, "b": Point(1, 2)}
+    assert decode_python_object(json.dumps(stored)) == {"a": 1, "b": Point(1, 2)}
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["yes", "123", "true", "null", "", [1, "2", None], {"a": "1.5"}, 1.5, True],
+)
+def test_jsonb_round_trip(monkeypatch, value):
+    monkeypatch.setattr(field, "get_python_object_storage", lambda: "jsonb")
+    column_type = PythonObject()
+    dialect = postgresql.dialect()
+
+    # psycopg2 returns JSONB documents already parsed from JSON.
+    stored = json.loads(json.dumps(column_type.process_bind_param(value, dialect)))
+    result = column_type.process_result_value(stored, dialect)
+    assert result == value
+    assert type(result) is type(value)
+
+
+def test_jsonb_round_trip_none(monkeypatch):
+    monkeypatch.setattr(field, "get_python_object_storage", lambda: "jsonb")
+    column_type = PythonObject()
+    dialect = postgresql.dialect()
+    assert column_type.process_bind_param(None, dialect) is None
+    assert column_type.process_result_value(None, dialect) is None
+
+
+@pytest.mark.parametrize(
+    "text, matches",
+    [
+        ("NaN", True),
+        ("-Infinity", True),
+        ('{"a": NaN}', True),
+        ("[1, Infinity, 2]", True),
+        ('"Infinity War"', False),
+        ('{"film": "Infinity War", "score": "NaN-free"}', False),
+        ('["NaN"]', False),
+    ],
+)
+def test_non_finite_json_number_pattern(text, matches):
+    import re
+
+    from psynet.command_line import NON_FINITE_JSON_NUMBER_PATTERN
+
+    assert bool(re.search(NON_FINITE_JSON_NUMBER_PATTERN, text)) == matches
@@ -0,0 +1,345 @@
+import pytest
+from dallinger import db
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from psynet.bot import BotDriver
+from psynet.experiment import get_experiment, get_trial_maker
+from psynet.participant import Participant
+from psynet.pytest_psynet import path_to_test_experiment
+from psynet.query_counter import count_queries
+from psynet.trial import chain
+from psynet.trial.chain import ChainTrialMaker, get_chain_registry_repair_statements
+
+
+@pytest.mark.parametrize(
+    "experiment_directory",
+    [path_to_test_experiment("imitation_chain_accumulated")],
+    indirect=True,
+)
+@pytest.mark.usefixtures("launched_experiment")
+class TestFindNetworks:
+    def test_find_networks_does_not_load_definitions(self):
+        bot = BotDriver()
+        bot.take_page()  # Info page
+        bot.take_page()  # First trial, which creates the participant's chain
+
+        experiment = get_experiment()
+        trial_maker = get_trial_maker("imitation_demo")
+        participant = Participant.query.get(bot.id)
+        db.session.expire_all()
+
+        with count_queries() as counter:
+            trial_maker.find_networks(participant, experiment)
+
+        network_queries = [
+            statement
+            for statement, _ in counter.queries
+            if "FROM network" in statement or "FROM node" in statement
+        ]
+        assert len(network_queries) > 0
+        for statement in network_queries:
+            assert ".definition" not in statement
+            assert ".answer" not in statement
+            assert ".context" not in statement
+
+    def test_exclude_participated(self):
+        bot = BotDriver()
+        bot.take_page()  # Info page
+        bot.take_page()  # First trial
+
+        trial_maker = get_trial_maker("imitation_demo")
+        participant = Participant.query.get(bot.id)
+        state = participant.module_state
+        trial_class = trial_maker.trial_class
+
+        (visited,) = state.participated_networks
+        networks = trial_maker.network_class.query.filter_by(
+            trial_maker_id=trial_maker.id
+        )
+        all_networks = {network.id for network in networks}
+
+        def available():
+            query = trial_maker.exclude_participated(networks, participant)
+            assert "ALL (" in str(query)
+            return {network.id for network in query}
+
+        assert available() == all_networks - {visited}
+
+        # Trials that haven't been finalized yet don't count as participation.
+        pending = {
+            trial.network_id
+            for trial in trial_class.query.filter_by(
+                participant_id=participant.id, finalized=False
+            )
+        }
+        assert pending - {visited} <= available()
+
+        # Failing a finalized trial doesn't make its network available again.
+        for trial in trial_class.query.filter_by(
+            participant_id=participant.id, network_id=visited
+        ):
+            trial.fail(reason="test")
+        assert available() == all_networks - {visited}
+
+        # The participant's module state is the source of truth.
+        state.participated_networks = []
+        assert available() == all_networks
+
+        db.session.rollback()
+
+
+@pytest.mark.parametrize(
+    "experiment_directory", [path_to_test_experiment("gibbs")], indirect=True
+)
+@pytest.mark.usefixtures("launched_experiment")
+class TestChooseNetworkInSql:
+    def test_matches_python_implementation(self, monkeypatch):
+        for _ in range(3):
+            BotDriver().take_experiment()
+        bot = BotDriver()
+        bot.take_page()  # Participant group
+        bot.take_page()  # First trial
+
+        experiment = get_experiment()
+        trial_maker = get_trial_maker("gibbs_demo")
+        # The demo customizes the network choice, which rules out choosing in SQL.
+        for method in ["custom_network_filter", "prioritize_networks"]:
+            monkeypatch.setattr(
+                type(trial_maker), method, getattr(ChainTrialMaker, method)
+            )
+        assert trial_maker.choose_network_in_sql
+
+        participant = Participant.query.get(bot.id)
+        state = participant.module_state
+        networks = (
+            trial_maker.network_class.query.filter_by(trial_maker_id=trial_maker.id)
+            .order_by(trial_maker.network_class.id)
+            .all()
+        )
+        for i, network in enumerate(networks):
+            network.block = ["b1", "b2", "b3"][i % 3]
+
+        def find_networks(in_sql):
+            monkeypatch.setattr(type(trial_maker), "choose_network_in_sql", in_sql)
+            return trial_maker.find_networks(participant, experiment)
+
+        def rank(outcome):
+            # Ties between equally ranked networks are broken at random,
+            # so we compare the rank of the chosen network rather than its identity.
+            if isinstance(outcome, str):
+                return outcome
+            (network,) = outcome
+            key = [state.remaining_blocks.index(network.block)]
+            if trial_maker.balance_across_chains:
+                key += [network.head.degree, network.n_viable_trials_at_head]
+            return key
+
+        outcomes = []
+        for block_order, block_position, balance_across_chains in [
+            (["b1", "b2", "b3"], 0, True),
+            (["b3", "b1", "b2"], 1, True),
+            (["b2", "b3", "b1"], 0, False),
+            (["b1", "b2", "b3"], 2, False),
+            (["b1", "b2", "b3", "b4"], 3, True),  # No networks in the remaining block
+            (["b1"], 1, True),  # No remaining blocks
+        ]:
+            state.block_order = block_order
+            state.block_position = block_position
+            state.block = block_order[min(block_position, len(block_order) - 1)]
+            monkeypatch.setattr(
+                trial_maker, "balance_across_chains", balance_across_chains
+            )
+
+            with count_queries() as counter:
+                outcome_sql = find_networks(in_sql=True)
+            network_queries = [
+                statement
+                for statement, _ in counter.queries
+                if statement.startswith("SELECT") and "FROM network" in statement
+            ]
+            # At most three index lookups per remaining block, plus the wait/exit check.
+            assert len(network_queries) <= 3 * len(set(block_order)) + 1
+
+            outcome_python = find_networks(in_sql=False)
+            assert rank(outcome_sql) == rank(outcome_python)
+            outcomes.append(outcome_sql)
+
+        assert any(isinstance(outcome, list) for outcome in outcomes)
+        assert "exit" in outcomes
+
+        # Networks without a head still count as candidates, so the participant waits.
+        state.block_order = ["b1", "b2", "b3"]
+        state.set_block_position(0)
+        for network in networks:
+            network.head = None
+        assert find_networks(in_sql=True) == find_networks(in_sql=False) == "wait"
+
+        db.session.rollback()
+
+
+@pytest.mark.parametrize(
+    "experiment_directory", [path_to_test_experiment("gibbs")], indirect=True
+)
+@pytest.mark.usefixtures("launched_experiment")
+class TestChainRegistry:
+    @pytest.fixture
+    def trial_maker(self, monkeypatch):
+        trial_maker = get_trial_maker("gibbs_demo")
+        for method in ["custom_network_filter", "prioritize_networks"]:
+            monkeypatch.setattr(
+                type(trial_maker), method, getattr(ChainTrialMaker, method)
+            )
+        return trial_maker
+
+    def get_networks(self, trial_maker, n):
+        network_class = trial_maker.network_class
+        networks = (
+            network_class.query.filter_by(
+                trial_maker_id=trial_maker.id, full=False, failed=False
+            )
+            .filter(network_class.head_id.isnot(None))
+            .order_by(network_class.id)
+            .limit(n)
+            .all()
+        )
+        assert len(networks) == n
+        return networks
+
+    def test_registry_tracks_head(self, trial_maker):
+        for _ in range(2):
+            BotDriver().take_experiment()
+        bot = BotDriver()
+        bot.take_page()  # Participant group
+        bot.take_page()  # First trial, not yet finalized
+
+        db.session.expire_all()
+        networks = trial_maker.network_class.query.filter_by(
+            trial_maker_id=trial_maker.id
+        ).all()
+        assert sum(network.head_n_viable_trials or 0 for network in networks) > 0
+        for network in networks:
+            assert network.random_key is not None
+            assert network.head_degree == network.head.degree
+            assert network.head_n_viable_trials == network.head.n_viable_trials
+
+        check, repair = get_chain_registry_repair_statements()
+        assert db.session.execute(check).all() == []
+
+        network = networks[0]
+        expected = network.head_n_viable_trials
+        network.head_n_viable_trials = expected + 3
+        network.random_key = None
+        db.session.commit()
+        assert [row[0] for row in db.session.execute(check).all()] == [network.id]
+
+        db.session.execute(repair)
+        db.session.commit()
+        assert db.session.execute(check).all() == []
+        assert network.head_n_viable_trials == expected
+        assert network.random_key is not None
+
+    def test_picks_preferred_network(self, trial_maker, monkeypatch):
+        bot = BotDriver()
+        bot.take_page()  # Participant group
+        participant = Participant.query.get(bot.id)
+        state = participant.module_state
+        state.block_order = ["x"]
+        state.set_block_position(0)
+
+        networks = self.get_networks(trial_maker, 3)
+        for network, random_key in zip(networks, [0.2, 0.5, 0.8]):
+            network.block = "x"
+            network.trials_per_node = 3
+            network.head_degree = 1
+            network.head_n_viable_trials = 0
+            network.random_key = random_key
+        db.session.flush()
+
+        network_class = trial_maker.network_class
+        candidates = network_class.query.filter(
+            network_class.id.in_([network.id for network in networks])
+        )
+
+        def choose(pivot):
+            monkeypatch.setattr(chain.random, "random", lambda: pivot)
+            outcome = trial_maker._choose_network_in_sql(candidates, participant)
+            if isinstance(outcome, str):
+                return outcome
+            (network,) = outcome
+            return networks.index(network)
+
+        # Ties are broken by the first random key after the pivot, wrapping around.
+        monkeypatch.setattr(trial_maker, "balance_across_chains", True)
+        assert [choose(pivot) for pivot in [0.1, 0.3, 0.6, 0.9]] == [0, 1, 2, 0]
+
+        # Balancing prefers the head with the lowest degree, then the fewest viable trials.
+        networks[0].head_n_viable_trials = 1
+        networks[2].head_degree = 0
+        networks[2].head_n_viable_trials = 1
+        db.session.flush()
+        assert choose(0.1) == 2
+        networks[2].head_degree = 1
+        db.session.flush()
+        assert choose(0.1) == 1
+        assert choose(0.9) == 1
+
+        # Without balancing, any network with head space may be chosen.
+        monkeypatch.setattr(trial_maker, "balance_across_chains", False)
+        assert choose(0.1) == 0
+
+        # Networks whose head is full or that are awaiting async processes are skipped.
+        networks[0].head_n_viable_trials = networks[0].trials_per_node
+        networks[1].async_post_grow_network_requested = True
+        networks[1].async_post_grow_network_complete = False
+        networks[1].async_post_grow_network_failed = False
+        db.session.flush()
+        assert choose(0.1) == 2
+
+        networks[2].head_n_viable_trials = networks[2].trials_per_node
+        db.session.flush()
+        monkeypatch.setattr(trial_maker, "wait_for_networks", True)
+        assert choose(0.1) == "wait"
+        monkeypatch.setattr(trial_maker, "wait_for_networks", False)
+        assert choose(0.1) == "exit"
+
+        db.session.rollback()
+
+    @pytest.mark.parametrize("balance_across_chains", [True, False])
+    def test_pick_uses_registry_index(
+        self, trial_maker, monkeypatch, balance_across_chains
+    ):
+        network_class = trial_maker.network_class
+        monkeypatch.setattr(trial_maker, "balance_across_chains", balance_across_chains)
+        candidates = network_class.query.filter_by(
+            trial_maker_id=trial_maker.id,
+            full=False,
+            failed=False,
+            participant_group="A",
+        )
+        available = trial_maker._available_networks(candidates).filter(
+            network_class.block == "default"
+        )
+        order_by = [network_class.random_key]
+        if balance_across_chains:
+            order_by = [
+                network_class.head_degree,
+                network_class.head_n_viable_trials,
+            ] + order_by
+        query = available.with_entities(network_class.id).order_by(*order_by).limit(1)
+        statement = str(
+            query.statement.compile(
+                dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+            )
+        )
+
+        # The test database is small, so we discourage sequential scans
+        # to see which plan would be used for a large one.
+        db.session.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = "\n".join(
+            row[0] for row in db.session.execute(text("EXPLAIN " + statement))
+        )
+        db.session.rollback()
+
+        assert "ix_network_registry" in plan
+        assert "Sort" not in plan
@@ -0,0 +1,60 @@
+import threading
+
+from psynet.process import LocalProcessPool
+
+
+def test_pool_is_bounded():
+    pool = LocalProcessPool(max_workers=2, queue_warning_threshold=3)
+    release = threading.Event()
+    started = threading.Semaphore(0)
+    active = []
+    max_active = []
+    lock = threading.Lock()
+
+    def work(i):
+        with lock:
+            active.append(i)
+            max_active.append(len(active))
+        started.release()
+        release.wait(timeout=5)
+        with lock:
+            active.remove(i)
+
+    for i in range(6):
+        pool.submit(work, i=i)
+
+    assert started.acquire(timeout=5)
+    assert started.acquire(timeout=5)
+    statistics = pool.statistics
+    assert statistics["max_workers"] == 2
+    assert statistics["n_running"] == 2
+    assert statistics["n_queued"] == 4
+    assert statistics["max_n_queued"] >= 4
+    assert pool.queue_warning_logged
+
+    release.set()
+    pool.shutdown(wait=True)
+
+    statistics = pool.statistics
+    assert statistics["n_running"] == 0
+    assert statistics["n_queued"] == 0
+    assert statistics["n_finished"] == 6
+    assert max(max_active) == 2
+
+
+def test_errors_do_not_kill_workers():
+    pool = LocalProcessPool(max_workers=1)
+    results = []
+
+    def fail():
+        raise RuntimeError("Test error")
+
+    def succeed(value):
+        results.append(value)
+
+    pool.submit(fail)
+    pool.submit(succeed, value=1)
+    pool.shutdown(wait=True)
+
+    assert results == [1]
+    assert pool.statistics["n_finished"] == 2
@@ -0,0 +1,75 @@
+import atexit
+import time
+
+import pytest
+
+from psynet.metrics import RequestMetricsBuffer
+
+
+def test_request_metrics_buffer_flushes_in_batches():
+    batches = []
+    buffer = RequestMetricsBuffer(write=batches.append, flush_interval=0.05)
+
+    for i in range(10):
+        buffer.record(endpoint="/timeline", duration=i)
+
+    deadline = time.monotonic() + 5
+    while sum(len(batch) for batch in batches) < 10 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    buffer.stop()
+
+    assert sum(len(batch) for batch in batches) == 10
+    assert len(batches) < 10
+    assert all("creation_time" in row for batch in batches for row in batch)
+
+
+def test_request_metrics_buffer_synchronous():
+    batches = []
+    buffer = RequestMetricsBuffer(write=batches.append, flush_interval=0)
+    buffer.record(endpoint="/timeline", duration=0.1)
+    assert len(batches) == 1
+    assert buffer.thread is None
+
+
+def test_request_metrics_buffer_drops_oldest_rows_when_full():
+    batches = []
+    buffer = RequestMetricsBuffer(write=batches.append, capacity=3, flush_interval=60)
+    for i in range(5):
+        buffer.record(duration=i)
+    assert buffer.n_dropped == 2
+    assert buffer.flush() == 3
+    assert [row["duration"] for row in batches[0]] == [2, 3, 4]
+
+
+def test_request_metrics_buffer_survives_write_errors():
+    def write(rows):
+        raise RuntimeError("Database unavailable")
+
+    buffer = RequestMetricsBuffer(write=write, flush_interval=60)
+    buffer.record(duration=1)
+    assert buffer.flush() == 0
+    assert len(buffer) == 0
+
+
+def test_request_metrics_buffer_synchronous_write_errors_are_raised():
+    def write(rows):
+        raise RuntimeError("Database unavailable")
+
+    buffer = RequestMetricsBuffer(write=write, flush_interval=0)
+    with pytest.raises(RuntimeError):
+        buffer.record(duration=1)
+    assert len(buffer) == 0
+
+
+def test_request_metrics_buffer_registers_atexit_once(monkeypatch):
+    registered = []
+    monkeypatch.setattr(atexit, "register", registered.append)
+
+    buffer = RequestMetricsBuffer(write=lambda rows: None, flush_interval=60)
+    buffer.ensure_started()
+    # Simulates a fork, after which the flusher thread is restarted.
+    buffer.pid = None
+    buffer.ensure_started()
+    buffer.stop()
+
+    assert registered == [buffer.stop]
@@ -0,0 +1,52 @@
+from statistics import median
+
+import pytest
+
+from psynet.bot import BotDriver
+from psynet.experiment import get_experiment
+from psynet.pytest_psynet import path_to_test_experiment
+
+
+@pytest.mark.parametrize(
+    "experiment_directory", [path_to_test_experiment("modules")], indirect=True
+)
+@pytest.mark.usefixtures("launched_experiment")
+class TestModuleStatistics:
+    def test_statistics_match_participants(self):
+        for _ in range(2):
+            BotDriver().take_experiment()
+
+        module = get_experiment().timeline.get_module("module_a")
+
+        started = module.started_participants
+        finished = module.finished_participants
+        assert len(started) == 2
+        assert len(finished) == 2
+        assert module.aborted_participants == []
+        assert [p.module_states["module_a"][0].time_started for p in started] == sorted(
+            p.module_states["module_a"][0].time_started for p in started
+        )
+
+        statistics = module.get_participant_statistics()
+        assert statistics["n_started"] == 2
+        assert statistics["n_finished"] == 2
+        assert statistics["n_aborted"] == 0
+        assert (
+            statistics["last_started"]
+            == started[-1].module_states["module_a"][0].time_started
+        )
+        assert (
+            statistics["last_finished"]
+            == finished[-1].module_states["module_a"][0].time_finished
+        )
+        assert statistics["last_aborted"] is None
+        assert statistics["median_finish_time_in_s"] == pytest.approx(
+            median(
+                (state.time_finished - state.time_started).total_seconds()
+                for p in finished
+                for state in p.module_states["module_a"]
+            )
+        )
+
+        assert "2 started" in module.visualize()
+        assert "2 finished" in module.visualize_tooltip()
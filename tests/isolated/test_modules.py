@@ -1,3 +1,4 @@
+import random
 import time
 import uuid
 
@@ -12,6 +13,37 @@ from psynet.timeline import Module, Timeline
 from psynet.trial.static import StaticNode, StaticTrial, StaticTrialMaker
 
 
+@pytest.mark.parametrize(
+    "experiment_directory", [path_to_test_experiment("static")], indirect=True
+)
+@pytest.mark.usefixtures("launched_experiment")
+def test_lazy_nodes_can_be_modified():
+    from psynet.trial.main import TrialNode
+    from psynet.utils import LazyNodes
+
+    module_id = (
+        TrialNode.query.filter(TrialNode.module_id.isnot(None)).first().module_id
+    )
+    expected = LazyNodes(module_id).query().order_by(TrialNode.id).all()
+    assert len(expected) > 1
+
+    nodes = LazyNodes(module_id)
+    nodes.sort(key=lambda node: node.id, reverse=True)
+    assert list(nodes) == expected[::-1]
+
+    nodes = LazyNodes(module_id)
+    random.shuffle(nodes)
+    assert sorted(nodes, key=lambda node: node.id) == expected
+
+    nodes = LazyNodes(module_id)
+    nodes.append(expected[0])
+    assert len(nodes) == len(expected) + 1
+    assert nodes[-1] == expected[0]
+    nodes.pop(0)
+    assert list(nodes) == expected[1:] + expected[:1]
+    assert nodes.get(expected[0].id) == expected[0]
+
+
 def test_repeated_modules():
     with pytest.raises(
         ValueError,
@@ -0,0 +1,40 @@
+from collections import Counter
+from statistics import median
+
+import pytest
+
+from psynet.bot import BotDriver
+from psynet.experiment import get_experiment
+from psynet.participant import Participant
+from psynet.pytest_psynet import path_to_test_experiment
+
+
+@pytest.mark.parametrize(
+    "experiment_directory", [path_to_test_experiment("timeline")], indirect=True
+)
+@pytest.mark.usefixtures("launched_experiment")
+class TestParticipantStatus:
+    def test_aggregates_match_participants(self):
+        for _ in range(2):
+            BotDriver().take_experiment()
+        BotDriver()  # A participant who is still working
+
+        exp = get_experiment()
+        participants = Participant.query.all()
+        complete = [p for p in participants if p.complete]
+        assert len(complete) == 2
+
+        status = exp.get_participant_status()
+        assert status["participant_statuses"] == dict(
+            Counter(p.status for p in participants)
+        )
+        assert status["total_cost"] == pytest.approx(
+            sum(p.calculate_reward() for p in complete)
+        )
+        assert status["median_time_taken"] == pytest.approx(
+            median((p.end_time - p.creation_time).total_seconds() for p in complete)
+        )
+
+        assert exp.amount_spent() == pytest.approx(
+            sum(p.amount_paid() for p in participants)
+        )
@@ -0,0 +1,74 @@
+import pytest
+from dallinger import db
+
+from psynet.bot import BotDriver
+from psynet.experiment import get_trial_maker
+from psynet.participant import Participant
+from psynet.pytest_psynet import path_to_test_experiment
+from psynet.query_counter import count_queries
+
+
+@pytest.mark.parametrize(
+    "experiment_directory", [path_to_test_experiment("static")], indirect=True
+)
+@pytest.mark.usefixtures("launched_experiment")
+class TestGetParticipantTrials:
+    def test_filters_are_applied_in_sql(self):
+        bot = BotDriver()
+        bot.take_experiment()
+
+        trial_maker = get_trial_maker("animals")
+        participant = Participant.query.get(bot.id)
+
+        with count_queries() as counter:
+            trials = trial_maker.get_participant_trials(participant)
+        assert counter.n_queries == 1
+        ((statement, _),) = counter.queries
+        assert "info.participant_id = ?" in statement
+        assert "info.trial_maker_id = ?" in statement
+
+        assert len(trials) == 9
+        assert all(t.trial_maker_id == "animals" for t in trials)
+        assert [t.id for t in trials] == sorted(t.id for t in trials)
+
+        with count_queries() as counter:
+            repeat_trials = trial_maker.get_participant_trials(
+                participant, is_repeat_trial=True, failed=False
+            )
+        ((statement, _),) = counter.queries
+        where_clause = statement.split(" WHERE ")[1]
+        assert "info.is_repeat_trial = " in where_clause
+        assert "info.failed = " in where_clause
+        assert "info.finalized" not in where_clause
+
+        assert repeat_trials == [
+            t for t in trials if t.is_repeat_trial and not t.failed
+        ]
+        assert len(repeat_trials) == 3
+
+    def test_heavy_columns_are_deferred(self):
+        bot = BotDriver()
+        bot.take_experiment()
+
+        trial_maker = get_trial_maker("animals")
+        participant = Participant.query.get(bot.id)
+        db.session.expire_all()
+
+        with count_queries() as counter:
+            trials = trial_maker.get_participant_trials(participant)
+        ((statement, _),) = counter.queries
+        assert "info.definition" not in statement
+        assert "info.answer" not in statement
+
+        # Deferred columns are still loaded on access.
+        with count_queries() as counter:
+            assert trials[0].answer is not None
+        assert counter.n_queries == 1
+
+        db.session.expire_all()
+        with count_queries() as counter:
+            trials = trial_maker.get_participant_trials(
+                participant, load_heavy_columns=True
+            )
+            assert all(t.answer is not None for t in trials)
+        assert counter.n_queries == 1
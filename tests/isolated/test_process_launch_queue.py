@@ -0,0 +1,70 @@
+import threading
+from types import SimpleNamespace
+
+from dallinger import db
+
+from psynet.process import AsyncProcess
+
+
+class RecordingProcess:
+    lock = threading.Lock()
+    launches = []
+
+    @classmethod
+    def launch_many(cls, processes):
+        with cls.lock:
+            cls.launches.append(
+                (threading.get_ident(), [process["id"] for process in processes])
+            )
+
+
+def queue_process(process_id):
+    AsyncProcess.get_launch_queue().append(
+        {
+            "obj": SimpleNamespace(id=process_id),
+            "class": RecordingProcess,
+            "id": process_id,
+            "timeout": None,
+        }
+    )
+
+
+def test_concurrent_sessions_only_launch_their_own_processes():
+    RecordingProcess.launches = []
+    n_threads = 4
+    all_queued = threading.Barrier(n_threads)
+    process_ids = {}
+
+    def work(i):
+        try:
+            ids = [i * 100 + j for j in range(5)]
+            process_ids[threading.get_ident()] = ids
+            for process_id in ids:
+                queue_process(process_id)
+            all_queued.wait(timeout=5)
+            db.session.commit()
+        finally:
+            db.session.remove()
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(RecordingProcess.launches) == n_threads
+    for thread_id, launched_ids in RecordingProcess.launches:
+        assert launched_ids == process_ids[thread_id]
+
+
+def test_rolled_back_processes_are_not_launched():
+    RecordingProcess.launches = []
+    try:
+        db.session.begin()
+        queue_process(1)
+        db.session.rollback()
+        db.session.commit()
+        assert RecordingProcess.launches == []
+        assert AsyncProcess.get_launch_queue() == []
+    finally:
+        db.session.remove()
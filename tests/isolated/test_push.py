@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+from dallinger import db
+
+from psynet.push import (
+    LocalPushBackend,
+    get_notification_count,
+    notify_participant,
+    set_push_backend,
+    wait_for_notification,
+)
+
+
+@pytest.fixture
+def local_push_backend():
+    backend = LocalPushBackend()
+    set_push_backend(backend)
+    yield backend
+    set_push_backend(None)
+
+
+def test_wait_times_out_without_notification(local_push_backend):
+    assert not wait_for_notification(1, since=0, timeout=0.05)
+
+
+def test_notifications_are_sent_on_commit(local_push_backend):
+    notify_participant(1)
+    notify_participant(1)
+    assert get_notification_count(1) == 0
+
+    db.session.commit()
+    assert get_notification_count(1) == 1
+    assert get_notification_count(2) == 0
+    assert wait_for_notification(1, since=0, timeout=0)
+
+
+def test_notifications_are_discarded_on_rollback(local_push_backend):
+    notify_participant(1)
+    db.session.rollback()
+    db.session.commit()
+    assert get_notification_count(1) == 0
+
+
+def test_wait_wakes_up_on_notification(local_push_backend):
+    since = get_notification_count(1)
+
+    def notify():
+        time.sleep(0.05)
+        local_push_backend.publish([1])
+
+    thread = threading.Thread(target=notify)
+    start = time.monotonic()
+    thread.start()
+    assert wait_for_notification(1, since=since, timeout=5)
+    assert time.monotonic() - start < 1
+    thread.join()
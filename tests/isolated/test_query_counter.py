@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from psynet.query_counter import assert_max_queries, count_queries, normalize_sql
+
+
+def test_normalize_sql():
+    assert normalize_sql(
+        "SELECT * FROM node\n  WHERE node.id = %(id_1)s AND node.type = 'x'"
+    ) == normalize_sql(
+        "SELECT * FROM node WHERE node.id = %(id_1)s AND node.type = 'y'"
+    )
+    assert (
+        normalize_sql("SELECT * FROM info WHERE info.id IN (%(id_1)s, %(id_2)s)")
+        == "SELECT * FROM info WHERE info.id IN (?)"
+    )
+
+
+def test_count_queries_detects_repeated_statements():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        with count_queries(n_plus_one_threshold=3) as counter:
+            connection.execute(text("SELECT 1"))
+            for i in range(5):
+                connection.execute(text("SELECT :x"), {"x": i})
+        connection.execute(text("SELECT 2"))
+
+    assert counter.n_queries == 6
+    repeated = counter.repeated_queries()
+    assert len(repeated) == 1
+    statement, call_site, count = repeated[0]
+    assert statement == "SELECT ?"
+    assert count == 5
+    assert "test_query_counter.py" in call_site
+    assert "[N+1?]" in counter.format_report()
+
+
+def test_assert_max_queries():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        with assert_max_queries(2):
+            connection.execute(text("SELECT 1"))
+        with pytest.raises(AssertionError, match="at most 1 SQL queries"):
+            with assert_max_queries(1):
+                connection.execute(text("SELECT 1"))
+                connection.execute(text("SELECT 2"))
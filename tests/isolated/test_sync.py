@@ -6,7 +6,7 @@ from dallinger import db
 from psynet.experiment import get_experiment
 from psynet.participant import Participant
 from psynet.pytest_psynet import path_to_test_experiment
-from psynet.sync import SimpleGrouper
+from psynet.sync import GroupBarrier, SimpleGrouper, SimpleSyncGroup
 
 
 def get_random_id():
@@ -96,3 +96,84 @@ def test_group_allocator(in_experiment_directory, db_session):
 
     assert participants[0].sync_group is None
     grouper.receive_participant(participants[0])
+
+
+@pytest.mark.parametrize(
+    "experiment_directory", [path_to_test_experiment("consents")], indirect=True
+)
+def test_barriers_to_check(in_experiment_directory, db_session):
+    exp = get_experiment()
+    grouper = SimpleGrouper(group_type="main", initial_group_size=3)
+    participants = [new_participant(exp) for _ in range(2)]
+
+    assert exp.get_barriers_to_check() == []
+
+    grouper.receive_participant(participants[0])
+    db.session.commit()
+    assert exp.get_barriers_to_check() == ["main_grouper"]
+
+    participants[0].active_barriers["main_grouper"].checked = True
+    db.session.commit()
+    assert exp.get_barriers_to_check() == []
+    assert exp.get_barriers_to_check(only_changed=False) == ["main_grouper"]
+
+    grouper.receive_participant(participants[1])
+    db.session.commit()
+    assert exp.get_barriers_to_check() == ["main_grouper"]
+
+    participants[1].active_barriers["main_grouper"].checked = True
+    db.session.commit()
+    assert exp.get_barriers_to_check() == []
+
+    # A departure can make the barrier releasable, so it needs to be checked again.
+    participants[1].fail()
+    db.session.commit()
+    assert exp.get_barriers_to_check() == ["main_grouper"]
+
+
+@pytest.mark.parametrize(
+    "experiment_directory", [path_to_test_experiment("consents")], indirect=True
+)
+def test_group_changes_mark_barriers_for_recheck(in_experiment_directory, db_session):
+    exp = get_experiment()
+    barrier = GroupBarrier(id_="main_barrier", group_type="main")
+    participants = [new_participant(exp) for _ in range(3)]
+    group = SimpleSyncGroup(
+        group_type="main",
+        initial_group_size=2,
+        min_group_size=2,
+        n_active_participants=2,
+        accepts_top_ups=True,
+    )
+    group.participants.append(participants[0])
+    group.participants.append(participants[1])
+    db.session.add(group)
+    barrier.receive_participant(participants[0])
+    db.session.commit()
+
+    def mark_checked():
+        participants[0].active_barriers["main_barrier"].checked = True
+        db.session.commit()
+        assert exp.get_barriers_to_check() == []
+
+    # A group member leaving the experiment elsewhere in the timeline
+    mark_checked()
+    participants[1].fail()
+    db.session.commit()
+    assert exp.get_barriers_to_check() == ["main_barrier"]
+
+    # A new member topping up the group
+    mark_checked()
+    group.participants.append(participants[2])
+    db.session.commit()
+    assert exp.get_barriers_to_check() == ["main_barrier"]
+
+
+def test_barrier_default_waiting_logic():
+    grouper = SimpleGrouper("test", initial_group_size=2)
+    assert not grouper.waiting_logic.wake_on_notification
+    assert grouper.waiting_logic.wait_time == 0.5
+
+    grouper = SimpleGrouper("test", initial_group_size=2, wake_on_notification=True)
+    assert grouper.waiting_logic.wake_on_notification
+    assert grouper.waiting_logic.wait_time == 5.0
@@ -4,8 +4,13 @@ from psynet.page import InfoPage
 from psynet.timeline import (
     CodeBlock,
     CreditEstimate,
+    GoTo,
     MediaSpec,
+    NullElt,
+    PageMaker,
     Timeline,
+    get_page_maker_memo,
+    is_no_op,
     join,
     switch,
     while_loop,
@@ -205,3 +210,213 @@ def test_lambda_compiles_as_code_block_in_timeline():
             break
     assert found_lambda is not None
     assert found_lambda.function == my_function
+
+
+class MockExperiment:
+    def __init__(self):
+        self.n_uuids = 0
+
+    def make_uuid(self):
+        self.n_uuids += 1
+        return f"uuid-{self.n_uuids}"
+
+
+class MockVarStore(dict):
+    def set(self, key, value):
+        self[key] = value
+
+    def get(self, key, default=None):
+        return super().get(key, default)
+
+
+class MockParticipant:
+    def __init__(self, timeline, id_=1):
+        self.id = id_
+        self.elt_id = [-1]
+        self.elt_id_max = [len(timeline) - 1]
+        self.page_uuid = None
+        self.page_count = 0
+        self.progress = 0.0
+        self.progress_fixes = []
+        self.estimated_max_time_credit = 10.0
+        self.module_state = None
+        self.counter = 0
+
+
+def test_page_maker_resolution_is_memoized():
+    calls = []
+
+    def make_pages(participant):
+        calls.append(participant.counter)
+        return [
+            InfoPage(f"Page A{participant.counter}", time_estimate=1),
+            InfoPage(f"Page B{participant.counter}", time_estimate=1),
+        ]
+
+    timeline = Timeline(PageMaker(make_pages, time_estimate=2))
+    experiment = MockExperiment()
+    participant = MockParticipant(timeline)
+
+    timeline.advance_page(experiment, participant)
+    n_calls = len(calls)
+
+    page = timeline.get_current_elt(experiment, participant)
+    assert page.content == "Page A0"
+    timeline.get_current_elt(experiment, participant)
+    assert len(calls) == n_calls
+
+    # Responding to a page invalidates the memo
+    participant.counter += 1
+    get_page_maker_memo().invalidate(participant)
+    timeline.advance_page(experiment, participant)
+    assert timeline.get_current_elt(experiment, participant).content == "Page B1"
+    assert len(calls) == n_calls + 1
+
+    # A change of page_uuid made elsewhere also invalidates the memo
+    participant.page_uuid = "changed"
+    timeline.get_current_elt(experiment, participant)
+    assert len(calls) == n_calls + 2
+
+    get_page_maker_memo().invalidate(participant)
+
+
+def test_page_maker_resolution_memo_opt_out():
+    calls = []
+
+    def make_page():
+        calls.append(None)
+        return InfoPage("Page", time_estimate=1)
+
+    timeline = Timeline(PageMaker(make_page, time_estimate=1, cache_resolution=False))
+    experiment = MockExperiment()
+    participant = MockParticipant(timeline, id_=2)
+
+    timeline.advance_page(experiment, participant)
+    n_calls = len(calls)
+    timeline.get_current_elt(experiment, participant)
+    timeline.get_current_elt(experiment, participant)
+    assert len(calls) == n_calls + 2
+
+
+def test_advance_page_resolves_each_page_maker_once():
+    calls = []
+
+    def make_pages():
+        calls.append(None)
+        return [
+            InfoPage("Page A", time_estimate=1),
+        ]
+
+    timeline = Timeline(
+        PageMaker(
+            lambda: PageMaker(make_pages, time_estimate=1),
+            time_estimate=1,
+        )
+    )
+    experiment = MockExperiment()
+    participant = MockParticipant(timeline, id_=3)
+
+    memo = get_page_maker_memo()
+    n_resolutions = memo.n_resolutions
+    page = timeline.advance_page(experiment, participant)
+    assert page.content == "Page A"
+    assert timeline.get_current_elt(experiment, participant) is page
+
+    assert len(calls) == 1
+    assert memo.n_resolutions - n_resolutions == 2
+
+    memo.invalidate(participant)
+
+
+def test_advance_page_reruns_page_makers_after_code_block():
+    # Invalidation is not targeted: we can't tell which state a CodeBlock modifies,
+    # so it discards all of the participant's memoized resolutions, including those
+    # of the page makers that enclose it.
+    calls = []
+
+    def make_pages():
+        calls.append(None)
+        return [
+            CodeBlock(lambda: None),
+            InfoPage("Page A", time_estimate=1),
+        ]
+
+    timeline = Timeline(
+        PageMaker(
+            lambda: PageMaker(make_pages, time_estimate=1),
+            time_estimate=1,
+        )
+    )
+    experiment = MockExperiment()
+    participant = MockParticipant(timeline, id_=4)
+
+    memo = get_page_maker_memo()
+    n_resolutions = memo.n_resolutions
+    page = timeline.advance_page(experiment, participant)
+    assert page.content == "Page A"
+    assert timeline.get_current_elt(experiment, participant) is page
+
+    assert len(calls) == 2
+    assert memo.n_resolutions - n_resolutions == 4
+
+    memo.invalidate(participant)
+
+
+def test_jump_table_skips_no_op_markers_and_static_go_tos():
+    timeline = Timeline(
+        InfoPage("Page A", time_estimate=1),
+        [NullElt() for _ in range(20)],
+        InfoPage("Page B", time_estimate=1),
+    )
+    assert timeline.jump_table[1] == 21
+
+    start = NullElt()
+    go_to = GoTo(start)
+    timeline = Timeline(
+        InfoPage("Page A", time_estimate=1),
+        go_to,
+        NullElt(),
+        start,
+        NullElt(),
+        InfoPage("Page B", time_estimate=1),
+    )
+    assert timeline.jump_table[1] == 5
+    assert timeline.jump_table[2] == 5
+
+
+def test_advance_page_with_jump_table(monkeypatch):
+    n_loops = 50
+    timeline = Timeline(
+        InfoPage("Page A", time_estimate=1),
+        *[
+            while_loop(
+                f"loop_{i}",
+                lambda: False,
+                InfoPage("Loop page", time_estimate=1),
+                expected_repetitions=1,
+                fix_time_credit=False,
+            )
+            for i in range(n_loops)
+        ],
+        InfoPage("Page B", time_estimate=1),
+    )
+    experiment = MockExperiment()
+    participant = MockParticipant(timeline, id_=5)
+    participant.var = MockVarStore()
+
+    timeline.advance_page(experiment, participant)
+    assert timeline.get_current_elt(experiment, participant).content == "Page A"
+
+    consumed = []
+    original_get_current_elt = Timeline.get_current_elt
+
+    def get_current_elt(self, experiment, participant):
+        elt = original_get_current_elt(self, experiment, participant)
+        consumed.append(elt)
+        return elt
+
+    monkeypatch.setattr(Timeline, "get_current_elt", get_current_elt)
+
+    timeline.advance_page(experiment, participant)
+    assert consumed[-1].content == "Page B"
+    assert not any(is_no_op(elt) for elt in consumed)
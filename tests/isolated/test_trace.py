@@ -0,0 +1,83 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from psynet.trace import (
+    SQL_SPAN_NAME,
+    SpanStatistics,
+    finish_trace,
+    get_current_span,
+    install_sql_tracing,
+    start_trace,
+    trace_span,
+    traced,
+)
+
+
+@traced
+def inner():
+    time.sleep(0.01)
+
+
+@traced
+def outer():
+    inner()
+    inner()
+    time.sleep(0.01)
+
+
+def test_traced_without_active_trace():
+    assert get_current_span() is None
+    outer()
+    assert get_current_span() is None
+
+
+def test_span_tree():
+    root = start_trace("GET /timeline")
+    outer()
+    with trace_span("SQL"):
+        pass
+    assert finish_trace() is root
+    assert get_current_span() is None
+
+    assert [child.name for child in root.children] == ["outer", "SQL"]
+    outer_span = root.children[0]
+    assert [child.name for child in outer_span.children] == ["inner", "inner"]
+    assert outer_span.total_time >= 0.03
+    assert 0.01 <= outer_span.self_time < outer_span.total_time
+    assert root.self_time >= 0
+
+    formatted = root.format()
+    assert formatted.splitlines()[0].startswith("GET /timeline: ")
+    assert "    inner x2: " in formatted
+
+
+def test_span_statistics():
+    statistics = SpanStatistics(push_interval=float("inf"))
+    for _ in range(2):
+        start_trace("GET /timeline")
+        outer()
+        statistics.add(finish_trace())
+
+    assert statistics.pending["GET /timeline"][0] == 2
+    assert statistics.pending["outer"][0] == 2
+    assert statistics.pending["inner"][0] == 4
+    count, total_time, self_time, max_time = statistics.pending["inner"]
+    assert total_time == self_time
+    assert max_time <= total_time
+    assert statistics.thread is None
+
+
+def test_sql_span_is_finished_when_statement_fails():
+    install_sql_tracing()
+    engine = create_engine("sqlite://")
+    root = start_trace("GET /timeline")
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing_table"))
+        sql_span = root.children[0]
+        assert sql_span.name == SQL_SPAN_NAME
+        assert sql_span.time_finished is not None
+    finish_trace()
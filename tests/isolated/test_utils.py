@@ -1,3 +1,4 @@
+import functools
 import logging
 import os
 import subprocess
@@ -12,8 +13,10 @@ from psynet.pytest_psynet import path_to_demo_experiment
 from psynet.timeline import Module
 from psynet.utils import (
     DuplicateKeyError,
+    call_function,
     check_todos_before_deployment,
     corr,
+    get_args,
     get_authenticated_session,
     get_folder_size_mb,
     get_package_name,
@@ -136,6 +139,31 @@ def test_median_finish_time_in_s_incomplete_empty(mock_started_and_finished_time
     )
 
 
+def test_get_args():
+    class Example:
+        def method(self, participant, experiment=None):
+            return participant
+
+        @classmethod
+        def class_method(cls, experiment):
+            return experiment
+
+        def __call__(self, trial):
+            return trial
+
+    example = Example()
+
+    for _ in range(2):
+        assert get_args(example.method) == ["participant", "experiment"]
+        assert get_args(Example.method) == ["self", "participant", "experiment"]
+        assert get_args(Example.class_method) == ["experiment"]
+        assert get_args(example) == ["trial"]
+        assert get_args(lambda participant: None) == ["participant"]
+        assert get_args(functools.partial(lambda x, y: None, 1)) == ["y"]
+
+    assert call_function(example.method, participant=1, trial=2) == 1
+
+
 def test_organize_by_key():
     assert organize_by_key(
         [["a", 3], ["b", 7], ["a", 1], ["b", 9]],
@@ -0,0 +1,49 @@
+import pytest
+from dallinger import db
+from sqlalchemy import text
+
+from psynet import field
+from psynet.bot import BotDriver
+from psynet.command_line import _jsonb_column_migration
+from psynet.participant import Participant
+from psynet.pytest_psynet import path_to_test_experiment
+
+
+@pytest.fixture
+def jsonb_participant_vars(monkeypatch):
+    db.session.execute(text(_jsonb_column_migration("participant", "vars")))
+    db.session.commit()
+    monkeypatch.setattr(field, "get_python_object_storage", lambda: "jsonb")
+    yield
+    db.session.rollback()
+    db.session.execute(
+        text(_jsonb_column_migration("participant", "vars", revert=True))
+    )
+    db.session.commit()
+
+
+@pytest.mark.parametrize(
+    "experiment_directory", [path_to_test_experiment("static")], indirect=True
+)
+@pytest.mark.usefixtures("launched_experiment")
+class TestVarPatches:
+    def test_patch_is_visible_to_queries_before_commit(self, jsonb_participant_vars):
+        bot = BotDriver()
+        participant = Participant.query.get(bot.id)
+        participant.var.color = "red"
+        participant.var.count = "123"
+
+        assert not db.session.dirty
+        stored = (
+            db.session.query(text("participant.vars ->> 'color'"))
+            .select_from(Participant)
+            .filter(Participant.id == bot.id)
+            .scalar()
+        )
+        assert stored == "red"
+
+        db.session.commit()
+        db.session.expire_all()
+        participant = Participant.query.get(bot.id)
+        assert participant.var.color == "red"
+        assert participant.var.count == "123"
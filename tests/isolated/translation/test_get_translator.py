@@ -4,7 +4,12 @@ import pytest
 
 from psynet.experiment import import_local_experiment
 from psynet.pytest_psynet import path_to_test_experiment
-from psynet.utils import _get_translator_called_within_psynet
+from psynet.utils import (
+    _TRANSLATOR_REGISTRY,
+    _get_translator_called_within_psynet,
+    get_translator,
+    preload_translators,
+)
 
 
 def test_get_translator_within_psynet():
@@ -22,3 +27,19 @@ def test_get_translator_within_experiment():
     experiment_module = import_local_experiment()["module"]
     translator = experiment_module._
     assert translator.namespace == "experiment"
+
+
+def test_get_translator_is_cached():
+    _1 = get_translator(locale="de", namespace="psynet")
+    _2 = get_translator(locale="de", namespace="psynet")
+    assert _1 is _2
+    assert _1.locale == "de"
+
+    _p = get_translator(context=True, locale="de", namespace="psynet")
+    assert _p is get_translator(context=True, locale="de", namespace="psynet")
+
+
+def test_preload_translators():
+    preload_translators(["de", "en"], namespaces=["psynet"])
+    assert ("psynet", "de", None) in _TRANSLATOR_REGISTRY
+    assert ("psynet", "en", None) not in _TRANSLATOR_REGISTRY